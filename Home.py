@@ -60,7 +60,7 @@ st.markdown("""
 @st.cache_resource
 def get_db_connector():
     """获取数据库连接器（缓存资源）"""
-    return Neo4jConnector()
+    return Neo4jConnector(caller="page:home")
 
 db = get_db_connector()
 
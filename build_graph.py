@@ -20,6 +20,10 @@ class MedicalGraph:
         
         # 直接使用handler的导入状态
         self.import_state = self.handler.import_state
+        # 流水线导入的阶段耗时
+        self.import_stats = self.handler.import_stats
+        # 当前导入阶段的吞吐量和延迟遥测
+        self.telemetry = self.handler.telemetry
         
         # 数据路径
         self.company_path = self.handler.company_path
@@ -30,36 +34,49 @@ class MedicalGraph:
         self.company_product_path = self.handler.company_product_path
         self.product_product = self.handler.product_product
     
-    def create_graphnodes(self, batch_size=10000):
+    def create_graphnodes(self, batch_size=10000, pipelined=False, adaptive=False, progress_callback=None, delta=False, delete_missing=False, concurrent=False):
         """创建图谱节点"""
-        return self.handler.create_graphnodes(batch_size)
+        return self.handler.create_graphnodes(batch_size, pipelined, adaptive, progress_callback, delta, delete_missing, concurrent)
     
-    def create_graphrels(self, batch_size=10000):
+    def create_graphrels(self, batch_size=10000, workers=1, pipelined=False, adaptive=False, progress_callback=None):
         """创建图谱关系"""
-        return self.handler.create_graphrels(batch_size)
+        return self.handler.create_graphrels(batch_size, workers, pipelined, adaptive, progress_callback)
     
-    def import_nodes(self, label, data, is_file=True, batch_size=10000):
+    def import_nodes(self, label, data, is_file=True, batch_size=10000, pipelined=False, writers=1, adaptive=False, dedup=True, delta=False, delete_missing=False):
         """导入节点"""
-        return self.handler.import_nodes(label, data, is_file, batch_size)
+        return self.handler.import_nodes(label, data, is_file, batch_size, pipelined, writers, adaptive, dedup, delta, delete_missing)
 
-    def _import_relationships(self, rel_key, data, start_label, end_label, rel_type, is_file=True, batch_size=10000):
+    def _import_relationships(self, rel_key, data, start_label, end_label, rel_type, is_file=True, batch_size=10000, workers=1, pipelined=False, adaptive=False):
         """导入关系"""
-        return self.handler._import_relationships(rel_key, data, start_label, end_label, rel_type, is_file, batch_size)
+        return self.handler._import_relationships(rel_key, data, start_label, end_label, rel_type, is_file, batch_size, workers, pipelined, adaptive)
 
     def _count_file_lines(self, file_path):
         """计算文件行数"""
         return self.handler._count_file_lines(file_path)
     
+    def ensure_schema(self):
+        """创建约束和索引"""
+        return self.handler.ensure_schema()
+    
+    def verify_schema(self):
+        """检查热点查询是否使用了索引"""
+        return self.handler.verify_schema()
+    
     def reset_import_state(self):
         """重置导入状态"""
         self.handler.reset_import_state()
         self.import_state = self.handler.import_state
     
-    def save_import_state(self):
+    def save_import_state(self, sync=False):
         """保存导入状态"""
-        self.handler.save_import_state()
+        self.handler.save_import_state(sync)
         # 更新本地引用
         self.import_state = self.handler.import_state
+    
+    def load_import_state(self):
+        """从导入日志重新加载导入状态"""
+        self.handler.load_import_state()
+        self.import_state = self.handler.import_state
         
     def run(self, query, **params):
         """执行Cypher查询"""
@@ -5,6 +5,8 @@ import json
 import os
 from py2neo import Graph, Node, Relationship
 
+from src.database_cleaner import PHASE_NAMES, clear_graph
+
 # Neo4j连接配置
 NEO4J_URI = "bolt://localhost:7687"
 NEO4J_USER = "neo4j"
@@ -23,8 +25,10 @@ def connect_to_neo4j():
 def clear_database(graph):
     """清空数据库中的所有节点和关系"""
     try:
-        graph.run("MATCH (n) DETACH DELETE n")
-        print("数据库已清空")
+        result = clear_graph(graph, progress=lambda event: print(
+            f"\r清空{PHASE_NAMES[event['phase']]}: {event['deleted']}/{event['total']}", end="", flush=True
+        ))
+        print(f"\n数据库已清空: 删除 {result['nodes']} 个节点、{result['relationships']} 条关系")
     except Exception as e:
         print(f"清空数据库失败: {str(e)}")
 
@@ -414,6 +414,7 @@ class EntityDetail:
             """
             
             results = self.db.query(query, params)
+            self.db.invalidate(labels=[entity_type])
             return len(results) > 0
             
         except Exception as e:
@@ -444,6 +445,7 @@ class EntityDetail:
                 "source_name": source_name,
                 "target_name": target_name
             })
+            self.db.invalidate(rel_types=[relationship_type])
             
             return len(results) > 0
             
@@ -465,6 +467,7 @@ class EntityDetail:
                 "entity_name": entity_name,
                 "related_name": relationship['related_name']
             })
+            self.db.invalidate(rel_types=[relationship['relationship_type']])
             
             return True
             
@@ -43,11 +43,26 @@ def load_config():
         },
         "analytics": {
             "cache_ttl": 600,
-            "max_nodes_for_analysis": 10000
+            "max_nodes_for_analysis": 10000,
+            "query_timeout": 60
         },
         "share": {
             "link_expiry_days": 7,
             "max_share_links": 100
+        },
+        "backend": {
+            "type": "neo4j",
+            "embedded_path": "data/embedded_graph.sqlite",
+            "fetch_size": 1000,
+            "query_workers": 8
+        },
+        "pool": {
+            "max_size": 32,
+            "caller_limit": 8
+        },
+        "query_cache": {
+            "max_bytes": 67108864,
+            "max_entries": 10000
         }
     }
 
@@ -58,4 +73,10 @@ APP_CONFIG = CONFIG.get("app", {})
 SEARCH_CONFIG = CONFIG.get("search", {})
 EXPORT_CONFIG = CONFIG.get("export", {})
 ANALYTICS_CONFIG = CONFIG.get("analytics", {})
-SHARE_CONFIG = CONFIG.get("share", {}) 
\ No newline at end of file
+SHARE_CONFIG = CONFIG.get("share", {})
+# 查询后端：neo4j / embedded / hybrid（见 utils.graph_backend.create_backends）
+BACKEND_CONFIG = CONFIG.get("backend", {"type": "neo4j"}) 
+# 共享连接池设置（见 src.connection_registry.DEFAULT_SETTINGS）
+POOL_CONFIG = CONFIG.get("pool", {})
+# 查询结果缓存上限（见 utils.query_cache.DEFAULT_SETTINGS）
+QUERY_CACHE_CONFIG = CONFIG.get("query_cache", {}) 
\ No newline at end of file
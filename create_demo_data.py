@@ -5,6 +5,8 @@ import logging
 import json
 import random
 
+from src.database_cleaner import PHASE_NAMES, clear_graph
+
 # 设置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -48,7 +50,9 @@ except Exception as e:
 # 清空数据库
 def clear_database():
     logger.info("清空数据库")
-    graph.run("MATCH (n) DETACH DELETE n")
+    clear_graph(graph, progress=lambda event: logger.info(
+        f"清空{PHASE_NAMES[event['phase']]}: {event['deleted']}/{event['total']}"
+    ))
 
 # 行业数据
 industries = [
@@ -23,6 +23,8 @@ from kg_visualization import (
 )
 from kg_network_visualization import visualize_network, visualize_matrix
 from src.neo4j_handler import Neo4jHandler, Config
+from src.compressed_input import input_size
+from src.import_jobs import ImportJobRunner, ACTIVE_STATUSES, QUEUED, RUNNING, PAUSED, CANCELLED, COMPLETED, FAILED
 from pathlib import Path
 
 # 检测操作系统
@@ -330,8 +332,9 @@ if 'import_history' not in st.session_state:
 if 'last_refresh' not in st.session_state:
     st.session_state.last_refresh = time.time()
 
-if 'is_importing' not in st.session_state:
-    st.session_state.is_importing = False
+# 本会话已写入导入历史的后台任务
+if 'recorded_jobs' not in st.session_state:
+    st.session_state.recorded_jobs = set()
 
 if 'error_message' not in st.session_state:
     st.session_state.error_message = None
@@ -354,6 +357,12 @@ def get_graph_handler():
         logger.error(f"初始化图谱处理器失败: {e}")
         return None
 
+# 后台导入任务执行器：导入在独立线程中运行，页面刷新或重新运行不会中断导入
+@st.cache_resource
+def get_job_runner(_handler):
+    logger.info("启动后台导入任务执行器")
+    return ImportJobRunner(_handler)
+
 # 尝试获取图谱处理器
 try:
     logger.info("尝试初始化图谱处理器")
@@ -363,6 +372,13 @@ except Exception as e:
     logger.error(f"获取图谱处理器时发生异常: {e}")
     handler = None
 
+job_runner = get_job_runner(handler) if handler is not None else None
+if job_runner is not None and not st.session_state.recorded_jobs:
+    # 新会话不重复记录以前结束的任务
+    st.session_state.recorded_jobs = {
+        job["id"] for job in job_runner.jobs() if job["status"] not in ACTIVE_STATUSES
+    }
+
 # 主页面
 # st.markdown("<h3 style='font-size:1.2rem; margin-bottom:0.2rem;'>知识图谱数据导入可视化工具 <span style='font-size:0.8rem; color:#666;'>版本: 1.0</span></h3>", unsafe_allow_html=True)
 
@@ -419,7 +435,9 @@ if handler is None:
 # 简化版本的导入状态获取函数
 def get_simple_import_status():
     try:
-        # 从handler获取导入状态
+        # 从导入日志读取最新的导入状态；后台任务运行时它正在修改同一个状态，直接读取内存中的状态
+        if job_runner is None or job_runner.active_job() is None:
+            handler.load_import_state()
         import_state = handler.import_state
         
         # 提取基本信息
@@ -466,73 +484,120 @@ def get_simple_import_status():
         st.session_state.error_message = f"获取导入状态失败: {str(e)}"
         return None
 
-# 简化版本的导入函数
-def run_simple_import(batch_size):
-    try:
-        logger.info(f"开始导入任务，批次大小: {batch_size}")
-        st.session_state.is_importing = True
-        st.session_state.error_message = None
-        
-        # 记录开始时间
-        start_time = time.time()
-        
-        # 创建Streamlit进度条
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        # 定义进度回调函数
-        def update_progress(current, total, message):
-            if total > 0:
-                progress = min(current / total, 1.0)
-                progress_bar.progress(progress)
-                status_text.text(f"{message}: {current}/{total} ({int(progress * 100)}%)")
-        
-        # 运行导入 - 修复: 确保兼容方法被正确调用
-        logger.info("开始导入节点...")
-        status_text.text("正在导入节点...")
-        node_count = handler.create_graphnodes(batch_size)
-        logger.info(f"节点导入完成，数量: {node_count}")
-        
-        # 更新进度条
-        progress_bar.progress(0.5)
-        status_text.text(f"节点导入完成，数量: {node_count}，正在导入关系...")
-        
-        logger.info("开始导入关系...")
-        rel_count = handler.create_graphrels(batch_size)
-        logger.info(f"关系导入完成，数量: {rel_count}")
-        
-        # 完成进度条
-        progress_bar.progress(1.0)
-        status_text.text(f"导入完成! 共导入 {node_count} 个节点和 {rel_count} 条关系")
+def submit_import_job(batch_size, workers=1, pipelined=False, adaptive=False, delta=False, delete_missing=False,
+                      concurrent_labels=False):
+    """提交后台导入任务"""
+    logger.info(f"提交导入任务，批次大小: {batch_size}，关系导入线程数: {workers}，流水线: {pipelined}，"
+                f"自适应批次: {adaptive}，增量导入: {delta}，删除缺失节点: {delete_missing}，"
+                f"节点标签并行: {concurrent_labels}")
+    st.session_state.error_message = None
+    return job_runner.submit(batch_size, workers, pipelined, adaptive, delta, delete_missing, concurrent_labels)
+
+def record_finished_jobs():
+    """把本会话尚未记录的已结束任务写入导入历史"""
+    for job in job_runner.jobs():
+        if job["id"] in st.session_state.recorded_jobs or job["status"] in ACTIVE_STATUSES:
+            continue
+        st.session_state.recorded_jobs.add(job["id"])
+        if job["status"] == FAILED:
+            st.session_state.error_message = f"导入任务失败: {job['error']}"
+            continue
+        if job["status"] != COMPLETED:
+            continue
         
-        # 记录结束时间
-        end_time = time.time()
-        duration = end_time - start_time
+        params = job["params"]
+        result = job["result"]
+        node_telemetry = result["nodes"]
+        rel_telemetry = result["relationships"]
+        st.session_state.import_history.append({
+            "时间": job["finished_at"],
+            "批次大小": f"自适应(初始{params['batch_size']})" if params["adaptive"] else params["batch_size"],
+            "最终批次": ", ".join(f"{k}:{v}" for k, v in result.get("batch_sizes", {}).items()) if params["adaptive"] else "",
+            "线程数": params["workers"],
+            "导入节点数": result["node_count"],
+            "导入关系数": result["rel_count"],
+            "耗时(秒)": round(result["duration"], 2),
+            "节点速率(行/秒)": round(node_telemetry["rows_per_second"], 1),
+            "关系速率(行/秒)": round(rel_telemetry["rows_per_second"], 1),
+            "节点批次P95(秒)": round(node_telemetry["latency_p95"], 3),
+            "关系批次P95(秒)": round(rel_telemetry["latency_p95"], 3),
+            "解析(MB)": round((node_telemetry["bytes_parsed"] + rel_telemetry["bytes_parsed"]) / 1024 / 1024, 2),
+            "拒绝行数": node_telemetry["rejected"] + rel_telemetry["rejected"],
+            "增量(更新/未变/删除)": " ".join(
+                f"{label}:{d['changed']}/{d['unchanged']}/{d['deleted']}" for label, d in result.get("delta", {}).items()
+            )
+        })
         
-        # 添加到历史记录
-        status = get_simple_import_status()
-        if status:
-            st.session_state.import_history.append({
-                "时间": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "批次大小": batch_size,
-                "导入节点数": node_count,
-                "导入关系数": rel_count,
-                "耗时(秒)": round(duration, 2)
-            })
+        # 流水线导入的各阶段耗时，用于判断瓶颈在解析还是数据库
+        if params["pipelined"] and handler.import_stats:
+            st.session_state.last_import_stats = dict(handler.import_stats)
         
-        # 验证导入结果 - 新增部分
-        import_results = verify_import_results()
-        st.session_state.last_import_results = import_results
+        # 验证导入结果
+        st.session_state.last_import_results = verify_import_results()
+
+def render_import_jobs():
+    """显示后台导入任务的状态和控制按钮，任务运行时定时刷新页面"""
+    job_status_names = {
+        QUEUED: "排队中", RUNNING: "运行中", PAUSED: "已暂停",
+        CANCELLED: "已取消", COMPLETED: "已完成", FAILED: "失败"
+    }
+    record_finished_jobs()
+    job = job_runner.active_job()
+    st.session_state.poll_import_job = bool(job and job["status"] in (QUEUED, RUNNING))
+    
+    if job:
+        phase = {"nodes": "节点", "relationships": "关系"}.get(job["phase"], "")
+        st.markdown(f"**导入任务 {job['id']}**：{job_status_names[job['status']]} {phase}")
+        event = job.get("progress")
+        if event:
+            # 节点阶段占前一半进度，关系阶段占后一半
+            phase_start = 0.5 if job["phase"] == "relationships" else 0.0
+            st.progress(min(phase_start + event["progress"] * 0.5, 1.0))
+            st.markdown(format_telemetry(event))
+        if job.get("error"):
+            st.warning(job["error"])
         
-        logger.info(f"导入任务完成，耗时: {round(duration, 2)}秒")
-        st.session_state.is_importing = False
-        return True
-    except Exception as e:
-        error_msg = f"导入任务失败: {str(e)}\n{traceback.format_exc()}"
-        logger.error(error_msg)
-        st.session_state.error_message = error_msg
-        st.session_state.is_importing = False
-        return False
+        col_pause, col_cancel = st.columns(2)
+        with col_pause:
+            if job["status"] == PAUSED:
+                if st.button("恢复", key="resume_job_btn", use_container_width=True):
+                    job_runner.resume(job["id"])
+                    st.experimental_rerun()
+            elif st.button("暂停", key="pause_job_btn", use_container_width=True,
+                           help="在下一个批次结束后暂停，恢复时从检查点继续"):
+                job_runner.pause(job["id"])
+                st.experimental_rerun()
+        with col_cancel:
+            if st.button("取消", key="cancel_job_btn", use_container_width=True,
+                         help="在下一个批次结束后停止，已导入的数据保留"):
+                job_runner.cancel(job["id"])
+                st.experimental_rerun()
+    
+    jobs = job_runner.jobs()
+    if jobs:
+        with st.expander("导入任务记录", expanded=False):
+            st.dataframe(pd.DataFrame([{
+                "任务": item["id"],
+                "状态": job_status_names.get(item["status"], item["status"]),
+                "提交时间": item["created_at"],
+                "结束时间": item["finished_at"] or "",
+                "批次大小": item["params"]["batch_size"],
+                "线程数": item["params"]["workers"]
+            } for item in reversed(jobs)]), use_container_width=True, height=150)
+            if st.button("清除已结束任务", key="clear_jobs_btn"):
+                job_runner.clear_finished()
+                st.experimental_rerun()
+
+def format_telemetry(event):
+    """把导入遥测事件格式化为一行 Markdown"""
+    eta = event.get("eta_seconds")
+    eta_text = f"{int(eta // 60)}分{int(eta % 60)}秒" if eta is not None else "估算中"
+    return (
+        f"**{event['rows_per_second']:,.0f} 行/秒** · "
+        f"批次延迟 P50 {event['latency_p50']:.2f}s / P95 {event['latency_p95']:.2f}s · "
+        f"已解析 {event['bytes_parsed'] / 1024 / 1024:.1f}/{event['bytes_total'] / 1024 / 1024:.1f} MB · "
+        f"拒绝 {event['rejected']:,} 行 · 剩余约 {eta_text}"
+    )
 
 # 新增: 验证导入结果的函数
 def verify_import_results():
@@ -561,7 +626,7 @@ def verify_import_results():
             
             for file_type, file_path in data_files.items():
                 if os.path.exists(file_path):
-                    file_size = os.path.getsize(file_path) / 1024  # KB
+                    file_size = input_size(file_path) / 1024  # KB
                     results["files"].append({
                         "type": file_type,
                         "path": file_path,
@@ -635,27 +700,28 @@ def check_remaining_data():
                 try:
                     # 获取文件总行数
                     total_lines = handler._count_file_lines(file_path)
-                    # 获取已导入行数
+                    # 获取已导入行数和已读取行数（含被拒绝、去重或未变化而跳过的行）
                     imported = handler.import_state.get(node_type, 0)
-                    # 计算剩余行数
-                    remaining = max(0, total_lines - imported)
+                    consumed = handler.consumed_lines(node_type)
+                    # 计算剩余行数：续传从已读取的行之后开始
+                    remaining = max(0, total_lines - consumed)
                     
                     # 添加验证步骤：检查数据库中实际节点数量
                     query = f"MATCH (n:{node_type}) RETURN count(n) as count"
                     result = handler.g.run(query).data()
                     actual_count = result[0]["count"] if result else 0
                     
-                    # 如果实际节点数量与导入状态不一致，调整剩余数量
+                    # 如果实际节点数量与导入状态不一致，更新已导入数量（剩余行数按已读取行数计算，不受影响）
                     if actual_count > imported:
                         logger.warning(f"{node_type}节点导入状态不一致：导入状态记录{imported}个，实际数据库中有{actual_count}个")
                         # 更新导入状态以匹配实际数据库状态
                         handler.import_state[node_type] = actual_count
-                        remaining = max(0, total_lines - actual_count)
                     
                     # 记录验证详情
                     remaining_data["verification_details"][node_type] = {
                         "total_lines": total_lines,
                         "imported_state": imported,
+                        "consumed_lines": consumed,
                         "actual_count": actual_count,
                         "remaining": remaining
                     }
@@ -672,10 +738,11 @@ def check_remaining_data():
                 try:
                     # 获取文件总行数
                     total_lines = handler._count_file_lines(file_path)
-                    # 获取已导入行数
+                    # 获取已导入行数和已读取行数（含被拒绝、去重或未变化而跳过的行）
                     imported = handler.import_state.get(rel_type, 0)
-                    # 计算剩余行数
-                    remaining = max(0, total_lines - imported)
+                    consumed = handler.consumed_lines(rel_type)
+                    # 计算剩余行数：续传从已读取的行之后开始
+                    remaining = max(0, total_lines - consumed)
                     
                     # 添加验证步骤：尝试检查数据库中实际关系数量
                     # 由于关系类型可能有多种，这里使用一个简化的方法
@@ -697,17 +764,17 @@ def check_remaining_data():
                         result = handler.g.run(query).data()
                         actual_count = result[0]["count"] if result else 0
                     
-                    # 如果实际关系数量与导入状态不一致，调整剩余数量
+                    # 如果实际关系数量与导入状态不一致，更新已导入数量（剩余行数按已读取行数计算，不受影响）
                     if actual_count > imported:
                         logger.warning(f"{rel_type}关系导入状态不一致：导入状态记录{imported}条，实际数据库中有{actual_count}条")
                         # 更新导入状态以匹配实际数据库状态
                         handler.import_state[rel_type] = actual_count
-                        remaining = max(0, total_lines - actual_count)
                     
                     # 记录验证详情
                     remaining_data["verification_details"][rel_type] = {
                         "total_lines": total_lines,
                         "imported_state": imported,
+                        "consumed_lines": consumed,
                         "actual_count": actual_count,
                         "remaining": remaining
                     }
@@ -812,13 +879,52 @@ with tab2:
             step=1000
         )
         
+        # 关系导入并行线程数，按起始节点分区，多个线程同时写入
+        import_workers = st.slider(
+            "关系导入线程数",
+            min_value=1,
+            max_value=max(os.cpu_count() or 1, 1) * 2,
+            value=config["app"].get("import_workers", 1),
+            help="大于1时按起始节点哈希分区并行导入关系，建议不超过Neo4j服务器的CPU核数"
+        )
+        
+        pipelined_import = st.checkbox(
+            "流水线导入",
+            value=config["app"].get("pipelined_import", False),
+            help="解析JSON与写入数据库并行执行，并记录各阶段耗时"
+        )
+        
+        adaptive_batch = st.checkbox(
+            "自适应批次大小",
+            value=config["app"].get("adaptive_batch", False),
+            help="以上面的批次大小为初始值，根据事务耗时和数据量自动调整；调整结果会保存供下次导入使用"
+        )
+        
+        concurrent_labels = st.checkbox(
+            "节点标签并行导入",
+            value=config["app"].get("concurrent_labels", False),
+            help="公司、行业、产品三类节点同时导入，各自使用独立的数据库连接"
+        )
+        
+        delta_import = st.checkbox(
+            "增量导入节点",
+            value=config["app"].get("delta_import", False),
+            help="重新扫描节点文件，只写入新增或内容变化的节点并更新其属性，适合数据源刷新后的日常更新"
+        )
+        delete_missing = st.checkbox(
+            "删除已不存在的节点",
+            value=False,
+            disabled=not delta_import,
+            help="增量导入时删除上次导入过、但本次文件中已不存在的节点及其关系"
+        )
+        
         # 并排放置按钮
         col_start, col_refresh = st.columns(2)
         
         with col_start:
             # 添加更详细的提示
             import_help = "导入指定批次大小的节点和关系数据到Neo4j数据库"
-            if st.button("开始导入", disabled=st.session_state.is_importing, key="start_btn", use_container_width=True, help=import_help):
+            if st.button("开始导入", disabled=job_runner is None or job_runner.active_job() is not None, key="start_btn", use_container_width=True, help=import_help):
                 with st.spinner('正在导入数据，请稍候...'):
                     try:
                         # 首先检查Neo4j连接是否成功初始化
@@ -836,7 +942,8 @@ with tab2:
                                 
                                 # 新增：检查是否有数据需要导入
                                 remaining_data = check_remaining_data()
-                                if remaining_data.get("total_remaining", 0) == 0:
+                                # 增量导入总是重新扫描文件，不受已导入进度影响
+                                if remaining_data.get("total_remaining", 0) == 0 and not delta_import:
                                     st.info("所有数据已导入完成，无需再次导入")
                                     
                                     # 显示当前数据库状态摘要
@@ -851,12 +958,13 @@ with tab2:
                                     # 显示剩余数据信息
                                     st.info(f"发现 {remaining_data['total_remaining']} 条数据待导入")
                                     
-                                    # 如果有数据需要导入，则执行导入
-                                    success = run_simple_import(batch_size)
-                                    if success:
-                                        st.success(f"成功导入一批数据，批次大小: {batch_size}")
-                                    else:
-                                        st.error("导入过程中出现错误，请查看下方错误信息")
+                                    # 如果有数据需要导入，则提交后台导入任务
+                                    job_id = submit_import_job(
+                                        batch_size, import_workers, pipelined_import, adaptive_batch,
+                                        delta_import, delta_import and delete_missing, concurrent_labels
+                                    )
+                                    st.success(f"已提交后台导入任务 {job_id}，批次大小: {batch_size}")
+                                    st.experimental_rerun()
                             except Exception as e:
                                 error_msg = f"Neo4j数据库连接测试失败: {str(e)}"
                                 logger.error(error_msg)
@@ -879,6 +987,10 @@ with tab2:
                 st.session_state.last_refresh = time.time()
                 st.experimental_rerun()
         
+        # 后台导入任务状态
+        if job_runner is not None:
+            render_import_jobs()
+        
         # 显示错误信息
         if st.session_state.error_message:
             with st.expander("查看错误详情", expanded=False):  # 默认折叠错误信息
@@ -889,10 +1001,30 @@ with tab2:
         
         # 高级选项作为折叠面板
         with st.expander("高级选项", expanded=False):
+            # 约束和索引：MERGE/MATCH 按 name 查找节点，缺少索引时每行都是全标签扫描
+            if st.button("创建约束并检查索引使用", key="schema_btn"):
+                with st.spinner("正在创建约束和索引..."):
+                    handler.ensure_schema()
+                    schema_report = handler.verify_schema()
+                if schema_report:
+                    st.dataframe(pd.DataFrame([{
+                        "查询": item["query"],
+                        "使用索引": "是" if item["uses_index"] else "否",
+                        "执行计划算子": " → ".join(item["operators"])
+                    } for item in schema_report]), use_container_width=True)
+                else:
+                    st.error("无法获取执行计划，请查看日志")
+            
+            # 后台导入任务运行时重置会与它同时修改导入状态和数据库，禁用重置操作
+            import_running = job_runner is not None and job_runner.active_job() is not None
+            running_help = "后台导入任务运行中，请等待完成或取消后再重置" if import_running else None
+            
             st.warning("警告：重置导入状态将清除所有导入进度，无法恢复！")
-            if st.button("重置导入状态", key="reset_btn"):
+            if st.button("重置导入状态", key="reset_btn", disabled=import_running, help=running_help):
                 confirm = st.text_input("输入'确认'以重置所有导入状态（这将清除所有导入进度）:")
-                if confirm == "确认":
+                if confirm == "确认" and job_runner is not None and job_runner.active_job() is not None:
+                    st.error("后台导入任务运行中，无法重置导入状态")
+                elif confirm == "确认":
                     try:
                         handler.reset_import_state()
                         st.success("导入状态已重置")
@@ -903,12 +1035,22 @@ with tab2:
             
             # 新增：数据库完全重置功能
             st.error("危险操作：重置Neo4j数据库将删除所有节点和关系！")
-            if st.button("重置Neo4j数据库", key="reset_db_btn"):
+            recreate_db = st.checkbox("尝试直接重建数据库（最快，需要企业版和管理员权限，会删除约束和索引）",
+                                      key="recreate_db_checkbox")
+            if st.button("重置Neo4j数据库", key="reset_db_btn", disabled=import_running, help=running_help):
                 confirm_db = st.text_input("输入'我确认删除所有数据'以重置Neo4j数据库（此操作将删除所有节点和关系，无法恢复）:")
-                if confirm_db == "我确认删除所有数据":
+                if confirm_db == "我确认删除所有数据" and job_runner is not None and job_runner.active_job() is not None:
+                    st.error("后台导入任务运行中，无法重置Neo4j数据库")
+                elif confirm_db == "我确认删除所有数据":
                     try:
-                        # 执行清空数据库的Cypher查询
-                        handler.g.run("MATCH (n) DETACH DELETE n")
+                        # 分块清空数据库，关系阶段占前一半进度，节点阶段占后一半
+                        clear_bar = st.progress(0.0)
+                        def show_clear_progress(event):
+                            phase_start = 0.5 if event["phase"] == "nodes" else 0.0
+                            done = event["deleted"] / event["total"] if event["total"] else 1.0
+                            clear_bar.progress(min(phase_start + done * 0.5, 1.0))
+                        if not handler.clear_database(progress=show_clear_progress, recreate=recreate_db):
+                            raise RuntimeError("清空数据库失败，详见日志")
                         # 重置导入状态
                         handler.reset_import_state()
                         st.success("Neo4j数据库已重置，所有节点和关系已删除")
@@ -994,6 +1136,24 @@ with tab2:
                     # 显示关系数量
                     st.markdown("<h6 style='font-size:0.8rem; margin:0.1rem 0;'>关系统计</h6>", unsafe_allow_html=True)
                     st.metric("总关系数", f"{results['total_rels']:,}")
+        
+        # 流水线导入的阶段耗时
+        if st.session_state.get('last_import_stats'):
+            with st.expander("流水线阶段耗时", expanded=False):
+                bottleneck_names = {"database": "数据库写入", "parsing": "数据解析", "balanced": "均衡"}
+                stage_rows = []
+                for key, stats in st.session_state.last_import_stats.items():
+                    stage_rows.append({
+                        "数据": key,
+                        "批次数": stats["batches"],
+                        "行数": stats["rows"],
+                        "解析(秒)": round(stats["parse_seconds"], 2),
+                        "写入(秒)": round(stats["write_seconds"], 2),
+                        "等待写入(秒)": round(stats["reader_blocked_seconds"], 2),
+                        "等待数据(秒)": round(stats["writer_idle_seconds"], 2),
+                        "瓶颈": bottleneck_names.get(stats["bottleneck"], stats["bottleneck"])
+                    })
+                st.dataframe(pd.DataFrame(stage_rows), use_container_width=True)
     
     with col_history:
         # 导入历史
@@ -1635,4 +1795,9 @@ with tab5:
                 
                 # 显示洞察
                 for insight in insights:
-                    st.markdown(f"- {insight}")
\ No newline at end of file
+                    st.markdown(f"- {insight}")
+
+# 后台导入任务运行时定时刷新页面以更新进度（页面只轮询状态，不参与导入）
+if st.session_state.get("poll_import_job"):
+    time.sleep(2)
+    st.experimental_rerun()
@@ -15,6 +15,8 @@ from utils.db_connector import Neo4jConnector
 from utils.export_handler import ExportHandler
 from utils.analytics import Analytics
 from utils.logger import setup_logger
+from src.database_cleaner import clear_graph
+from src.graph_writes import ANY
 import time
 
 # 设置日志
@@ -55,7 +57,7 @@ st.title("📊 数据管理")
 @st.cache_resource
 def get_components():
     """获取组件实例（缓存资源）"""
-    db = Neo4jConnector()
+    db = Neo4jConnector(caller="page:data")
     return {
         "db": db,
         "export_handler": ExportHandler(db),
@@ -96,6 +98,9 @@ with tab1:
                 # 导入节点数据
                 nodes_imported = 0
                 relationships_imported = 0
+                # 本次导入改动的标签和关系类型，只失效依赖它们的查询缓存
+                touched_labels = []
+                touched_rel_types = []
                 
                 # 导入公司数据
                 if company_file:
@@ -110,6 +115,7 @@ with tab1:
                         )
                     
                     nodes_imported += len(company_data)
+                    touched_labels.append("company")
                 
                 # 导入行业数据
                 if industry_file:
@@ -124,6 +130,7 @@ with tab1:
                         )
                     
                     nodes_imported += len(industry_data)
+                    touched_labels.append("industry")
                 
                 # 导入产品数据
                 if product_file:
@@ -138,6 +145,7 @@ with tab1:
                         )
                     
                     nodes_imported += len(product_data)
+                    touched_labels.append("product")
                 
                 # 导入关系数据
                 # 导入公司-行业关系
@@ -153,6 +161,7 @@ with tab1:
                         )
                     
                     relationships_imported += len(company_industry_data)
+                    touched_rel_types.append("所属行业")
                 
                 # 导入公司-产品关系
                 if company_product_file:
@@ -167,6 +176,7 @@ with tab1:
                         )
                     
                     relationships_imported += len(company_product_data)
+                    touched_rel_types.append("主营产品")
                 
                 # 导入行业-行业关系
                 if industry_industry_file:
@@ -181,12 +191,13 @@ with tab1:
                         )
                     
                     relationships_imported += len(industry_industry_data)
+                    touched_rel_types.append("上级行业")
                 
                 # 显示导入结果
                 if nodes_imported > 0 or relationships_imported > 0:
                     st.success(f"✅ 成功导入 {nodes_imported} 个节点和 {relationships_imported} 条关系")
-                    # 清除缓存
-                    st.cache_data.clear()
+                    # 失效依赖这些标签和关系类型的缓存
+                    db.invalidate(touched_labels, touched_rel_types)
                 else:
                     st.warning("未导入任何数据，请上传至少一个数据文件")
             
@@ -272,16 +283,17 @@ with tab2:
                         RETURN id(a) as from, id(b) as to, type(r) as label, r as properties
                         """
                         
-                        nodes_results = db.query(nodes_query)
-                        edges_results = db.query(edges_query)
-                        
-                        nodes = [{"id": r["id"], "label": r["label"], "type": r["type"], **dict(r["properties"])} for r in nodes_results]
-                        edges = [{"from": r["from"], "to": r["to"], "label": r["label"], **dict(r["properties"])} for r in edges_results]
+                        # 边读边写入导出文件，不在内存中保留完整的节点和边列表
+                        nodes = ({"id": r["id"], "label": r["label"], "type": r["type"], **dict(r["properties"])} for r in db.stream(nodes_query))
+                        edges = ({"from": r["from"], "to": r["to"], "label": r["label"], **dict(r["properties"])} for r in db.stream(edges_query))
                         
                         format_mapping = {"JSON": "json", "CSV": "csv", "Excel": "xlsx"}
-                        success, message, file_data = export_handler.export_graph_data(
+                        success, message, export_path = export_handler.export_graph_file(
                             nodes, edges, format_mapping[export_format]
                         )
+                        if success:
+                            with open(export_path, "rb") as f:
+                                file_data = f.read()
                         filename = f"knowledge_graph_full.{format_mapping[export_format]}"
                     
                     elif export_type == "分析报告":
@@ -462,8 +474,13 @@ with tab4:
                     {"name": "小米手机", "description": "小米生产的智能手机"}
                 ]
                 
-                # 清除现有数据
-                db.query("MATCH (n) DETACH DELETE n")
+                # 分块清除现有数据，关系阶段占前一半进度，节点阶段占后一半
+                clear_bar = st.progress(0.0)
+                def show_clear_progress(event):
+                    phase_start = 0.5 if event["phase"] == "nodes" else 0.0
+                    done = event["deleted"] / event["total"] if event["total"] else 1.0
+                    clear_bar.progress(min(phase_start + done * 0.5, 1.0))
+                clear_graph(db.graph, progress=show_clear_progress)
                 
                 # 导入公司节点
                 for company in company_data:
@@ -542,8 +559,8 @@ with tab4:
                 st.success("✅ 示例数据导入成功！")
                 st.info("🎉 您现在可以使用其他功能页面来探索这些数据了")
                 
-                # 清除缓存
-                st.cache_data.clear()
+                # 整个数据库已重建，失效所有缓存
+                db.invalidate(labels=[ANY], rel_types=[ANY])
                 
             except Exception as e:
                 st.error(f"导入示例数据失败: {str(e)}")
@@ -621,4 +638,4 @@ with st.sidebar:
         - JSON - 结构化数据
         - CSV - 表格数据
         - Excel - 电子表格
-        """)
\ No newline at end of file
+        """)
\ No newline at end of file
@@ -15,6 +15,7 @@ import json
 from datetime import datetime
 
 # 导入自定义模块
+from config import SEARCH_CONFIG
 from utils.db_connector import Neo4jConnector
 from utils.data_processor import process_neo4j_results, get_entity_options
 from utils.logger import setup_logger
@@ -115,7 +116,7 @@ def render_echarts_html(options, height="700px"):
 @st.cache_resource
 def get_db_connector():
     """获取数据库连接器（缓存资源）"""
-    return Neo4jConnector()
+    return Neo4jConnector(caller="page:graph")
 
 db = get_db_connector()
 
@@ -141,13 +142,11 @@ entity_type = st.sidebar.selectbox(
 # 搜索框
 search_query = st.sidebar.text_input("搜索实体", placeholder="输入实体名称")
 
-# 获取实体列表
-@st.cache_data(ttl=300)
+# 获取实体列表（结果缓存在连接器的共享查询缓存中）
 def get_entities_cached(entity_type, search_term=""):
     """缓存实体列表查询结果"""
-    return get_entity_options(db, entity_type, search_term)
+    return get_entity_options(db, entity_type, search_term, ttl=SEARCH_CONFIG.get("cache_ttl", 300))
 
-@st.cache_data(ttl=300)
 def get_related_industries(industry_name):
     """获取与指定行业相关的其他行业"""
     query = """
@@ -155,7 +154,7 @@ def get_related_industries(industry_name):
     OPTIONAL MATCH (i)-[r]-(related:industry)
     RETURN collect(distinct related) as related_industries
     """
-    results = db.query(query, {"name": industry_name})
+    results = db.query(query, {"name": industry_name}, ttl=SEARCH_CONFIG.get("cache_ttl", 300))
     if results and "related_industries" in results[0]:
         return results[0]["related_industries"]
     return []
@@ -55,17 +55,20 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # 初始化数据库连接和搜索引擎
+@st.cache_resource
+def get_db_connector():
+    """获取数据库连接器实例（缓存资源，连接来自共享连接池）"""
+    return Neo4jConnector(caller="page:search")
+
 @st.cache_resource
 def get_search_engine():
     """获取搜索引擎实例（缓存资源）"""
-    db = Neo4jConnector()
-    return SearchEngine(db)
+    return SearchEngine(get_db_connector())
 
 @st.cache_resource
 def get_export_handler():
     """获取导出处理器实例（缓存资源）"""
-    db = Neo4jConnector()
-    return ExportHandler(db)
+    return ExportHandler(get_db_connector())
 
 search_engine = get_search_engine()
 export_handler = get_export_handler()
@@ -242,7 +245,7 @@ with col2:
         
         # 获取一些示例实体
         try:
-            db = Neo4jConnector()
+            db = get_db_connector()
             sample_query = """
             CALL {
                 MATCH (c:company) RETURN c.name as name, 'company' as type LIMIT 3
@@ -291,7 +294,7 @@ if st.session_state.selected_entity:
     with detail_tab1:
         # 显示基本信息
         try:
-            db = Neo4jConnector()
+            db = get_db_connector()
             info_query = f"""
             MATCH (n:{entity_type} {{name: $name}})
             RETURN n.name as name, n.description as description
@@ -55,7 +55,7 @@ st.markdown("""
 @st.cache_resource
 def get_analytics():
     """获取分析工具实例（缓存资源）"""
-    db = Neo4jConnector()
+    db = Neo4jConnector(caller="page:analytics")
     return Analytics(db)
 
 analytics = get_analytics()
@@ -75,7 +75,7 @@ analysis_type = st.sidebar.selectbox(
 
 # 刷新数据按钮
 if st.sidebar.button("🔄 刷新数据", help="重新获取最新的分析数据"):
-    st.cache_data.clear()
+    analytics.db.cache.clear()
     st.rerun()
 
 # 分析选项
@@ -88,9 +88,11 @@ if analysis_type == "概览分析":
     
     # 获取基础统计数据
     with st.spinner("正在加载概览数据..."):
-        node_stats = analytics.get_node_statistics()
-        relationship_stats = analytics.get_relationship_statistics()
-        network_analysis = analytics.get_network_analysis()
+        # 三组统计的查询一次并发执行
+        overview = analytics.collect(["nodes", "relationships", "network"])
+        node_stats = overview["nodes"]
+        relationship_stats = overview["relationships"]
+        network_analysis = overview["network"]
     
     if node_stats and relationship_stats:
         # 显示关键指标
@@ -171,8 +173,9 @@ elif analysis_type == "节点分析":
     st.subheader("🔍 节点详细分析")
     
     with st.spinner("正在分析节点数据..."):
-        node_stats = analytics.get_node_statistics()
-        centrality_metrics = analytics.calculate_centrality_metrics(limit=15)
+        node_analysis = analytics.collect(["nodes", "centrality"], centrality_limit=15)
+        node_stats = node_analysis["nodes"]
+        centrality_metrics = node_analysis["centrality"]
     
     if node_stats:
         # 节点属性完整性分析
@@ -211,6 +214,8 @@ elif analysis_type == "节点分析":
                     st.write(f"- 有描述: {row['with_description']:,}")
                     st.write(f"- 完整性: {row['completion_rate']:.1f}%")
                     st.write("")
+    else:
+        st.warning("无法获取节点统计数据，请检查数据库连接")
     
     # 中心性分析
     if centrality_metrics:
@@ -292,6 +297,8 @@ elif analysis_type == "节点分析":
                     }),
                     use_container_width=True
                 )
+    else:
+        st.warning("无法计算节点中心性指标，请检查数据库连接")
 
 elif analysis_type == "关系分析":
     st.subheader("🔗 关系详细分析")
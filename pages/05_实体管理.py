@@ -8,6 +8,7 @@ from datetime import datetime
 import json
 
 # 导入自定义模块
+from src.graph_writes import ANY
 from utils.db_connector import Neo4jConnector
 from utils.search_engine import SearchEngine
 from utils.logger import setup_logger
@@ -71,7 +72,7 @@ st.markdown("""
 @st.cache_resource
 def get_components():
     """获取组件实例（缓存资源）"""
-    db = Neo4jConnector()
+    db = Neo4jConnector(caller="page:entities")
     return {
         "db": db,
         "search_engine": SearchEngine(db),
@@ -139,7 +140,7 @@ search_query = st.sidebar.text_input("搜索关键词", placeholder="输入实
 st.sidebar.subheader("⚡ 快速操作")
 
 if st.sidebar.button("🔄 刷新数据"):
-    st.cache_data.clear()
+    db.invalidate(labels=[selected_entity_type])
     st.rerun()
 
 if st.sidebar.button("📊 查看统计"):
@@ -327,6 +328,8 @@ elif management_mode == "edit":
                             """
                             
                             db.query(delete_query, {"name": entity_name})
+                            # DETACH DELETE 同时删除了各种类型的关系
+                            db.invalidate(labels=[entity_type], rel_types=[ANY])
                             
                             st.success(f"实体 '{entity_name}' 已成功删除")
                             
@@ -430,6 +433,7 @@ elif management_mode == "create":
                         """
                         
                         results = db.query(create_query, params)
+                        db.invalidate(labels=[selected_entity_type])
                         
                         if results:
                             st.success(f"✅ 成功创建{entity_type_options[selected_entity_type]} '{new_name}'")
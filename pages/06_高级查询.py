@@ -69,7 +69,7 @@ st.markdown("""
 @st.cache_resource
 def get_query_builder():
     """获取查询构建器实例（缓存资源）"""
-    db = Neo4jConnector()
+    db = Neo4jConnector(caller="page:query")
     return QueryBuilder(db)
 
 query_builder = get_query_builder()
@@ -535,7 +535,7 @@ with tab3:
     
     with col2:
         if st.button("🔄 刷新模板"):
-            st.cache_data.clear()
+            query_builder.db.invalidate(labels=["QueryTemplate"])
             st.rerun()
     
     # 获取模板列表
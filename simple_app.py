@@ -7,6 +7,9 @@ from datetime import datetime
 import logging
 import sys
 
+from src.compressed_input import input_size, open_text
+from src.columnar_staging import ColumnarInput, staged_input
+
 # 确保日志目录存在
 os.makedirs("logs", exist_ok=True)
 
@@ -109,14 +112,21 @@ st.title("知识图谱数据查看工具 - 简化版")
 
 # 节点和关系数据加载函数
 def load_data_file(filepath, limit=None):
-    """加载JSON行数据文件，并返回DataFrame"""
+    """加载JSON行数据文件（支持压缩文件和分片目录），并返回DataFrame"""
     try:
+        # 有列式暂存文件时按列读取，不再逐行解析 JSON
+        staged = staged_input(filepath)
+        if staged:
+            with ColumnarInput(staged) as source:
+                return source.to_pandas(limit)
+        
         if not os.path.exists(filepath):
             logger.warning(f"数据文件不存在: {filepath}")
             return pd.DataFrame()
         
         data = []
-        with open(filepath, 'r', encoding='utf-8') as f:
+        # 压缩文件（.gz/.zst/.xz）和分片目录边读边解压
+        with open_text(filepath) as f:
             for i, line in enumerate(f):
                 if limit and i >= limit:
                     break
@@ -227,7 +237,7 @@ with tab3:
     
     for name, path in data_paths.items():
         if os.path.exists(path):
-            size = os.path.getsize(path) / 1024  # KB
+            size = input_size(path) / 1024  # KB
             mtime = datetime.fromtimestamp(os.path.getmtime(path)).strftime('%Y-%m-%d %H:%M:%S')
             status = "存在"
         else:
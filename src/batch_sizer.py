@@ -0,0 +1,122 @@
+"""
+自适应批次大小控制器，根据事务耗时和批次数据量动态调整导入批次大小
+"""
+import logging
+import threading
+
+logger = logging.getLogger("BatchSizer")
+
+# 表示事务超时或内存不足的错误标识，遇到时缩小批次重试
+RESOURCE_ERROR_MARKERS = (
+    "MemoryPoolOutOfMemoryError", "TransactionOutOfMemory", "OutOfMemory",
+    "TransactionTimedOut", "TransactionTimedOutClientConfiguration", "timed out", "Timeout"
+)
+
+
+def is_resource_error(error):
+    """判断异常是否由事务超时或内存不足引起"""
+    text = f"{type(error).__name__} {getattr(error, 'code', '') or ''} {error}"
+    return any(marker in text for marker in RESOURCE_ERROR_MARKERS)
+
+
+class AdaptiveBatchSizer:
+    """
+    自适应批次大小控制器
+
+    - 事务耗时超过目标值时按比例缩小批次
+    - 遇到超时或内存错误时批次减半
+    - 耗时低于目标且吞吐量仍在提升时逐步增大批次，吞吐量下降时退回到最佳批次
+    - 按平均每行字节数限制批次，避免宽行（如长描述）导致单个事务数据量过大
+    """
+
+    def __init__(self, initial=10000, min_size=100, max_size=50000,
+                 target_latency=2.0, max_payload_bytes=8 * 1024 * 1024,
+                 growth=1.25, backoff=0.7):
+        """
+        初始化控制器
+
+        Args:
+            initial: 初始批次大小
+            min_size: 最小批次大小
+            max_size: 最大批次大小
+            target_latency: 单个事务的目标耗时（秒）
+            max_payload_bytes: 单个批次的最大数据量（字节）
+            growth: 增大批次时的倍数
+            backoff: 耗时超过目标时缩小批次的倍数
+        """
+        # 调用方指定的初始批次超出上下限时以初始批次为准，不能把很小的批次抬高到 min_size 后保存
+        self.min_size = max(1, min(min_size, int(initial)))
+        self.max_size = max(max_size, int(initial))
+        self.target_latency = target_latency
+        self.max_payload_bytes = max_payload_bytes
+        self.growth = growth
+        self.backoff = backoff
+
+        self._lock = threading.Lock()
+        self._size = self._clamp(initial)
+        self._row_bytes = None
+        self._best_size = self._size
+        self._best_throughput = 0.0
+
+    @property
+    def size(self):
+        """当前批次大小（已按平均行字节数限制数据量）"""
+        with self._lock:
+            size = self._size
+            if self._row_bytes:
+                size = min(size, int(self.max_payload_bytes / self._row_bytes))
+            return max(self.min_size, size)
+
+    def observe_payload(self, rows, nbytes):
+        """
+        记录读取到的批次数据量，更新平均每行字节数
+
+        Args:
+            rows: 行数
+            nbytes: 字节数
+        """
+        if rows <= 0:
+            return
+        with self._lock:
+            row_bytes = nbytes / rows
+            if self._row_bytes is None:
+                self._row_bytes = row_bytes
+            else:
+                self._row_bytes = 0.8 * self._row_bytes + 0.2 * row_bytes
+
+    def record(self, rows, seconds):
+        """
+        记录一次成功写入的行数和耗时，并调整批次大小
+
+        Args:
+            rows: 写入行数
+            seconds: 事务耗时（秒）
+        """
+        if rows <= 0 or seconds <= 0:
+            return
+        with self._lock:
+            throughput = rows / seconds
+            if seconds > self.target_latency:
+                self._size = self._clamp(self._size * self.backoff)
+            elif throughput >= self._best_throughput:
+                self._best_throughput = throughput
+                self._best_size = self._size
+                # 只有当前批次已经写满时才值得继续增大
+                if rows >= self._size * 0.9:
+                    # 很小的批次按倍数取整后不变，至少增大 1
+                    self._size = self._clamp(max(self._size + 1, self._size * self.growth))
+            elif throughput < self._best_throughput * 0.9:
+                self._size = self._best_size
+
+    def shrink(self):
+        """遇到超时或内存错误时批次减半"""
+        with self._lock:
+            self._size = self._clamp(self._size // 2)
+            self._best_size = min(self._best_size, self._size)
+            # 之前的吞吐量记录已不可靠，重新探测
+            self._best_throughput = 0.0
+            logger.warning(f"事务超时或内存不足，批次大小缩小为 {self._size}")
+            return self._size
+
+    def _clamp(self, size):
+        return max(self.min_size, min(self.max_size, int(size)))
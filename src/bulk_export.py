@@ -0,0 +1,255 @@
+"""
+离线批量导入：把 data/ 下的节点和关系文件转换为 neo4j-admin database import 所需的 CSV
+
+用法:
+    python -m src.bulk_export --output data/bulk_import
+    neo4j-admin database import full <输出的命令参数>
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+
+from src.neo4j_handler import resolve_data_paths
+from src.compressed_input import open_text
+from src.columnar_staging import ColumnarInput, is_columnar
+from src.field_mapping import NodeMapping, relationship_mapping
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("BulkExporter")
+
+# 节点标签及其数据文件路径键名（见 resolve_data_paths）
+NODE_SPECS = [
+    ("company", "company_path"),
+    ("industry", "industry_path"),
+    ("product", "product_path"),
+]
+
+# 关系键名、数据文件路径属性、起止标签和关系类型，与 create_graphrels 保持一致
+REL_SPECS = [
+    ("company_industry", "company_industry_path", "company", "industry", "属于"),
+    ("industry_industry", "industry_industry", "industry", "industry", "上级行业"),
+    ("company_product", "company_product_path", "company", "product", "拥有"),
+    ("product_product", "product_product", "product", "product", "上游材料"),
+]
+
+
+def iter_json_lines(file_path):
+    """
+    逐行读取 JSONL（也兼容每行一个对象的 JSON 数组文件、压缩文件、分片目录和列式暂存文件）
+
+    Args:
+        file_path: 数据文件路径
+
+    Yields:
+        每行解析出的字典
+    """
+    if is_columnar(file_path):
+        with ColumnarInput(file_path) as source:
+            yield from source.rows()
+        return
+    with open_text(file_path, encoding="utf-8-sig") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip().rstrip(",")
+            if not line or line in ("[", "]"):
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                logger.error(f"JSON解析错误 {file_path}:{line_no}")
+                continue
+            if isinstance(row, dict):
+                yield row
+
+
+def _csv_value(value):
+    """把属性值转换为 CSV 单元格文本，嵌套结构序列化为 JSON 字符串"""
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+class BulkExporter:
+    """把 data/ 下的源文件导出为 neo4j-admin 离线导入的 CSV"""
+
+    def __init__(self, output_dir="data/bulk_import", paths=None):
+        """
+        初始化导出器
+
+        Args:
+            output_dir: CSV 输出目录
+            paths: 数据文件路径字典，默认与 Neo4jHandler 使用相同的路径
+        """
+        self.output_dir = output_dir
+        self.paths = paths or resolve_data_paths()
+        # 每个标签已导出的节点 ID（即 name），用于去重和校验关系端点
+        self.node_ids = {}
+        # 每个标签的 code → name，用于按代码匹配端点的关系
+        self.node_codes = {}
+        self.stats = {}
+
+    def export(self):
+        """
+        导出全部节点和关系
+
+        Returns:
+            neo4j-admin database import full 的参数列表
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        args = []
+        for label, path_attr in NODE_SPECS:
+            header, body = self.export_nodes(label, self.paths[path_attr])
+            if header:
+                args.append(f"--nodes={label}={header},{body}")
+        for rel_key, path_attr, start_label, end_label, rel_type in REL_SPECS:
+            header, body = self.export_relationships(
+                rel_key, self.paths[path_attr], start_label, end_label, rel_type
+            )
+            if header:
+                args.append(f"--relationships={rel_type}={header},{body}")
+        logger.info(f"导出统计: {self.stats}")
+        return args
+
+    def export_nodes(self, label, file_path):
+        """
+        导出一个标签的节点，按 name 去重（保留首次出现的行，与 MERGE ... ON CREATE SET 一致）
+
+        Args:
+            label: 节点标签
+            file_path: 节点数据文件路径
+
+        Returns:
+            (表头文件路径, 数据文件路径)，源文件不存在时返回 (None, None)
+        """
+        ids = self.node_ids.setdefault(label, set())
+        codes = self.node_codes.setdefault(label, {})
+        mapping = NodeMapping()
+        if not os.path.exists(file_path):
+            logger.warning(f"数据文件不存在: {file_path}")
+            return None, None
+
+        # 第一遍收集属性列
+        columns = []
+        for row in iter_json_lines(file_path):
+            for key in row:
+                if key != "name" and key not in columns:
+                    columns.append(key)
+
+        header_path = os.path.join(self.output_dir, f"{label}_header.csv")
+        body_path = os.path.join(self.output_dir, f"{label}.csv")
+        with open(header_path, "w", encoding="utf-8", newline="") as f:
+            csv.writer(f).writerow([f"name:ID({label})"] + columns + [":LABEL"])
+
+        written = duplicates = rejected = 0
+        with open(body_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            for row in iter_json_lines(file_path):
+                row, reason = mapping.apply(row)
+                if reason:
+                    rejected += 1
+                    continue
+                name = row["name"]
+                if name in ids:
+                    duplicates += 1
+                    continue
+                ids.add(name)
+                if row.get("code"):
+                    codes.setdefault(row["code"], name)
+                writer.writerow([name] + [_csv_value(row.get(c)) for c in columns] + [label])
+                written += 1
+
+        self.stats[label] = {"written": written, "duplicates": duplicates, "rejected": rejected}
+        logger.info(f"导出 {written} 个 {label} 节点，跳过重复 {duplicates} 个")
+        return header_path, body_path
+
+    def export_relationships(self, rel_key, file_path, start_label, end_label, rel_type):
+        """
+        导出一类关系，按 (起点, 终点) 去重，跳过端点不存在的行（与 MATCH 失败时的行为一致）
+
+        Args:
+            rel_key: 关系键名
+            file_path: 关系数据文件路径
+            start_label: 起始节点标签
+            end_label: 结束节点标签
+            rel_type: 关系类型
+
+        Returns:
+            (表头文件路径, 数据文件路径)，源文件不存在时返回 (None, None)
+        """
+        if not os.path.exists(file_path):
+            logger.warning(f"数据文件不存在: {file_path}")
+            return None, None
+
+        mapping = relationship_mapping(rel_key)
+        columns = []
+        for row in iter_json_lines(file_path):
+            mapped, _ = mapping.apply(row)
+            for key in (mapped or {}).get("properties", {}):
+                if key not in columns:
+                    columns.append(key)
+
+        header_path = os.path.join(self.output_dir, f"{rel_key}_header.csv")
+        body_path = os.path.join(self.output_dir, f"{rel_key}.csv")
+        with open(header_path, "w", encoding="utf-8", newline="") as f:
+            csv.writer(f).writerow(
+                [f":START_ID({start_label})", f":END_ID({end_label})"] + columns + [":TYPE"]
+            )
+
+        start_ids = self.node_ids.get(start_label, set())
+        end_ids = self.node_ids.get(end_label, set())
+        start_codes = self.node_codes.get(start_label, {})
+        end_codes = self.node_codes.get(end_label, {})
+        seen = set()
+        written = duplicates = missing = rejected = 0
+        with open(body_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            for row in iter_json_lines(file_path):
+                mapped, reason = mapping.apply(row)
+                if reason:
+                    rejected += 1
+                    continue
+                # 节点 ID 是名称，按代码匹配的端点先换算为名称
+                start_name = start_codes.get(mapped["start"]) if mapped["start_key"] == "code" else mapped["start"]
+                end_name = end_codes.get(mapped["end"]) if mapped["end_key"] == "code" else mapped["end"]
+                if start_name not in start_ids or end_name not in end_ids:
+                    missing += 1
+                    continue
+                if (start_name, end_name) in seen:
+                    duplicates += 1
+                    continue
+                seen.add((start_name, end_name))
+                properties = mapped["properties"]
+                writer.writerow(
+                    [start_name, end_name] + [_csv_value(properties.get(c)) for c in columns] + [rel_type]
+                )
+                written += 1
+
+        self.stats[rel_key] = {
+            "written": written, "duplicates": duplicates, "missing_endpoints": missing, "rejected": rejected
+        }
+        logger.info(f"导出 {written} 条 {rel_key} 关系，跳过重复 {duplicates} 条，端点缺失 {missing} 条，"
+                    f"字段缺失 {rejected} 条")
+        return header_path, body_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出 neo4j-admin 离线导入所需的 CSV")
+    parser.add_argument("--output", default="data/bulk_import", help="CSV 输出目录")
+    parser.add_argument("--data-dir", default="data", help="源数据目录")
+    parser.add_argument("--database", default="neo4j", help="目标数据库名称")
+    args = parser.parse_args()
+
+    import_args = BulkExporter(args.output, resolve_data_paths(args.data_dir)).export()
+    command = " ".join(
+        ["neo4j-admin", "database", "import", "full", args.database, "--overwrite-destination"]
+        + import_args
+    )
+    print("停止 Neo4j 后执行以下命令完成离线导入:")
+    print(command)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+"""
+列式暂存：把 data/ 下的 JSONL 源文件一次性转换为 Parquet 或 Arrow IPC，导入和数据预览按列、内存映射读取
+
+用法:
+    python -m src.columnar_staging --data-dir data --format parquet
+
+输出到 data/columnar/<名称>.parquet（或 .arrow），name 及关系端点名称列使用字典编码。
+resolve_data_paths 和数据预览在暂存文件不比源文件旧时优先使用它，源文件更新后需要重新转换。
+嵌套的字典、列表以及类型混杂的列保存为 JSON 字符串，读取时还原。需要安装 pyarrow。
+"""
+import argparse
+import json
+import logging
+import os
+
+from src.compressed_input import input_files
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("ColumnarStaging")
+
+# 暂存文件所在的子目录
+COLUMNAR_DIR = "columnar"
+
+# 暂存格式 → 扩展名，查找暂存文件时按此顺序
+COLUMNAR_FORMATS = {
+    "arrow": ".arrow",
+    "parquet": ".parquet",
+}
+
+# 使用字典编码的列：节点名称和关系端点名称重复度高
+DICTIONARY_COLUMNS = ("name", "start_name", "end_name")
+
+# 转换时每个记录批次的行数，也是 Parquet 行组大小
+STAGE_BATCH_ROWS = 65536
+
+# 读取时每个记录批次的行数
+READ_BATCH_ROWS = 8192
+
+# 保存为 JSON 字符串的列名，记录在表结构元数据中
+JSON_COLUMNS_KEY = b"kg_json_columns"
+
+_INT64_RANGE = (-2 ** 63, 2 ** 63)
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("列式暂存需要安装 pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def is_columnar(path):
+    """路径是否为列式暂存文件"""
+    return os.path.splitext(path)[1].lower() in COLUMNAR_FORMATS.values()
+
+
+def _source_name(path):
+    """数据文件名去掉压缩后缀和扩展名，如 company.jsonl.gz → company"""
+    name = os.path.basename(os.path.normpath(path))
+    while True:
+        base, ext = os.path.splitext(name)
+        if not ext:
+            return name
+        name = base
+
+
+def staged_input(source_path):
+    """
+    查找源数据对应的暂存文件
+
+    Args:
+        source_path: 数据文件或分片目录
+
+    Returns:
+        暂存文件路径；不存在、比源文件旧或未安装 pyarrow 时返回 None
+    """
+    staged_dir = os.path.join(os.path.dirname(os.path.normpath(source_path)), COLUMNAR_DIR)
+    name = _source_name(source_path)
+    for ext in COLUMNAR_FORMATS.values():
+        staged = os.path.join(staged_dir, name + ext)
+        if not os.path.isfile(staged):
+            continue
+        if os.path.exists(source_path):
+            source_mtime = max((os.path.getmtime(f) for f in input_files(source_path)), default=0)
+            if os.path.getmtime(staged) < source_mtime:
+                logger.warning(f"暂存文件比源文件旧，改用源文件: {staged}")
+                continue
+        try:
+            _pyarrow()
+        except ImportError as e:
+            logger.warning(f"{e}，改用源文件: {source_path}")
+            return None
+        return staged
+    return None
+
+
+def _value_kind(value):
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int" if _INT64_RANGE[0] <= value < _INT64_RANGE[1] else "json"
+    if isinstance(value, float):
+        # 整数值的浮点数（如 JSON 中的 3.0）可以和整数同列存为 int64
+        if value.is_integer() and _INT64_RANGE[0] <= value < _INT64_RANGE[1]:
+            return "integral_float"
+        return "float"
+    if isinstance(value, str):
+        return "str"
+    return "json"
+
+
+def _column_type(pa, column, kinds):
+    """根据列中出现的值类型确定 Arrow 类型，无法用单一标量类型表示的列返回 None（存为 JSON）"""
+    if column in DICTIONARY_COLUMNS and kinds <= {"str"}:
+        return pa.dictionary(pa.int32(), pa.string())
+    if not kinds or kinds == {"str"}:
+        return pa.string()
+    if kinds == {"bool"}:
+        return pa.bool_()
+    if "int" in kinds and kinds <= {"int", "integral_float"}:
+        return pa.int64()
+    if kinds <= {"float", "integral_float"}:
+        return pa.float64()
+    # 整数和带小数的浮点数混杂：存为 float64 会丢失大整数精度、整数读回变成浮点数，存为 JSON
+    return None
+
+
+def _infer_schema(pa, rows):
+    """扫描全部行，得到表结构和需要 JSON 编码的列"""
+    kinds = {}
+    for row in rows:
+        for key, value in row.items():
+            column = kinds.setdefault(key, set())
+            if value is not None:
+                column.add(_value_kind(value))
+    fields = []
+    json_columns = []
+    for column, column_kinds in kinds.items():
+        arrow_type = _column_type(pa, column, column_kinds)
+        if arrow_type is None:
+            json_columns.append(column)
+            arrow_type = pa.string()
+        fields.append(pa.field(column, arrow_type))
+    return pa.schema(fields, metadata={JSON_COLUMNS_KEY: json.dumps(json_columns)}), set(json_columns)
+
+
+def _record_batch(pa, schema, json_columns, rows):
+    arrays = []
+    for field in schema:
+        values = [row.get(field.name) for row in rows]
+        if field.name in json_columns:
+            values = [None if v is None else json.dumps(v, ensure_ascii=False) for v in values]
+        if pa.types.is_int64(field.type):
+            values = [int(v) if isinstance(v, float) else v for v in values]
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values, pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _batches(pa, schema, json_columns, rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= STAGE_BATCH_ROWS:
+            yield _record_batch(pa, schema, json_columns, chunk)
+            chunk = []
+    if chunk:
+        yield _record_batch(pa, schema, json_columns, chunk)
+
+
+def stage_file(source_path, output_path, fmt="parquet"):
+    """
+    把一个 JSONL 源文件转换为列式文件
+
+    Parquet 按行组流式写出；Arrow IPC 文件要求全部批次共用一个字典，先在内存中合并字典再写出。
+
+    Args:
+        source_path: 数据文件或分片目录
+        output_path: 输出文件路径
+        fmt: "parquet" 或 "arrow"
+
+    Returns:
+        写入的行数
+    """
+    from src.bulk_export import iter_json_lines
+
+    pa = _pyarrow()
+    schema, json_columns = _infer_schema(pa, iter_json_lines(source_path))
+    batches = _batches(pa, schema, json_columns, iter_json_lines(source_path))
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    temp_path = output_path + ".tmp"
+    rows = 0
+    if fmt == "parquet":
+        with pa.parquet.ParquetWriter(temp_path, schema) as writer:
+            for batch in batches:
+                writer.write_batch(batch, row_group_size=STAGE_BATCH_ROWS)
+                rows += batch.num_rows
+    elif fmt == "arrow":
+        table = pa.Table.from_batches(list(batches), schema=schema).unify_dictionaries()
+        with pa.ipc.new_file(temp_path, schema) as writer:
+            writer.write_table(table, max_chunksize=STAGE_BATCH_ROWS)
+        rows = table.num_rows
+    else:
+        raise ValueError(f"不支持的暂存格式: {fmt}，可选: {sorted(COLUMNAR_FORMATS)}")
+    os.replace(temp_path, output_path)
+    return rows
+
+
+def stage_columnar(data_dir="data", fmt="parquet", output_dir=None):
+    """
+    转换数据目录中的全部源文件
+
+    Args:
+        data_dir: 数据目录
+        fmt: "parquet" 或 "arrow"
+        output_dir: 输出目录，默认为 <data_dir>/columnar
+
+    Returns:
+        {路径键名: {"source": 源路径, "output": 输出路径, "rows": 行数}}
+    """
+    from src.neo4j_handler import resolve_data_paths
+
+    output_dir = output_dir or os.path.join(data_dir, COLUMNAR_DIR)
+    results = {}
+    for key, source_path in resolve_data_paths(data_dir, columnar=False).items():
+        if not os.path.exists(source_path):
+            logger.warning(f"数据文件不存在: {source_path}")
+            continue
+        output_path = os.path.join(output_dir, _source_name(source_path) + COLUMNAR_FORMATS[fmt])
+        rows = stage_file(source_path, output_path, fmt)
+        results[key] = {"source": source_path, "output": output_path, "rows": rows}
+        logger.info(f"已转换 {source_path} → {output_path}: {rows} 行")
+    return results
+
+
+class ColumnarInput:
+    """
+    内存映射打开的列式暂存文件
+
+    导入按行号续传：检查点的偏移量是已读取的行数。
+    """
+
+    def __init__(self, path):
+        """
+        打开暂存文件
+
+        Args:
+            path: .parquet 或 .arrow 文件路径
+        """
+        pa = _pyarrow()
+        self.path = path
+        self._pa = pa
+        if path.lower().endswith(".arrow"):
+            self._source = pa.memory_map(path)
+            # 内存映射的 IPC 文件读为表不复制数据
+            self._table = pa.ipc.open_file(self._source).read_all()
+            self._parquet = None
+            schema = self._table.schema
+            self.num_rows = self._table.num_rows
+            nbytes = self._table.nbytes
+        else:
+            self._source = None
+            self._table = None
+            self._parquet = pa.parquet.ParquetFile(path, memory_map=True)
+            schema = self._parquet.schema_arrow
+            metadata = self._parquet.metadata
+            self.num_rows = metadata.num_rows
+            nbytes = sum(metadata.row_group(i).total_byte_size for i in range(metadata.num_row_groups))
+        self.json_columns = set(json.loads((schema.metadata or {}).get(JSON_COLUMNS_KEY, b"[]")))
+        # 平均每行字节数，供自适应批次按数据量控制
+        self.row_bytes = nbytes / self.num_rows if self.num_rows else 0
+        self._size = os.path.getsize(path)
+        self._dictionaries = {}
+
+    def batches(self, start=0, columns=None):
+        """
+        从指定行开始按记录批次读取
+
+        Args:
+            start: 起始行号
+            columns: 只读取的列，默认全部
+
+        Yields:
+            pyarrow.RecordBatch
+        """
+        if self._table is not None:
+            table = self._table.select(columns) if columns else self._table
+            yield from table.slice(start).to_batches(max_chunksize=READ_BATCH_ROWS)
+            return
+        metadata = self._parquet.metadata
+        groups = []
+        for index in range(metadata.num_row_groups):
+            group_rows = metadata.row_group(index).num_rows
+            if start >= group_rows and not groups:
+                start -= group_rows
+                continue
+            groups.append(index)
+        if not groups:
+            return
+        for batch in self._parquet.iter_batches(batch_size=READ_BATCH_ROWS, row_groups=groups, columns=columns):
+            if start:
+                if start >= batch.num_rows:
+                    start -= batch.num_rows
+                    continue
+                batch = batch.slice(start)
+                start = 0
+            yield batch
+
+    def rows(self, start=0):
+        """
+        从指定行开始逐行产出字典，JSON 编码的列还原为原始值，空值字段省略
+
+        Args:
+            start: 起始行号
+        """
+        for batch in self.batches(start):
+            names = batch.schema.names
+            columns = []
+            for name, column in zip(names, batch.columns):
+                values = self._column_values(name, column)
+                if name in self.json_columns:
+                    values = [None if v is None else json.loads(v) for v in values]
+                columns.append(values)
+            if not any(column.null_count for column in batch.columns):
+                for values in zip(*columns):
+                    yield dict(zip(names, values))
+                continue
+            for values in zip(*columns):
+                yield {name: value for name, value in zip(names, values) if value is not None}
+
+    def _column_values(self, name, column):
+        """
+        把一列转换为 Python 列表
+
+        字典编码列只转换一次字典再按下标取值，相同名称共用同一个字符串对象。
+        Arrow IPC 文件的各批次共用一个字典，按字典缓冲区地址缓存转换结果。
+        """
+        if not self._pa.types.is_dictionary(column.type):
+            return column.to_pylist()
+        dictionary = column.dictionary
+        key = (dictionary.buffers()[1].address, len(dictionary))
+        cached = self._dictionaries.get(name)
+        if cached is None or cached[0] != key:
+            cached = (key, dictionary.to_pylist())
+            self._dictionaries[name] = cached
+        lookup = cached[1]
+        indices = column.indices.to_pylist()
+        if column.null_count:
+            return [None if i is None else lookup[i] for i in indices]
+        return [lookup[i] for i in indices]
+
+    def records(self, start=0):
+        """导入使用的 (行字典, 偏移量增量) 序列，偏移量以行计"""
+        for row in self.rows(start):
+            yield row, 1
+
+    def byte_position(self, offset):
+        """行号换算为文件字节位置，用于按字节统计进度"""
+        return int(self._size * offset / self.num_rows) if self.num_rows else self._size
+
+    def to_pandas(self, limit=None, columns=None):
+        """
+        读取为 DataFrame，name 等字典编码列转换为分类类型
+
+        Args:
+            limit: 最多读取的行数
+            columns: 只读取的列，默认全部
+        """
+        pa = self._pa
+        batches = []
+        remaining = self.num_rows if limit is None else limit
+        for batch in self.batches(columns=columns):
+            if remaining <= 0:
+                break
+            batch = batch.slice(0, remaining)
+            remaining -= batch.num_rows
+            batches.append(batch)
+        schema = self._table.schema if self._table is not None else self._parquet.schema_arrow
+        if columns:
+            schema = pa.schema([schema.field(c) for c in columns], metadata=schema.metadata)
+        df = pa.Table.from_batches(batches, schema=schema).to_pandas()
+        for column in self.json_columns & set(df.columns):
+            df[column] = df[column].map(lambda v: json.loads(v) if isinstance(v, str) else v)
+        return df
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._source is not None:
+            self._table = None
+            self._source.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把数据目录中的 JSONL 源文件转换为列式暂存文件")
+    parser.add_argument("--data-dir", default="data", help="数据目录")
+    parser.add_argument("--format", default="parquet", choices=sorted(COLUMNAR_FORMATS), help="暂存格式")
+    parser.add_argument("--output", default=None, help="输出目录，默认为 <数据目录>/columnar")
+    args = parser.parse_args()
+    results = stage_columnar(args.data_dir, args.format, args.output)
+    for key, result in results.items():
+        print(f"{key}: {result['rows']} 行 → {result['output']}")
+
+
+if __name__ == "__main__":
+    main()
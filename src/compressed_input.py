@@ -0,0 +1,412 @@
+"""
+压缩输入：透明地流式读取 gzip / zstd / xz 压缩的 JSONL 以及分片目录
+
+数据文件可以是:
+- 普通文件: company.jsonl
+- 压缩文件: company.jsonl.gz / company.jsonl.zst / company.jsonl.xz（按扩展名或文件头魔数识别）
+- 分片目录: company/ 下的 part-0000.jsonl.gz、part-0001.jsonl.gz ...（按文件名排序后首尾相接）
+
+压缩输入和分片目录由后台线程解压，多个分片同时解压，读取方按顺序消费。
+偏移量按解压后的字节计算；检查点另外记录 (分片序号, 分片内偏移)，续传时直接从该分片开始解压，
+只需重新解压一个分片的前半部分。zstd 需要安装 zstandard。
+"""
+import bisect
+import gzip
+import hashlib
+import io
+import lzma
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 扩展名 → 压缩格式
+COMPRESSION_EXTENSIONS = {
+    ".gz": "gzip",
+    ".gzip": "gzip",
+    ".zst": "zstd",
+    ".zstd": "zstd",
+    ".xz": "xz",
+    ".lzma": "xz",
+}
+
+# 文件头魔数 → 压缩格式，用于扩展名不规范的文件
+COMPRESSION_MAGIC = [
+    (b"\x1f\x8b", "gzip"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+    (b"\xfd7zXZ\x00", "xz"),
+]
+
+# 分片目录中作为数据文件的扩展名（不含压缩后缀）
+SHARD_EXTENSIONS = (".jsonl", ".json")
+
+# 每次解压的块大小和每个分片预读的块数，限制解压线程占用的内存
+DECODE_CHUNK_SIZE = 1 << 20
+DECODE_QUEUE_DEPTH = 8
+
+# 同时解压的分片数
+DECODE_WORKERS = min(4, os.cpu_count() or 1)
+
+# 计算分片指纹时采样的头部字节数
+SIGNATURE_SAMPLE_SIZE = 4096
+
+_END = object()
+
+
+def detect_compression(path):
+    """
+    判断文件的压缩格式
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        "gzip"、"zstd"、"xz"，未压缩时返回 None
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in COMPRESSION_EXTENSIONS:
+        return COMPRESSION_EXTENSIONS[ext]
+    try:
+        with open(path, "rb") as f:
+            head = f.read(8)
+    except OSError:
+        return None
+    for magic, kind in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return kind
+    return None
+
+
+def _strip_compression(name):
+    """去掉文件名的压缩后缀"""
+    base, ext = os.path.splitext(name)
+    return base if ext.lower() in COMPRESSION_EXTENSIONS else name
+
+
+def input_files(path):
+    """
+    数据输入包含的文件
+
+    Args:
+        path: 数据文件或分片目录
+
+    Returns:
+        文件路径列表；分片目录按文件名排序
+    """
+    if not os.path.isdir(path):
+        return [path]
+    return [
+        os.path.join(path, name) for name in sorted(os.listdir(path))
+        if _strip_compression(name).lower().endswith(SHARD_EXTENSIONS)
+        and os.path.isfile(os.path.join(path, name))
+    ]
+
+
+def is_compressed_input(path):
+    """输入是否需要经过解压流读取（压缩文件或分片目录）"""
+    return os.path.isdir(path) or detect_compression(path) is not None
+
+
+def input_size(path):
+    """输入在磁盘上的字节数（压缩输入为压缩后的大小），用于计算进度"""
+    return sum(os.path.getsize(file) for file in input_files(path))
+
+
+def find_input(data_dir, name, extensions=SHARD_EXTENSIONS):
+    """
+    在数据目录中查找数据输入
+
+    依次尝试各扩展名的普通文件、压缩文件，最后是同名分片目录。
+
+    Args:
+        data_dir: 数据目录
+        name: 不含扩展名的文件名
+        extensions: 按优先级排列的扩展名
+
+    Returns:
+        找到的路径；都不存在时返回最后一个扩展名的普通文件路径
+    """
+    for ext in extensions:
+        for suffix in ("",) + tuple(COMPRESSION_EXTENSIONS):
+            path = os.path.join(data_dir, f"{name}{ext}{suffix}")
+            if os.path.isfile(path):
+                return path
+    shard_dir = os.path.join(data_dir, name)
+    if os.path.isdir(shard_dir) and input_files(shard_dir):
+        return shard_dir
+    return os.path.join(data_dir, f"{name}{extensions[-1]}")
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("读取 zstd 压缩文件需要安装 zstandard: pip install zstandard")
+    return zstandard
+
+
+def _open_decoder(path):
+    """
+    打开单个文件的解压流
+
+    Returns:
+        (底层文件对象, 解压后的二进制流)
+    """
+    kind = detect_compression(path)
+    raw = open(path, "rb")
+    try:
+        if kind == "gzip":
+            return raw, gzip.GzipFile(fileobj=raw, mode="rb")
+        if kind == "xz":
+            return raw, lzma.LZMAFile(raw)
+        if kind == "zstd":
+            decompressor = _zstandard().ZstdDecompressor()
+            return raw, decompressor.stream_reader(raw, read_size=DECODE_CHUNK_SIZE, read_across_frames=True)
+    except Exception:
+        raw.close()
+        raise
+    return raw, raw
+
+
+_signature_cache = {}
+_signature_lock = threading.Lock()
+
+
+def _file_signature(path):
+    """单个文件的指纹：文件名、大小和头部字节，按修改时间缓存"""
+    stat = os.stat(path)
+    cache_key = (path, stat.st_size, stat.st_mtime_ns)
+    with _signature_lock:
+        cached = _signature_cache.get(cache_key)
+    if cached is None:
+        digest = hashlib.sha1(f"{os.path.basename(path)}:{stat.st_size}:".encode("utf-8"))
+        with open(path, "rb") as f:
+            digest.update(f.read(SIGNATURE_SAMPLE_SIZE))
+        cached = digest.hexdigest()
+        with _signature_lock:
+            _signature_cache[cache_key] = cached
+    return cached
+
+
+def input_signature(path, shard):
+    """
+    压缩输入前若干个分片的指纹
+
+    只覆盖到检查点所在的分片，分片目录中追加新分片时指纹保持不变；
+    已导入的分片被替换（大小或头部变化）时指纹会发生变化。
+
+    Args:
+        path: 压缩文件或分片目录
+        shard: 检查点所在的分片序号
+
+    Returns:
+        指纹字符串
+    """
+    files = input_files(path)
+    if shard >= len(files):
+        raise OSError(f"分片不存在: {path} #{shard}")
+    digest = hashlib.sha1()
+    for file in files[:shard + 1]:
+        digest.update(_file_signature(file).encode("ascii"))
+    return digest.hexdigest()
+
+
+class DecodedStream(io.RawIOBase):
+    """
+    压缩文件或分片目录解压后的只读字节流
+
+    每个分片由线程池中的一个线程解压到自己的有界队列，读取方按分片顺序消费，
+    线程池大小决定同时解压的分片数。分片末尾缺少换行时补一个换行，避免与下一分片的首行相连。
+    """
+
+    def __init__(self, path, shard=0, shard_offset=0, offset=0, workers=DECODE_WORKERS):
+        """
+        打开解压流
+
+        Args:
+            path: 压缩文件或分片目录
+            shard: 起始分片序号
+            shard_offset: 在起始分片中跳过的解压后字节数
+            offset: 起始位置在整个输入中的解压后偏移量
+            workers: 同时解压的分片数
+        """
+        super().__init__()
+        self.path = path
+        self.files = input_files(path)
+        self._sizes = [os.path.getsize(file) for file in self.files]
+        self._stop = threading.Event()
+        self._queues = [queue.Queue(maxsize=DECODE_QUEUE_DEPTH) for _ in self.files]
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="decode")
+        for index in range(shard, len(self.files)):
+            self._executor.submit(self._decode, index, shard_offset if index == shard else 0)
+        self._shard = shard
+        self._position = offset
+        # 已知的分片起点：(解压后偏移量, 分片序号)，按偏移量递增
+        self._starts = [(offset - shard_offset, shard)]
+        self._raw_base = sum(self._sizes[:shard])
+        self._raw_position = self._raw_base
+        self._buffer = memoryview(b"")
+
+    def _put(self, index, item):
+        """放入分片队列，读取方关闭流时放弃"""
+        while not self._stop.is_set():
+            try:
+                self._queues[index].put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _decode(self, index, skip):
+        """解压一个分片，把 (数据块, 已读取的压缩字节数) 放入该分片的队列"""
+        try:
+            raw, decoder = _open_decoder(self.files[index])
+            with raw:
+                if skip and decoder is raw:
+                    raw.seek(skip)
+                    skip = 0
+                last = b"\n"
+                while not self._stop.is_set():
+                    chunk = decoder.read(DECODE_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    last = chunk[-1:]
+                    if skip:
+                        dropped = min(skip, len(chunk))
+                        chunk = chunk[dropped:]
+                        skip -= dropped
+                        if not chunk:
+                            continue
+                    if not self._put(index, (chunk, raw.tell())):
+                        return
+                if last != b"\n" and not skip:
+                    self._put(index, (b"\n", raw.tell()))
+                if decoder is not raw:
+                    decoder.close()
+            self._put(index, _END)
+        except Exception as e:
+            self._put(index, e)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer:
+            if self._shard >= len(self.files):
+                return 0
+            item = self._queues[self._shard].get()
+            if item is _END:
+                self._raw_base += self._sizes[self._shard]
+                self._raw_position = self._raw_base
+                self._shard += 1
+                if self._shard < len(self.files):
+                    self._starts.append((self._position, self._shard))
+                continue
+            if isinstance(item, Exception):
+                raise item
+            chunk, raw_position = item
+            self._buffer = memoryview(chunk)
+            self._raw_position = self._raw_base + raw_position
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        self._position += size
+        return size
+
+    def raw_position(self):
+        """已读取的压缩字节数（含之前的分片），用于计算进度"""
+        return self._raw_position
+
+    def locate(self, offset):
+        """
+        把解压后的偏移量换算为 (分片序号, 分片内偏移)
+
+        Args:
+            offset: 不超过已读取位置的解压后偏移量
+        """
+        index = bisect.bisect_right(self._starts, (offset, len(self.files))) - 1
+        start, shard = self._starts[max(index, 0)]
+        return shard, offset - start
+
+    def close(self):
+        if not self.closed and hasattr(self, "_executor"):
+            self._stop.set()
+            self._executor.shutdown(wait=True)
+        super().close()
+
+
+def open_input(path, offset=0, shard=None, workers=DECODE_WORKERS):
+    """
+    打开数据输入并定位到指定位置
+
+    普通文件直接 seek；压缩输入给出分片位置时从该分片开始解压，否则从头解压并跳过 offset 字节。
+
+    Args:
+        path: 数据文件或分片目录
+        offset: 解压后的字节偏移量
+        shard: 检查点记录的 (分片序号, 分片内偏移)
+        workers: 同时解压的分片数
+
+    Returns:
+        二进制文件对象
+    """
+    if not is_compressed_input(path):
+        f = open(path, "rb")
+        f.seek(offset)
+        return f
+    if shard is not None:
+        index, shard_offset = shard
+        return io.BufferedReader(DecodedStream(path, index, shard_offset, offset, workers), DECODE_CHUNK_SIZE)
+    f = io.BufferedReader(DecodedStream(path, workers=workers), DECODE_CHUNK_SIZE)
+    remaining = offset
+    while remaining > 0:
+        chunk = f.read(min(remaining, DECODE_CHUNK_SIZE))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+    return f
+
+
+def open_text(path, encoding="utf-8"):
+    """以文本方式打开数据输入（压缩输入透明解压）"""
+    if not is_compressed_input(path):
+        return open(path, "r", encoding=encoding)
+    return io.TextIOWrapper(open_input(path), encoding=encoding)
+
+
+def _decoded(f):
+    raw = getattr(f, "raw", None)
+    return raw if isinstance(raw, DecodedStream) else None
+
+
+def progress_position(f, offset):
+    """
+    用于计算进度的位置：普通文件为字节偏移量，压缩输入为已读取的压缩字节数
+
+    Args:
+        f: open_input 返回的文件对象
+        offset: 解压后的字节偏移量
+    """
+    stream = _decoded(f)
+    return stream.raw_position() if stream else offset
+
+
+def at_end(f):
+    """
+    open_input 返回的文件对象是否已读到末尾
+
+    压缩输入的解压后大小事先未知，只能以读到末尾为准（会先解压出下一块数据）。
+    """
+    return not f.peek(1)
+
+
+def locate_shard(f, offset):
+    """
+    压缩输入中偏移量所在的 (分片序号, 分片内偏移)，普通文件返回 None
+
+    Args:
+        f: open_input 返回的文件对象
+        offset: 不超过已读取位置的解压后偏移量
+    """
+    stream = _decoded(f)
+    return stream.locate(offset) if stream else None
@@ -0,0 +1,346 @@
+"""
+进程级 Neo4j 连接注册表：所有页面、组件和导入处理器共用同一组连接池
+
+- 每个 (地址, 用户, 数据库) 只创建一个 py2neo Graph，其连接池大小受 max_size 限制
+- 调用方拿到的是 PooledGraph 代理，长期持有也没关系：底层 Graph 健康检查失败或空闲过久被回收后，
+  下次调用时自动重建
+- run / evaluate 同时占用一个全局名额和一个调用方名额，单个页面或导入任务不会占满整个连接池；
+  run 在名额内读完全部结果后才归还名额（py2neo 的游标读完之前一直占用连接）；显式事务（begin）不计入名额
+- 健康检查和重建连接只在该连接自己的锁内进行，不阻塞其他连接的取用
+- stream 按批读取大结果集，迭代期间（包括 yield 之后消费方处理批次时）一直占用名额：
+  py2neo 的游标读完之前一直占用连接，提前归还名额会让实际连接数超过 max_size。
+  消费方读得慢时不再从连接读取，服务端推送随之放缓
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("ConnectionRegistry")
+
+# 默认设置，可通过 get_registry(settings) 在首次使用前覆盖
+DEFAULT_SETTINGS = {
+    # 全局同时执行的查询数，也是每个 Graph 连接池的最大连接数
+    "max_size": 32,
+    # 每个调用方同时执行的查询数
+    "caller_limit": 8,
+    # 按调用方覆盖 caller_limit，如 {"import": 32}
+    "caller_limits": {"import": 32},
+    # 距上次成功检查超过该秒数时，取用前先执行 RETURN 1
+    "health_check_interval": 30,
+    # 超过该秒数未使用的 Graph 被关闭并移出注册表
+    "idle_timeout": 600,
+    # 等待查询名额的最长秒数
+    "acquire_timeout": 30,
+}
+
+# stream 每批返回的默认行数
+DEFAULT_FETCH_SIZE = 1000
+
+
+class PoolTimeout(Exception):
+    """等待连接池名额超时"""
+
+
+class _Entry:
+    def __init__(self, graph):
+        now = time.time()
+        self.graph = graph
+        self.created = now
+        self.last_used = now
+        self.last_checked = now
+
+
+class ConnectionRegistry:
+    """共享 Graph 的注册表，负责健康检查、空闲回收和并发名额"""
+
+    def __init__(self, settings=None):
+        """
+        初始化注册表
+
+        Args:
+            settings: 覆盖 DEFAULT_SETTINGS 的设置字典
+        """
+        self.settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+        self._lock = threading.RLock()
+        self._entries = {}
+        # 每个连接一把锁，建立连接和健康检查（网络往返）在其中进行，不占用注册表的锁
+        self._key_locks = {}
+        self._slots = threading.BoundedSemaphore(self.settings["max_size"])
+        self._caller_slots = {}
+        self.stats = {"created": 0, "reconnected": 0, "evicted": 0, "timeouts": 0}
+
+    def graph(self, uri, username, password, name=None, caller="default"):
+        """
+        取得共享连接的代理
+
+        首次取用时立即建立连接，连接失败时抛出异常（与直接创建 Graph 的行为一致）。
+
+        Args:
+            uri: Neo4j 地址
+            username: 用户名
+            password: 密码
+            name: 数据库名称，默认使用服务器的默认数据库
+            caller: 调用方名称，用于限制每个调用方的并发查询数
+
+        Returns:
+            PooledGraph 代理
+        """
+        key = (uri, username, password, name)
+        self._live(key)
+        return PooledGraph(self, key, caller)
+
+    def _connect(self, key):
+        from py2neo import Graph
+
+        uri, username, password, name = key
+        try:
+            return Graph(uri, auth=(username, password), name=name, max_size=self.settings["max_size"])
+        except (TypeError, ValueError):
+            # 不支持连接池设置的 py2neo 版本，并发仍由注册表的名额限制
+            return Graph(uri, auth=(username, password), name=name)
+
+    def _live(self, key):
+        """
+        取得可用的底层 Graph：回收空闲连接；只有超过检查间隔未成功使用的连接才做健康检查，必要时重建
+
+        注册表的锁只用于查找条目；建立连接和健康检查在该连接自己的锁内进行，
+        取得锁后再次确认是否仍需检查，同时等待的线程只检查一次。
+        """
+        interval = self.settings["health_check_interval"]
+        now = time.time()
+        with self._lock:
+            self._evict_idle(now, keep=key)
+            entry = self._entries.get(key)
+            if entry is not None:
+                # 检查期间也不会被其他线程当作空闲连接回收
+                entry.last_used = now
+                if now - entry.last_checked <= interval:
+                    return entry.graph
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+            now = time.time()
+            if entry is None:
+                entry = _Entry(self._connect(key))
+                with self._lock:
+                    self._entries[key] = entry
+                    self.stats["created"] += 1
+                logger.info(f"创建共享连接: {key[0]}")
+            elif now - entry.last_checked > interval:
+                try:
+                    entry.graph.run("RETURN 1").data()
+                    entry.last_checked = now
+                except Exception as e:
+                    logger.warning(f"连接健康检查失败，重新连接: {e}")
+                    _close(entry.graph)
+                    entry = _Entry(self._connect(key))
+                    with self._lock:
+                        self._entries[key] = entry
+                        self.stats["reconnected"] += 1
+            entry.last_used = now
+            return entry.graph
+
+    def _mark_healthy(self, key):
+        """查询成功执行后推迟下次健康检查"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.last_checked = time.time()
+
+    def _evict_idle(self, now, keep=None):
+        for key, entry in list(self._entries.items()):
+            if key != keep and now - entry.last_used > self.settings["idle_timeout"]:
+                del self._entries[key]
+                _close(entry.graph)
+                self.stats["evicted"] += 1
+                logger.info(f"回收空闲连接: {key[0]}")
+
+    def caller_limit(self, caller):
+        """调用方同时执行的查询数上限（不超过全局上限）"""
+        limit = self.settings["caller_limits"].get(caller, self.settings["caller_limit"])
+        return min(limit, self.settings["max_size"])
+
+    def _caller_semaphore(self, caller):
+        with self._lock:
+            semaphore = self._caller_slots.get(caller)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.caller_limit(caller))
+                self._caller_slots[caller] = semaphore
+            return semaphore
+
+    @contextmanager
+    def slot(self, caller):
+        """
+        占用一个全局名额和一个调用方名额
+
+        Raises:
+            PoolTimeout: 在 acquire_timeout 内没有空闲名额
+        """
+        timeout = self.settings["acquire_timeout"]
+        caller_semaphore = self._caller_semaphore(caller)
+        if not caller_semaphore.acquire(timeout=timeout):
+            self._count_timeout()
+            raise PoolTimeout(f"调用方 {caller} 的并发查询已达上限")
+        try:
+            if not self._slots.acquire(timeout=timeout):
+                self._count_timeout()
+                raise PoolTimeout("连接池繁忙，等待空闲连接超时")
+            try:
+                yield
+            finally:
+                self._slots.release()
+        finally:
+            caller_semaphore.release()
+
+    def _count_timeout(self):
+        with self._lock:
+            self.stats["timeouts"] += 1
+
+    def status(self):
+        """注册表状态：共享连接数、各连接空闲秒数和累计统计"""
+        now = time.time()
+        with self._lock:
+            return {
+                "connections": [
+                    {"uri": key[0], "database": key[3], "idle_seconds": now - entry.last_used}
+                    for key, entry in self._entries.items()
+                ],
+                **self.stats,
+            }
+
+    def close_all(self):
+        """关闭全部共享连接"""
+        with self._lock:
+            for entry in self._entries.values():
+                _close(entry.graph)
+            self._entries.clear()
+
+
+def _close(graph):
+    try:
+        graph.service.connector.close()
+    except Exception as e:
+        logger.debug(f"关闭连接失败: {e}")
+
+
+class PooledGraph:
+    """
+    共享 Graph 的代理
+
+    run / evaluate 在名额内执行；其余属性和方法（begin、create、service 等）直接转发给当前的底层 Graph。
+    """
+
+    def __init__(self, registry, key, caller):
+        self._registry = registry
+        self._key = key
+        self.caller = caller
+
+    def run(self, *args, **kwargs):
+        """
+        执行查询，在名额内读完全部结果
+
+        Returns:
+            BufferedCursor；大结果集请使用 stream
+        """
+        with self._registry.slot(self.caller):
+            cursor = BufferedCursor(self._registry._live(self._key).run(*args, **kwargs))
+        self._registry._mark_healthy(self._key)
+        return cursor
+
+    def evaluate(self, *args, **kwargs):
+        with self._registry.slot(self.caller):
+            value = self._registry._live(self._key).evaluate(*args, **kwargs)
+        self._registry._mark_healthy(self._key)
+        return value
+
+    def stream(self, cypher, parameters=None, fetch_size=DEFAULT_FETCH_SIZE):
+        """
+        按批读取查询结果，内存中最多保留一批
+
+        生成器从第一次取批次起一直占用一个全局名额和一个调用方名额，直到读完或被关闭，
+        消费方处理每批数据期间也不归还（游标读完之前占用着连接）。因此消费方应尽快读完，
+        或在提前停止时调用生成器的 close()（关闭游标、丢弃剩余结果并归还名额）；
+        处理批次时再用同一调用方执行查询，会额外占用该调用方的一个名额。
+
+        Args:
+            cypher: Cypher查询字符串
+            parameters: 查询参数字典
+            fetch_size: 每批的最大行数
+
+        Yields:
+            结果字典列表
+        """
+        with self._registry.slot(self.caller):
+            cursor = self._registry._live(self._key).run(cypher, **(parameters or {}))
+            try:
+                batch = []
+                for record in cursor:
+                    batch.append(record.data())
+                    if len(batch) >= fetch_size:
+                        yield batch
+                        batch = []
+                if batch:
+                    yield batch
+            finally:
+                close = getattr(cursor, "close", None)
+                if close:
+                    close()
+        self._registry._mark_healthy(self._key)
+
+    def __getattr__(self, name):
+        return getattr(self._registry._live(self._key), name)
+
+    def __repr__(self):
+        return f"PooledGraph({self._key[0]!r}, caller={self.caller!r})"
+
+
+class BufferedCursor:
+    """
+    已读完的查询结果
+
+    支持迭代记录、data() 和 evaluate()；plan()、stats() 等摘要信息转发给读完的原游标。
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._records = list(cursor)
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __len__(self):
+        return len(self._records)
+
+    def data(self, *keys):
+        """全部记录转为字典列表"""
+        return [record.data(*keys) for record in self._records]
+
+    def evaluate(self, field=0):
+        """第一条记录的指定字段，没有记录时返回 None"""
+        return self._records[0][field] if self._records else None
+
+    def close(self):
+        self._records = []
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry(settings=None):
+    """
+    进程级注册表，首次调用时创建
+
+    Args:
+        settings: 首次创建时使用的设置（见 DEFAULT_SETTINGS），之后的调用忽略
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ConnectionRegistry(settings)
+        return _registry
@@ -0,0 +1,132 @@
+"""
+节点内容哈希：记录上次导入时每个节点的内容摘要，增量导入时只写入新增或变化的行
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger("ContentHashes")
+
+
+def content_hash(row):
+    """
+    计算一行数据的内容摘要
+
+    字符串去掉首尾空白、键排序后序列化，字段顺序和空白变化不算内容变化。
+    """
+    normalized = {
+        key: value.strip() if isinstance(value, str) else value
+        for key, value in row.items()
+    }
+    text = json.dumps(normalized, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class ContentHashStore:
+    """
+    持久化的 名称 → 内容摘要 映射
+
+    变化追加到 JSONL 文件末尾（删除记为 hash 为 null 的记录），加载时后面的记录覆盖前面的；
+    记录数明显多于存活条目时在 flush 时整体重写。
+    """
+
+    def __init__(self, path):
+        """
+        初始化内容哈希表
+
+        Args:
+            path: 持久化文件路径
+        """
+        self.path = path
+        self._hashes = {}
+        self._pending = []
+        self._records = 0
+        self._torn = False
+        self._lock = threading.Lock()
+        self.load()
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def get(self, name):
+        """上次导入时的内容摘要，没有记录时返回 None"""
+        return self._hashes.get(name)
+
+    def names(self):
+        """全部已记录的名称"""
+        with self._lock:
+            return list(self._hashes)
+
+    def load(self):
+        """从文件加载映射，忽略无法解析的行（如中断时写了一半的末行）"""
+        self._hashes.clear()
+        self._pending = []
+        self._records = 0
+        self._torn = False
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 下次 flush 整体重写，避免新记录接在残缺的行后面
+                    self._torn = True
+                    continue
+                self._records += 1
+                if record.get("hash") is None:
+                    self._hashes.pop(record["name"], None)
+                else:
+                    self._hashes[record["name"]] = record["hash"]
+
+    def update(self, hashes):
+        """
+        记录已写入图谱的内容摘要
+
+        Args:
+            hashes: (名称, 摘要) 可迭代对象
+        """
+        with self._lock:
+            for name, digest in hashes:
+                if self._hashes.get(name) != digest:
+                    self._hashes[name] = digest
+                    self._pending.append({"name": name, "hash": digest})
+
+    def remove(self, names):
+        """删除名称的记录"""
+        with self._lock:
+            for name in names:
+                if self._hashes.pop(name, None) is not None:
+                    self._pending.append({"name": name, "hash": None})
+
+    def flush(self):
+        """把变化写入文件，记录过多时整体重写"""
+        with self._lock:
+            if not self._pending:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            if self._torn or self._records + len(self._pending) > 2 * len(self._hashes) + 1000:
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    for name, digest in self._hashes.items():
+                        f.write(json.dumps({"name": name, "hash": digest}, ensure_ascii=False) + "\n")
+                os.replace(tmp_path, self.path)
+                self._records = len(self._hashes)
+                self._torn = False
+            else:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    for record in self._pending:
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self._records += len(self._pending)
+            self._pending = []
+
+    def reset(self):
+        """清空映射并删除文件"""
+        with self._lock:
+            self._hashes.clear()
+            self._pending = []
+            self._records = 0
+            if os.path.exists(self.path):
+                os.remove(self.path)
@@ -0,0 +1,130 @@
+"""
+分块清空数据库：先分块删除关系再分块删除节点，每块一个事务，避免单个 DETACH DELETE 事务耗尽内存
+
+所有清空数据库的入口（Neo4jHandler.clear_database、示例数据脚本、页面的重置按钮）都使用 clear_graph。
+"""
+import logging
+import time
+
+from src import graph_writes
+from src.batch_sizer import is_resource_error
+from src.imported_names import IMPORTED_NAMES_DIR, reset_names_dir
+
+logger = logging.getLogger("DatabaseCleaner")
+
+# 默认每个事务删除的关系或节点数
+DEFAULT_CHUNK_SIZE = 10000
+
+# 遇到内存或超时错误时块大小减半，不小于此值
+MIN_CHUNK_SIZE = 100
+
+# 每块删除语句：(阶段, 计数语句, 删除语句)。关系先删，节点删除时就不会连带大量关系
+PHASES = [
+    ("relationships",
+     "MATCH ()-[r]->() RETURN count(r) AS count",
+     "MATCH ()-[r]->() WITH r LIMIT $limit DELETE r RETURN count(*) AS deleted"),
+    ("nodes",
+     "MATCH (n) RETURN count(n) AS count",
+     "MATCH (n) WITH n LIMIT $limit DETACH DELETE n RETURN count(*) AS deleted"),
+]
+
+PHASE_NAMES = {"recreate": "重建数据库", "relationships": "关系", "nodes": "节点"}
+
+
+def _scalar(graph, cypher, key, **params):
+    rows = graph.run(cypher, **params).data()
+    return rows[0][key] if rows else 0
+
+
+def recreate_database(graph):
+    """
+    通过 system 数据库重建当前数据库（CREATE OR REPLACE DATABASE），同时删除约束和索引
+
+    需要 Neo4j 企业版和管理员权限，失败时抛出异常。
+
+    Args:
+        graph: py2neo Graph 对象
+    """
+    name = getattr(graph, "name", None) or _scalar(graph, "CALL db.info() YIELD name RETURN name", "name")
+    if not name:
+        raise RuntimeError("无法确定当前数据库名称")
+    escaped = name.replace("`", "``")
+    graph.service.system_graph.run(f"CREATE OR REPLACE DATABASE `{escaped}` WAIT")
+
+
+def clear_graph(graph, chunk_size=DEFAULT_CHUNK_SIZE, progress=None, recreate=False, names_dir=IMPORTED_NAMES_DIR):
+    """
+    清空数据库中的所有节点和关系
+
+    每块删除在独立的自动提交事务中执行；遇到内存不足或超时错误时块大小减半后重试。
+
+    Args:
+        graph: py2neo Graph 对象
+        chunk_size: 每个事务删除的关系或节点数
+        progress: 进度回调，参数为事件字典 {phase, deleted, total, chunk_size, elapsed_seconds}，
+            phase 为 "relationships"、"nodes" 或 "recreate"
+        recreate: 是否先尝试重建数据库（最快，但会删除约束和索引）；不被允许时退回到分块删除
+        names_dir: 导入使用的已导入名称集合目录（见 src.imported_names），清空后一并删除，
+            否则之后的去重导入会把已被删除的节点当作已导入而跳过
+
+    Returns:
+        {"recreated": 是否重建了数据库, "relationships": 删除的关系数, "nodes": 删除的节点数}
+    """
+    try:
+        return _clear_graph(graph, chunk_size, progress, recreate)
+    finally:
+        # 即使中途失败，也可能已经删除了部分数据
+        graph_writes.publish(labels=[graph_writes.ANY], rel_types=[graph_writes.ANY])
+        try:
+            reset_names_dir(names_dir)
+        except OSError as e:
+            logger.warning(f"删除已导入名称集合失败: {e}")
+
+
+def _clear_graph(graph, chunk_size, progress, recreate):
+    started = time.time()
+    result = {"recreated": False, "relationships": 0, "nodes": 0}
+
+    def emit(phase, deleted, total):
+        if progress:
+            try:
+                progress({
+                    "phase": phase,
+                    "deleted": deleted,
+                    "total": total,
+                    "chunk_size": chunk_size,
+                    "elapsed_seconds": time.time() - started,
+                })
+            except Exception as e:
+                logger.warning(f"清空进度回调失败: {e}")
+
+    if recreate:
+        try:
+            recreate_database(graph)
+            result["recreated"] = True
+            emit("recreate", 1, 1)
+            logger.info("已重建数据库")
+            return result
+        except Exception as e:
+            logger.warning(f"重建数据库失败，改为分块删除: {e}")
+
+    for phase, count_query, delete_query in PHASES:
+        total = _scalar(graph, count_query, "count")
+        deleted = 0
+        emit(phase, deleted, total)
+        while True:
+            try:
+                removed = _scalar(graph, delete_query, "deleted", limit=chunk_size)
+            except Exception as e:
+                if not is_resource_error(e) or chunk_size <= MIN_CHUNK_SIZE:
+                    raise
+                chunk_size = max(MIN_CHUNK_SIZE, chunk_size // 2)
+                logger.warning(f"删除{PHASE_NAMES[phase]}时事务资源不足，块大小减为 {chunk_size}: {e}")
+                continue
+            if not removed:
+                break
+            deleted += removed
+            emit(phase, deleted, max(total, deleted))
+        result[phase] = deleted
+        logger.info(f"已删除 {deleted} 个{PHASE_NAMES[phase]}")
+    return result
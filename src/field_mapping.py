@@ -0,0 +1,178 @@
+"""
+数据文件字段映射：把各来源文件的字段统一为导入所需的格式，在解析阶段剔除无法导入的行
+"""
+import json
+import logging
+import os
+
+logger = logging.getLogger("FieldMapping")
+
+# 关系文件的映射规则
+# - start / end: 端点匹配方式，按顺序尝试 {节点属性: [候选字段...]}，取第一个有值的字段
+# - properties: 写入关系的属性字段，None 表示除端点字段外全部保留
+# - rename: 属性重命名 {源字段: 关系属性}
+RELATIONSHIP_MAPPINGS = {
+    "company_industry": {
+        "start": {"name": ["start_name", "company_name"]},
+        "end": {"name": ["end_name", "industry_name"]},
+        "properties": None,
+    },
+    "industry_industry": {
+        # 行业名称存在同名不同级的情况，优先按行业代码匹配
+        "start": {"code": ["start_code", "from_code"], "name": ["start_name", "from_industry"]},
+        "end": {"code": ["end_code", "to_code"], "name": ["end_name", "to_industry"]},
+        # rel 字段就是关系类型本身，不再重复存为属性
+        "properties": [],
+    },
+    "company_product": {
+        "start": {"name": ["start_name", "company_name"]},
+        "end": {"name": ["end_name", "product_name"]},
+        "properties": None,
+    },
+    "product_product": {
+        "start": {"name": ["start_name"]},
+        "end": {"name": ["end_name"]},
+        "properties": None,
+    },
+}
+
+# 未登记的关系键名（如页面导入的示例数据）使用的默认规则
+DEFAULT_RELATIONSHIP_MAPPING = {
+    "start": {"name": ["start_name"]},
+    "end": {"name": ["end_name"]},
+    "properties": None,
+}
+
+# 节点文件的映射规则：name 必填，其余字段原样保留
+NODE_MAPPING = {
+    "key": "name",
+    "fields": ["name"],
+}
+
+
+class RelationshipMapping:
+    """编译后的关系字段映射"""
+
+    def __init__(self, spec):
+        """
+        编译映射规则
+
+        Args:
+            spec: RELATIONSHIP_MAPPINGS 中的一条规则
+        """
+        self._start = [(prop, tuple(fields)) for prop, fields in spec["start"].items()]
+        self._end = [(prop, tuple(fields)) for prop, fields in spec["end"].items()]
+        self._key_fields = frozenset(
+            field for _, fields in self._start + self._end for field in fields
+        )
+        properties = spec.get("properties")
+        self._properties = None if properties is None else tuple(properties)
+        self._rename = dict(spec.get("rename", {}))
+
+    def apply(self, row):
+        """
+        映射一行关系数据
+
+        Args:
+            row: 解析后的原始行
+
+        Returns:
+            (映射后的行, None) 或 (None, 拒绝原因)。映射后的行包含
+            start/end（端点取值）、start_key/end_key（匹配的节点属性）和 properties
+        """
+        if not isinstance(row, dict):
+            return None, "not_object"
+        start_key, start = _resolve(row, self._start)
+        if start_key is None:
+            return None, "missing_start"
+        end_key, end = _resolve(row, self._end)
+        if end_key is None:
+            return None, "missing_end"
+
+        if self._properties is None:
+            properties = {k: v for k, v in row.items() if k not in self._key_fields}
+        else:
+            properties = {k: row[k] for k in self._properties if k in row}
+        if self._rename:
+            properties = {self._rename.get(k, k): v for k, v in properties.items()}
+
+        return {
+            "start": start,
+            "end": end,
+            "start_key": start_key,
+            "end_key": end_key,
+            "properties": properties,
+        }, None
+
+
+class NodeMapping:
+    """编译后的节点字段映射"""
+
+    def __init__(self, spec=NODE_MAPPING):
+        self._key = spec["key"]
+        self._fields = tuple(spec["fields"])
+
+    def apply(self, row):
+        """
+        映射一行节点数据
+
+        Returns:
+            (映射后的行, None) 或 (None, 拒绝原因)
+        """
+        if not isinstance(row, dict):
+            return None, "not_object"
+        for field in self._fields:
+            value = row.get(field)
+            if value not in (None, ""):
+                if field != self._key:
+                    row = dict(row)
+                    row[self._key] = value
+                return row, None
+        return None, f"missing_{self._key}"
+
+
+def relationship_mapping(rel_key):
+    """获取关系键名对应的编译后映射"""
+    return RelationshipMapping(RELATIONSHIP_MAPPINGS.get(rel_key, DEFAULT_RELATIONSHIP_MAPPING))
+
+
+class RejectedRowWriter:
+    """
+    被拒绝行的旁路文件，每行记录原因和原始数据，并按原因计数
+
+    文件在第一次写入时才创建。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.counts = {}
+        self._file = None
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def write(self, row, reason):
+        """记录一行被拒绝的数据"""
+        self.counts[reason] = self.counts.get(reason, 0) + 1
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps({"reason": reason, "row": row}, ensure_ascii=False) + "\n")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.counts:
+            logger.warning(f"拒绝 {self.total} 行数据 {self.counts}，详见 {self.path}")
+
+
+def _resolve(row, candidates):
+    """按规则顺序查找第一个有值的端点字段，返回 (节点属性, 取值)"""
+    for prop, fields in candidates:
+        for field in fields:
+            value = row.get(field)
+            if value not in (None, ""):
+                return prop, value
+    return None, None
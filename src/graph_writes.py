@@ -0,0 +1,159 @@
+"""
+图写入事件：写操作发布它改动的节点标签和关系类型，查询缓存（utils.query_cache）据此只失效相关条目
+
+- 同一进程内的订阅者立即收到事件
+- 事件同时追加到共享事件文件，独立运行的导入进程（导入面板、命令行）写入后，
+  页面应用在下次读缓存前读取其他进程的新事件
+- 标签或关系类型为 ANY 表示可能改动了任意标签或关系类型（如清空数据库）
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger("GraphWrites")
+
+# 任意标签或关系类型
+ANY = "*"
+
+# 跨进程共享的事件文件，相对于工作目录（各应用都从项目根目录启动）
+WRITE_EVENTS_PATH = os.path.join("logs", "graph_writes.jsonl")
+
+# 事件文件超过该字节数时截断，读取方发现文件变短后失效全部条目
+MAX_EVENTS_BYTES = 1024 * 1024
+
+_listeners = []
+_lock = threading.Lock()
+
+
+def subscribe(listener):
+    """
+    订阅本进程的写入事件
+
+    Args:
+        listener: 回调，参数为 (labels, rel_types) 两个集合
+    """
+    with _lock:
+        _listeners.append(listener)
+
+
+def unsubscribe(listener):
+    """取消订阅"""
+    with _lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+
+def writes_since(timestamp, path=WRITE_EVENTS_PATH):
+    """
+    共享事件文件中某一时刻之后的写入（包括本进程的写入）
+
+    事件文件截断时会先写入一条 ANY 事件，截断前丢失的事件因此仍被计入。
+
+    Args:
+        timestamp: 起始时间戳
+        path: 共享事件文件路径
+
+    Returns:
+        (labels, rel_types) 两个集合
+    """
+    labels, rel_types = set(), set()
+    try:
+        with open(path, "rb") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return labels, rel_types
+    for line in lines:
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue
+        if event.get("time", 0) > timestamp:
+            labels.update(event.get("labels", ()))
+            rel_types.update(event.get("rel_types", ()))
+    return labels, rel_types
+
+
+def publish(labels=(), rel_types=(), path=WRITE_EVENTS_PATH):
+    """
+    发布一次写入涉及的标签和关系类型
+
+    Args:
+        labels: 新建、修改或删除过的节点标签
+        rel_types: 新建、修改或删除过的关系类型
+        path: 共享事件文件路径，为 None 时只通知本进程
+    """
+    labels, rel_types = set(labels), set(rel_types)
+    if not labels and not rel_types:
+        return
+    with _lock:
+        listeners = list(_listeners)
+    for listener in listeners:
+        try:
+            listener(labels, rel_types)
+        except Exception as e:
+            logger.warning(f"写入事件回调失败: {e}")
+    if path:
+        _append_event(path, labels, rel_types)
+
+
+def _append_event(path, labels, rel_types):
+    event = {"time": time.time(), "pid": os.getpid(), "labels": sorted(labels), "rel_types": sorted(rel_types)}
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with _lock:
+            truncate = os.path.exists(path) and os.path.getsize(path) > MAX_EVENTS_BYTES
+            with open(path, "w" if truncate else "a", encoding="utf-8") as f:
+                if truncate:
+                    # 截断丢弃的事件可能涉及任意标签，留下一条 ANY 事件供 writes_since 使用
+                    marker = dict(event, labels=[ANY], rel_types=[ANY])
+                    f.write(json.dumps(marker, ensure_ascii=False) + "\n")
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+    except OSError as e:
+        logger.warning(f"写入事件文件失败: {e}")
+
+
+class EventReader:
+    """读取其他进程追加到共享事件文件的新事件"""
+
+    def __init__(self, path=WRITE_EVENTS_PATH):
+        self.path = path
+        # 从当前末尾开始读，启动前的事件与本进程的缓存无关
+        self.offset = os.path.getsize(path) if os.path.exists(path) else 0
+
+    def poll(self):
+        """
+        读取新事件
+
+        Returns:
+            (labels, rel_types) 两个集合；事件文件被截断时两者都为 {ANY}
+        """
+        labels, rel_types = set(), set()
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return labels, rel_types
+        if size < self.offset:
+            # 文件被截断，中间的事件可能已丢失
+            self.offset = 0
+            labels.add(ANY)
+            rel_types.add(ANY)
+        if size == self.offset:
+            return labels, rel_types
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        # 只处理完整的行，写了一半的行留到下次
+        end = data.rfind(b"\n") + 1
+        self.offset += end
+        pid = os.getpid()
+        for line in data[:end].splitlines():
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if event.get("pid") != pid:
+                labels.update(event.get("labels", ()))
+                rel_types.update(event.get("rel_types", ()))
+        return labels, rel_types
@@ -0,0 +1,344 @@
+"""
+导入性能基准：按批次大小、并行度、索引有无和输入格式的组合逐一执行完整导入，输出机器可读的结果
+
+用法:
+    python -m src.import_benchmark --data-dir data/synthetic --batch-sizes 2000,10000 --workers 1,4 \\
+        --indexes on,off --formats jsonl,gzip,parquet --output benchmarks/import.json
+
+每个组合在独立的子进程中运行（峰值内存互不影响），导入前清空数据库和导入状态。
+会清空目标数据库，只应对专门用于压测的 Neo4j 实例执行。
+"""
+import argparse
+import gzip
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from src.neo4j_handler import Config, Neo4jHandler, resolve_data_paths
+from src.import_telemetry import ImportTelemetry
+from src.schema_manager import SchemaManager
+from src.compressed_input import input_size, is_compressed_input
+from src.columnar_staging import COLUMNAR_DIR, stage_columnar
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("ImportBenchmark")
+
+# 节点导入顺序与 create_graphnodes 一致
+NODE_LABELS = [
+    ("company", "company_path"),
+    ("industry", "industry_path"),
+    ("product", "product_path"),
+]
+
+# 关系导入：(导入方法名, 路径键名)，顺序与 create_graphrels 一致
+RELATIONSHIPS = [
+    ("import_company_industry_rels", "company_industry_path"),
+    ("import_industry_industry_rels", "industry_industry"),
+    ("import_company_product_rels", "company_product_path"),
+    ("import_product_product_rels", "product_product"),
+]
+
+# 计算延迟分位数时保留的批次数，足以覆盖一次基准中的全部批次
+LATENCY_WINDOW = 1000000
+
+
+# gzip-shards 格式把每个文件拆成的分片数
+BENCHMARK_SHARDS = 4
+
+
+def stage_jsonl(source_dir, target_dir):
+    """JSONL 输入：直接使用源目录中的文件"""
+    return source_dir
+
+
+def _source_files(source_dir):
+    """源目录中存在的普通数据文件"""
+    for path in resolve_data_paths(source_dir, columnar=False).values():
+        if os.path.isfile(path) and not is_compressed_input(path):
+            yield path
+
+
+def stage_gzip(source_dir, target_dir):
+    """gzip 输入：每个文件压缩为 <文件名>.gz，导入时流式解压"""
+    os.makedirs(target_dir, exist_ok=True)
+    for path in _source_files(source_dir):
+        target = os.path.join(target_dir, os.path.basename(path) + ".gz")
+        with open(path, "rb") as src, gzip.open(target, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+    return target_dir
+
+
+def stage_gzip_shards(source_dir, target_dir):
+    """gzip 分片输入：每个文件按行拆成 BENCHMARK_SHARDS 个连续的 gzip 分片，导入时并行解压"""
+    for path in _source_files(source_dir):
+        name, ext = os.path.splitext(os.path.basename(path))
+        shard_dir = os.path.join(target_dir, name)
+        os.makedirs(shard_dir, exist_ok=True)
+        with open(path, "rb") as f:
+            per_shard = -(-sum(1 for _ in f) // BENCHMARK_SHARDS) or 1
+            f.seek(0)
+            for index in range(BENCHMARK_SHARDS):
+                with gzip.open(os.path.join(shard_dir, f"part-{index:04d}{ext}.gz"), "wb") as dst:
+                    dst.writelines(itertools.islice(f, per_shard))
+    return target_dir
+
+
+def stage_parquet(source_dir, target_dir):
+    """Parquet 输入：转换为列式暂存文件，导入时按列读取"""
+    stage_columnar(source_dir, "parquet", os.path.join(target_dir, COLUMNAR_DIR))
+    return target_dir
+
+
+def stage_arrow(source_dir, target_dir):
+    """Arrow IPC 输入：转换为列式暂存文件，导入时内存映射读取"""
+    stage_columnar(source_dir, "arrow", os.path.join(target_dir, COLUMNAR_DIR))
+    return target_dir
+
+
+# 输入格式 → 准备数据目录的函数 (源目录, 暂存目录) -> 导入使用的数据目录
+FORMATS = {
+    "jsonl": stage_jsonl,
+    "gzip": stage_gzip,
+    "gzip-shards": stage_gzip_shards,
+    "parquet": stage_parquet,
+    "arrow": stage_arrow,
+}
+
+
+def peak_rss_bytes():
+    """当前进程的峰值常驻内存（字节），平台不支持时返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _phase_result(telemetry, seconds):
+    """从一个导入阶段的遥测汇总中提取基准指标"""
+    summary = telemetry.summary()
+    return {
+        "rows": summary["rows"],
+        "seconds": seconds,
+        "rows_per_second": summary["rows"] / seconds if seconds > 0 else 0.0,
+        "latency_p50": summary["latency_p50"],
+        "latency_p99": summary["latency_p99"],
+        "latency_max": summary["latency_max"],
+        "bytes_parsed": summary["bytes_parsed"],
+        "rejected": summary["rejected"],
+        "rows_by_key": summary["rows_by_key"],
+    }
+
+
+def run_case(case):
+    """
+    执行一个基准组合（在子进程中调用）
+
+    Args:
+        case: 组合参数字典，包含 config、data_dir、batch_size、workers、indexes、format
+
+    Returns:
+        结果字典
+    """
+    with tempfile.TemporaryDirectory(prefix="kg-benchmark-") as work_dir:
+        data_dir = FORMATS[case["format"]](case["data_dir"], os.path.join(work_dir, "data"))
+        # 导入状态放在临时目录，不影响正式导入的检查点
+        handler = Neo4jHandler(case["config"], data_dir=data_dir, state_dir=work_dir)
+        if not handler.g:
+            raise RuntimeError(f"无法连接 Neo4j: {case['config']['uri']}")
+        handler.clear_database()
+        handler.reset_import_state()
+
+        schema = SchemaManager(handler.g)
+        if case["indexes"]:
+            handler.ensure_schema()
+        else:
+            schema.drop()
+            # 跳过导入前的建约束，保持无索引状态
+            handler._schema_ready = True
+
+        workers = case["workers"]
+        handler.telemetry = ImportTelemetry(latency_window=LATENCY_WINDOW)
+        handler.telemetry.start(files={label: getattr(handler, attr) for label, attr in NODE_LABELS})
+        started = time.time()
+        for label, attr in NODE_LABELS:
+            # 节点没有分区并行导入，并行度体现为流水线写入线程数
+            handler.import_nodes(
+                label, getattr(handler, attr), batch_size=case["batch_size"],
+                pipelined=workers > 1, writers=workers
+            )
+        nodes = _phase_result(handler.telemetry, time.time() - started)
+
+        handler.telemetry.start(files={attr: getattr(handler, attr) for _, attr in RELATIONSHIPS})
+        started = time.time()
+        for method, attr in RELATIONSHIPS:
+            getattr(handler, method)(getattr(handler, attr), case["batch_size"], workers)
+        relationships = _phase_result(handler.telemetry, time.time() - started)
+
+    return {
+        "batch_size": case["batch_size"],
+        "workers": workers,
+        "indexes": case["indexes"],
+        "format": case["format"],
+        "repeat": case["repeat"],
+        "nodes": nodes,
+        "relationships": relationships,
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def dataset_info(data_dir):
+    """数据目录中各导入文件的路径和字节数"""
+    files = {}
+    for key, path in resolve_data_paths(data_dir).items():
+        files[key] = {"path": path, "bytes": input_size(path) if os.path.exists(path) else None}
+    return files
+
+
+def git_revision():
+    """当前代码的 git 提交，无法获取时返回 None"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class ImportBenchmark:
+    """导入基准测试"""
+
+    def __init__(self, config, data_dir="data", batch_sizes=(10000,), workers=(1,), indexes=(True,),
+                 formats=("jsonl",), repeat=1):
+        """
+        初始化基准测试
+
+        Args:
+            config: Neo4j 连接参数字典（uri、username、password）
+            data_dir: 数据目录
+            batch_sizes: 要测试的批次大小
+            workers: 要测试的并行度（关系导入线程数、节点流水线写入线程数）
+            indexes: 要测试的索引状态，True 表示导入前创建约束和索引
+            formats: 要测试的输入格式（见 FORMATS）
+            repeat: 每个组合重复次数
+        """
+        unknown = [name for name in formats if name not in FORMATS]
+        if unknown:
+            raise ValueError(f"不支持的输入格式: {unknown}，可选: {sorted(FORMATS)}")
+        self.config = config
+        self.data_dir = data_dir
+        self.batch_sizes = list(batch_sizes)
+        self.workers = list(workers)
+        self.indexes = list(indexes)
+        self.formats = list(formats)
+        self.repeat = repeat
+
+    def cases(self):
+        """全部基准组合，按固定顺序排列"""
+        for fmt, indexes, batch_size, workers, repeat in itertools.product(
+                self.formats, self.indexes, self.batch_sizes, self.workers, range(self.repeat)):
+            yield {
+                "config": self.config,
+                "data_dir": self.data_dir,
+                "batch_size": batch_size,
+                "workers": workers,
+                "indexes": indexes,
+                "format": fmt,
+                "repeat": repeat,
+            }
+
+    def run(self):
+        """
+        逐个执行基准组合
+
+        Returns:
+            报告字典：运行环境、数据集和每个组合的结果
+        """
+        report = {
+            "started_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "neo4j_uri": self.config["uri"],
+            "dataset": dataset_info(self.data_dir),
+            "results": [],
+        }
+        # spawn 启动的子进程不继承父进程的内存，峰值内存只反映本组合
+        context = multiprocessing.get_context("spawn")
+        for case in self.cases():
+            label = (f"format={case['format']} indexes={case['indexes']} batch_size={case['batch_size']} "
+                     f"workers={case['workers']} repeat={case['repeat']}")
+            logger.info(f"开始基准: {label}")
+            with context.Pool(1) as pool:
+                try:
+                    result = pool.apply(run_case, (case,))
+                except Exception as e:
+                    logger.error(f"基准失败 [{label}]: {e}")
+                    result = {key: case[key] for key in ("batch_size", "workers", "indexes", "format", "repeat")}
+                    result["error"] = str(e)
+            report["results"].append(result)
+            if "error" not in result:
+                logger.info(f"完成基准 [{label}]: 节点 {result['nodes']['rows_per_second']:.0f} 行/秒，"
+                            f"关系 {result['relationships']['rows_per_second']:.0f} 行/秒")
+        return report
+
+
+def _int_list(text):
+    return [int(value) for value in text.split(",") if value]
+
+
+def _bool_list(text):
+    return [value.strip().lower() in ("on", "true", "1", "yes") for value in text.split(",") if value]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导入性能基准测试（会清空目标数据库）")
+    parser.add_argument("--data-dir", default="data", help="数据目录，可用 src.synthetic_data 生成")
+    parser.add_argument("--batch-sizes", default="10000", help="逗号分隔的批次大小")
+    parser.add_argument("--workers", default="1", help="逗号分隔的并行度")
+    parser.add_argument("--indexes", default="on", help="逗号分隔的索引状态 on/off")
+    parser.add_argument("--formats", default="jsonl", help=f"逗号分隔的输入格式，可选: {','.join(sorted(FORMATS))}")
+    parser.add_argument("--repeat", type=int, default=1, help="每个组合重复次数")
+    parser.add_argument("--uri", default=None, help="Neo4j 地址，默认读取 config.json")
+    parser.add_argument("--username", default=None, help="Neo4j 用户名")
+    parser.add_argument("--password", default=None, help="Neo4j 密码")
+    parser.add_argument("--output", default=None, help="结果 JSON 文件路径，默认输出到标准输出")
+    args = parser.parse_args()
+
+    config = Config.from_json("config.json") if os.path.exists("config.json") else Config()
+    config = {
+        "uri": args.uri or config.uri,
+        "username": args.username or config.username,
+        "password": args.password or config.password,
+    }
+    benchmark = ImportBenchmark(
+        config, args.data_dir,
+        batch_sizes=_int_list(args.batch_sizes),
+        workers=_int_list(args.workers),
+        indexes=_bool_list(args.indexes),
+        formats=[value for value in args.formats.split(",") if value],
+        repeat=args.repeat,
+    )
+    report = json.dumps(benchmark.run(), ensure_ascii=False, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+        logger.info(f"基准结果已写入 {args.output}")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+后台导入任务：在独立线程中排队执行导入，任务表持久化到磁盘，页面只需轮询任务状态
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from src.neo4j_handler import ImportInterrupted
+
+logger = logging.getLogger("ImportJobs")
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+PAUSED = "paused"
+CANCELLED = "cancelled"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# 仍可能继续执行的状态
+ACTIVE_STATUSES = (QUEUED, RUNNING, PAUSED)
+
+
+class ImportJobRunner:
+    """
+    后台导入任务执行器
+
+    只有一个工作线程，任务按提交顺序逐个执行（多个导入同时写同一份导入状态会互相覆盖检查点）。
+    暂停和取消在下一个批次边界生效，检查点已经保存，恢复后的任务从中断处续传。
+    进程重启时仍在运行的任务会标记为已暂停，由用户决定是否恢复。
+    """
+
+    def __init__(self, graph, table_path="import_jobs.json", save_interval=2.0):
+        """
+        初始化执行器
+
+        Args:
+            graph: MedicalGraph 或 Neo4jHandler 实例
+            table_path: 任务表文件路径
+            save_interval: 导入进行中保存任务表的最小间隔（秒）
+        """
+        self.graph = graph
+        self.table_path = table_path
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._jobs = self._load()
+        self._requests = {}
+        self._last_save = 0.0
+
+        self._thread = threading.Thread(target=self._worker_loop, name="import-job-runner", daemon=True)
+        self._thread.start()
+
+    def submit(self, batch_size=10000, workers=1, pipelined=False, adaptive=False, delta=False, delete_missing=False,
+               concurrent_labels=False):
+        """
+        提交导入任务
+
+        Args:
+            batch_size: 批次大小
+            workers: 关系导入线程数
+            pipelined: 是否使用流水线导入
+            adaptive: 是否自适应调整批次大小
+            delta: 是否增量导入节点
+            delete_missing: 增量导入时是否删除数据文件中已不存在的节点
+            concurrent_labels: 是否并行导入各节点标签
+
+        Returns:
+            任务 ID
+        """
+        job_id = uuid.uuid4().hex[:8]
+        with self._lock:
+            self._jobs.append({
+                "id": job_id,
+                "status": QUEUED,
+                "params": {
+                    "batch_size": batch_size,
+                    "workers": workers,
+                    "pipelined": pipelined,
+                    "adaptive": adaptive,
+                    "delta": delta,
+                    "delete_missing": delete_missing,
+                    "concurrent_labels": concurrent_labels,
+                },
+                "created_at": _now(),
+                "started_at": None,
+                "finished_at": None,
+                "phase": None,
+                "progress": None,
+                "result": None,
+                "error": None,
+            })
+            self._save()
+            self._wakeup.notify()
+        logger.info(f"已提交导入任务 {job_id}")
+        return job_id
+
+    def pause(self, job_id):
+        """暂停排队中或运行中的任务"""
+        return self._request(job_id, PAUSED)
+
+    def cancel(self, job_id):
+        """取消排队中、已暂停或运行中的任务（已导入的数据和检查点保留）"""
+        return self._request(job_id, CANCELLED)
+
+    def resume(self, job_id):
+        """恢复已暂停的任务，重新排队后从检查点续传"""
+        with self._lock:
+            job = self._find(job_id)
+            if not job or job["status"] != PAUSED:
+                return False
+            job["status"] = QUEUED
+            job["error"] = None
+            self._save()
+            self._wakeup.notify()
+        return True
+
+    def jobs(self):
+        """全部任务（按提交顺序）的副本"""
+        with self._lock:
+            return json.loads(json.dumps(self._jobs))
+
+    def get(self, job_id):
+        """单个任务的副本"""
+        with self._lock:
+            job = self._find(job_id)
+            return json.loads(json.dumps(job)) if job else None
+
+    def active_job(self):
+        """正在运行、排队或暂停的第一个任务"""
+        for job in self.jobs():
+            if job["status"] in ACTIVE_STATUSES:
+                return job
+        return None
+
+    def clear_finished(self):
+        """从任务表中删除已结束的任务"""
+        with self._lock:
+            self._jobs = [job for job in self._jobs if job["status"] in ACTIVE_STATUSES]
+            self._save()
+
+    def _request(self, job_id, status):
+        with self._lock:
+            job = self._find(job_id)
+            if not job:
+                return False
+            if job["status"] == RUNNING:
+                # 由工作线程在批次边界停止后更新状态
+                self._requests[job_id] = status
+                _interrupt_event(self.graph).set()
+            elif job["status"] in (QUEUED, PAUSED):
+                job["status"] = status
+                job["finished_at"] = _now() if status == CANCELLED else None
+                self._save()
+            else:
+                return False
+        return True
+
+    def _worker_loop(self):
+        while True:
+            with self._lock:
+                job = next((job for job in self._jobs if job["status"] == QUEUED), None)
+                while job is None:
+                    self._wakeup.wait()
+                    job = next((job for job in self._jobs if job["status"] == QUEUED), None)
+                job["status"] = RUNNING
+                job["started_at"] = _now()
+                job["finished_at"] = None
+                self._save()
+            self._execute(job)
+
+    def _execute(self, job):
+        params = job["params"]
+        interrupt_event = _interrupt_event(self.graph)
+        interrupt_event.clear()
+        # 导入方法捕获异常后只返回 0，通过记录的失败信息判断阶段是否失败
+        errors = _handler(self.graph).import_errors
+        errors.clear()
+        started = time.time()
+        try:
+            self._set_phase(job, "nodes")
+            node_count = self.graph.create_graphnodes(
+                params["batch_size"], params["pipelined"], params["adaptive"],
+                progress_callback=lambda event: self._on_progress(job, event),
+                delta=params.get("delta", False), delete_missing=params.get("delete_missing", False),
+                concurrent=params.get("concurrent_labels", False),
+            )
+            self._check_errors(errors, "节点")
+            node_telemetry = self.graph.telemetry.summary()
+
+            self._set_phase(job, "relationships")
+            rel_count = self.graph.create_graphrels(
+                params["batch_size"], params["workers"], params["pipelined"], params["adaptive"],
+                progress_callback=lambda event: self._on_progress(job, event),
+            )
+            self._check_errors(errors, "关系")
+            rel_telemetry = self.graph.telemetry.summary()
+
+            self._finish(job, COMPLETED, result={
+                "node_count": node_count,
+                "rel_count": rel_count,
+                "duration": time.time() - started,
+                "nodes": node_telemetry,
+                "relationships": rel_telemetry,
+                "batch_sizes": dict(self.graph.import_state.get("batch_sizes", {})),
+                "delta": dict(self.graph.import_state.get("delta", {})) if params.get("delta") else {},
+            })
+        except ImportInterrupted:
+            with self._lock:
+                status = self._requests.get(job["id"], PAUSED)
+            self._finish(job, status)
+        except Exception as e:
+            logger.error(f"导入任务 {job['id']} 失败: {e}")
+            self._finish(job, FAILED, error=str(e))
+        finally:
+            interrupt_event.clear()
+
+    @staticmethod
+    def _check_errors(errors, phase):
+        if errors:
+            raise RuntimeError(f"{phase}导入失败: {'; '.join(errors)}")
+
+    def _set_phase(self, job, phase):
+        with self._lock:
+            job["phase"] = phase
+            job["progress"] = None
+            self._save()
+
+    def _on_progress(self, job, event):
+        with self._lock:
+            job["progress"] = event
+            if time.time() - self._last_save >= self.save_interval:
+                self._save()
+
+    def _finish(self, job, status, result=None, error=None):
+        with self._lock:
+            self._requests.pop(job["id"], None)
+            job["status"] = status
+            job["result"] = result
+            job["error"] = error
+            job["finished_at"] = _now() if status != PAUSED else None
+            self._save()
+        logger.info(f"导入任务 {job['id']} 结束，状态: {status}")
+
+    def _find(self, job_id):
+        return next((job for job in self._jobs if job["id"] == job_id), None)
+
+    def _load(self):
+        if not os.path.exists(self.table_path):
+            return []
+        try:
+            with open(self.table_path, "r", encoding="utf-8") as f:
+                jobs = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"读取任务表失败: {e}")
+            return []
+        for job in jobs:
+            if job["status"] == RUNNING:
+                job["status"] = PAUSED
+                job["error"] = "进程重启时任务被中断，可恢复后从检查点续传"
+        return jobs
+
+    def _save(self):
+        # 调用方持有锁；先写临时文件再替换，避免任务表写到一半
+        tmp_path = f"{self.table_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._jobs, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.table_path)
+            self._last_save = time.time()
+        except OSError as e:
+            logger.error(f"保存任务表失败: {e}")
+
+
+def _handler(graph):
+    return getattr(graph, "handler", graph)
+
+
+def _interrupt_event(graph):
+    return _handler(graph).interrupt_event
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -0,0 +1,206 @@
+"""
+导入状态日志，用追加写入的检查点日志代替每批次重写 import_state.json
+"""
+import copy
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger("ImportJournal")
+
+
+class ImportJournal:
+    """
+    追加写入的导入状态日志
+
+    状态由一个快照文件和一个日志文件组成：
+    - 快照文件（import_state.json）保存某一时刻的完整状态，通过临时文件 + fsync + 原子重命名写入
+    - 日志文件（import_state.journal）每行记录一次状态变更，只追加不改写
+
+    加载时先读取快照，再按顺序重放日志；日志末尾因崩溃写了一半的行会被忽略。
+    日志记录数超过阈值时合并为新的快照并清空日志。
+    """
+
+    def __init__(self, snapshot_path="import_state.json", journal_path=None,
+                 sync_every=20, sync_interval=2.0, compact_threshold=1000):
+        """
+        初始化导入状态日志
+
+        Args:
+            snapshot_path: 快照文件路径
+            journal_path: 日志文件路径，默认为快照文件名加 .journal 后缀
+            sync_every: 累计多少条记录后执行一次 fsync（组提交）
+            sync_interval: 距上次 fsync 超过多少秒后执行一次 fsync
+            compact_threshold: 日志记录数超过该值时合并为快照
+        """
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or os.path.splitext(snapshot_path)[0] + ".journal"
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.compact_threshold = compact_threshold
+
+        self._lock = threading.RLock()
+        self._state = {}
+        self._journal_file = None
+        self._journal_records = 0
+        self._unsynced = 0
+        self._last_sync = time.time()
+
+    def exists(self):
+        """是否存在已保存的状态"""
+        return os.path.exists(self.snapshot_path) or os.path.exists(self.journal_path)
+
+    def load(self):
+        """
+        读取快照并重放日志
+
+        Returns:
+            当前完整状态字典（副本）
+        """
+        with self._lock:
+            state = {}
+            if os.path.exists(self.snapshot_path):
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+
+            records = 0
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            # 崩溃时写了一半的记录只可能出现在末尾
+                            logger.warning("忽略导入日志中不完整的记录")
+                            break
+                        self._apply(state, record)
+                        records += 1
+
+            self._state = state
+            self._journal_records = records
+            if records >= self.compact_threshold:
+                self.compact()
+            return copy.deepcopy(self._state)
+
+    def commit(self, state, sync=False):
+        """
+        将状态的变更部分追加写入日志
+
+        与上次提交的状态比较，只记录发生变化的键（嵌套字典按第二层键比较）。
+
+        Args:
+            state: 当前完整状态字典
+            sync: 是否立即 fsync
+        """
+        with self._lock:
+            records = list(_diff(self._state, state))
+            if records:
+                f = self._open_journal()
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                self._state = copy.deepcopy(state)
+                self._journal_records += len(records)
+                self._unsynced += len(records)
+
+            if self._journal_records >= self.compact_threshold:
+                self.compact()
+            elif sync or self._unsynced >= self.sync_every or \
+                    time.time() - self._last_sync >= self.sync_interval:
+                self.sync()
+
+    def sync(self):
+        """将日志中尚未落盘的记录 fsync 到磁盘"""
+        with self._lock:
+            if self._journal_file and self._unsynced:
+                os.fsync(self._journal_file.fileno())
+            self._unsynced = 0
+            self._last_sync = time.time()
+
+    def compact(self):
+        """将当前状态原子地写成快照并清空日志"""
+        with self._lock:
+            self._write_snapshot(self._state)
+            self._close_journal()
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            self._journal_records = 0
+            self._unsynced = 0
+            self._last_sync = time.time()
+            logger.info("已合并导入日志到快照")
+
+    def reset(self):
+        """清空状态"""
+        with self._lock:
+            self._state = {}
+            self.compact()
+
+    def close(self):
+        """同步并关闭日志文件"""
+        with self._lock:
+            self.sync()
+            self._close_journal()
+
+    def _open_journal(self):
+        if self._journal_file is None:
+            self._journal_file = open(self.journal_path, "a", encoding="utf-8")
+        return self._journal_file
+
+    def _close_journal(self):
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
+
+    def _write_snapshot(self, state):
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        _fsync_dir(os.path.dirname(os.path.abspath(self.snapshot_path)))
+
+    @staticmethod
+    def _apply(state, record):
+        path = record["path"]
+        target = state
+        for key in path[:-1]:
+            target = target.setdefault(key, {})
+        if record["op"] == "del":
+            target.pop(path[-1], None)
+        else:
+            target[path[-1]] = record["value"]
+
+
+def _diff(old, new):
+    """生成从 old 变为 new 所需的日志记录"""
+    for key in old:
+        if key not in new:
+            yield {"op": "del", "path": [key]}
+    for key, value in new.items():
+        old_value = old.get(key)
+        if isinstance(value, dict) and isinstance(old_value, dict):
+            for sub_key in old_value:
+                if sub_key not in value:
+                    yield {"op": "del", "path": [key, sub_key]}
+            for sub_key, sub_value in value.items():
+                if old_value.get(sub_key) != sub_value:
+                    yield {"op": "set", "path": [key, sub_key], "value": sub_value}
+        elif key not in old or old_value != value:
+            yield {"op": "set", "path": [key], "value": value}
+
+
+def _fsync_dir(dir_path):
+    """fsync 目录以持久化重命名操作（Windows 不支持，忽略）"""
+    try:
+        fd = os.open(dir_path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -0,0 +1,182 @@
+"""
+流水线导入：读取解析与数据库写入重叠执行
+"""
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger("ImportPipeline")
+
+
+class ImportPipeline:
+    """
+    生产者/消费者导入流水线
+
+    调用线程负责读取和解析批次并放入有界队列，一个或多个写入线程从队列取出批次写入数据库。
+    批次可能乱序完成，检查点只在序号连续的批次都写入后才向前推进。
+
+    stats 记录各阶段耗时：
+    - parse_seconds: 读取解析批次耗时
+    - write_seconds: 写入数据库耗时（各写入线程累加）
+    - reader_blocked_seconds: 队列已满、读取方等待写入的时间（数据库是瓶颈）
+    - writer_idle_seconds: 队列为空、写入线程等待数据的时间（解析是瓶颈）
+    """
+
+    def __init__(self, write_batch, writers=1, queue_size=4):
+        """
+        初始化流水线
+
+        Args:
+            write_batch: 写入函数，参数为一个批次的数据列表
+            writers: 写入线程数
+            queue_size: 队列中最多缓存的批次数
+        """
+        self.write_batch = write_batch
+        self.writers = max(1, writers)
+        self.queue = queue.Queue(maxsize=max(1, queue_size))
+        self.stats = {
+            "batches": 0,
+            "rows": 0,
+            "parse_seconds": 0.0,
+            "write_seconds": 0.0,
+            "reader_blocked_seconds": 0.0,
+            "writer_idle_seconds": 0.0,
+            "wall_seconds": 0.0,
+        }
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._error = None
+        self._done = {}
+        self._next_seq = 0
+        self._on_commit = None
+        self._threads = []
+
+    def run(self, batches, on_commit):
+        """
+        执行流水线
+
+        Args:
+            batches: 产出 (批次数据, 批次结束位置) 的迭代器，位置原样传给 on_commit
+            on_commit: 按批次顺序调用的回调 on_commit(行数, 位置)，用于推进检查点
+
+        Returns:
+            写入的行数
+        """
+        self._on_commit = on_commit
+        started = time.time()
+        threads = self._threads = [
+            threading.Thread(target=self._writer_loop, name=f"import-writer-{i}", daemon=True)
+            for i in range(self.writers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            seq = 0
+            iterator = iter(batches)
+            while not self._stop.is_set():
+                parse_started = time.time()
+                try:
+                    batch, offset = next(iterator)
+                except StopIteration:
+                    break
+                self.stats["parse_seconds"] += time.time() - parse_started
+                self._put((seq, batch, offset))
+                seq += 1
+        except Exception as e:
+            self._fail(e)
+        finally:
+            for _ in threads:
+                self._put(None)
+            for thread in threads:
+                thread.join()
+            self.stats["wall_seconds"] = time.time() - started
+
+        if self._error:
+            raise self._error
+        return self.stats["rows"]
+
+    def bottleneck(self):
+        """根据阶段耗时判断瓶颈所在：'database'、'parsing' 或 'balanced'"""
+        blocked = self.stats["reader_blocked_seconds"]
+        idle = self.stats["writer_idle_seconds"] / self.writers
+        if blocked > idle * 2:
+            return "database"
+        if idle > blocked * 2:
+            return "parsing"
+        return "balanced"
+
+    def _put(self, item):
+        # 写入线程在收到结束标记前会一直取队列，出错后只丢弃批次不写入；
+        # 队列满时定时检查，流水线已失败时不再放入批次，写入线程全部退出时不再等待
+        blocked_started = time.time()
+        try:
+            while True:
+                try:
+                    self.queue.put(item, timeout=0.5)
+                    return
+                except queue.Full:
+                    if item is not None and self._stop.is_set():
+                        return
+                    if not any(thread.is_alive() for thread in self._threads):
+                        with self._lock:
+                            if self._error is None:
+                                self._error = RuntimeError("写入线程全部意外退出")
+                        self._stop.set()
+                        return
+        finally:
+            self.stats["reader_blocked_seconds"] += time.time() - blocked_started
+
+    def _writer_loop(self):
+        try:
+            self._drain()
+        except Exception as e:
+            # 意外退出时记录错误，读取方不再等待这个线程
+            self._fail(e)
+
+    def _drain(self):
+        while True:
+            idle_started = time.time()
+            item = self.queue.get()
+            with self._lock:
+                self.stats["writer_idle_seconds"] += time.time() - idle_started
+            if item is None:
+                return
+            if self._stop.is_set():
+                continue
+
+            seq, batch, offset = item
+            try:
+                write_started = time.time()
+                if batch:
+                    self.write_batch(batch)
+                elapsed = time.time() - write_started
+            except Exception as e:
+                self._fail(e)
+                continue
+
+            commit_error = None
+            with self._lock:
+                self.stats["write_seconds"] += elapsed
+                self.stats["batches"] += 1
+                self.stats["rows"] += len(batch)
+                self._done[seq] = (len(batch), offset)
+                try:
+                    while self._next_seq in self._done:
+                        rows, done_offset = self._done.pop(self._next_seq)
+                        self._on_commit(rows, done_offset)
+                        self._next_seq += 1
+                except Exception as e:
+                    commit_error = e
+            if commit_error is not None:
+                # 检查点回调失败后不再推进检查点，继续取队列直到结束标记
+                self._fail(commit_error)
+
+    def _fail(self, error):
+        with self._lock:
+            if self._error is None:
+                self._error = error
+                logger.error(f"流水线导入失败: {error}")
+        self._stop.set()
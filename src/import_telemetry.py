@@ -0,0 +1,158 @@
+"""
+导入遥测：按批次汇总吞吐量、事务延迟、解析字节数和拒绝行数，并通过回调推送进度事件
+"""
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+
+from src.compressed_input import input_size
+
+logger = logging.getLogger("ImportTelemetry")
+
+
+class ImportTelemetry:
+    """
+    一个导入阶段（节点或关系）的遥测
+
+    每提交一个批次生成一个事件字典:
+    - key: 导入状态键名
+    - batch_rows: 本批行数
+    - rows: 本阶段已写入行数
+    - rows_per_second: 本阶段平均吞吐量
+    - latency_p50 / latency_p95 / latency_p99 / latency_max: 最近批次的事务耗时（秒）
+    - bytes_parsed / bytes_total: 本阶段已解析字节数 / 全部数据文件字节数
+    - rejected: 本阶段被拒绝的行数
+    - progress: 0-1 之间的进度（按字节计算，压缩输入按压缩后的字节，续传前已导入的部分计为完成）
+    - eta_seconds: 按当前解析速度估算的剩余秒数，无法估算时为 None
+    """
+
+    def __init__(self, callback=None, latency_window=1000, min_interval=0.2):
+        """
+        初始化遥测
+
+        Args:
+            callback: 进度回调，参数为事件字典
+            latency_window: 计算延迟分位数时保留的最近批次数
+            min_interval: 两次回调之间的最小间隔（秒），避免刷新过于频繁
+        """
+        self.latency_window = latency_window
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self.start(callback)
+
+    def start(self, callback=None, files=None):
+        """
+        开始新的导入阶段
+
+        Args:
+            callback: 进度回调
+            files: 本阶段的数据文件 {键名: 路径}，用于计算总进度
+        """
+        with self._lock:
+            self.callback = callback
+            self._started = time.time()
+            self._last_emit = 0.0
+            self._latencies = deque(maxlen=self.latency_window)
+            self._sizes = {}
+            self._start_offsets = {}
+            self._offsets = {}
+            self._rows = {}
+            self._rejected = {}
+            for key, path in (files or {}).items():
+                if path and os.path.exists(path):
+                    self._sizes[key] = input_size(path)
+
+    def begin_file(self, key, offset, size):
+        """
+        记录一个数据文件的起始偏移量和大小
+
+        Args:
+            key: 导入状态键名
+            offset: 从检查点续传的起始偏移量
+            size: 文件字节数
+        """
+        with self._lock:
+            self._sizes[key] = size
+            self._start_offsets[key] = offset
+            self._offsets[key] = offset
+            self._rows.setdefault(key, 0)
+
+    def timed(self, write_batch):
+        """包装写入函数，记录每个批次的事务耗时"""
+        def write(batch):
+            started = time.time()
+            result = write_batch(batch)
+            with self._lock:
+                self._latencies.append(time.time() - started)
+            return result
+        return write
+
+    def commit(self, key, rows, offset, rejected=0):
+        """
+        记录已提交的批次并推送事件
+
+        Args:
+            key: 导入状态键名
+            rows: 批次行数
+            offset: 批次结束偏移量
+            rejected: 该文件本次导入累计拒绝的行数
+        """
+        with self._lock:
+            self._rows[key] = self._rows.get(key, 0) + rows
+            self._offsets[key] = offset
+            self._rejected[key] = rejected
+            finished = offset >= self._sizes.get(key, 0)
+            now = time.time()
+            if not finished and now - self._last_emit < self.min_interval:
+                return
+            self._last_emit = now
+            event = self._snapshot(now)
+            event["key"] = key
+            event["batch_rows"] = rows
+            callback = self.callback
+
+        if callback:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.warning(f"进度回调失败: {e}")
+
+    def summary(self):
+        """本阶段的汇总数据（字段同事件字典，另含按键名的行数）"""
+        with self._lock:
+            summary = self._snapshot(time.time())
+            summary["rows_by_key"] = dict(self._rows)
+            return summary
+
+    def _snapshot(self, now):
+        elapsed = max(now - self._started, 1e-6)
+        rows = sum(self._rows.values())
+        parsed = sum(self._offsets[k] - self._start_offsets.get(k, 0) for k in self._offsets)
+        total = sum(self._sizes.values())
+        done = sum(self._offsets.get(k, 0) for k in self._sizes)
+        rate = parsed / elapsed
+        latencies = sorted(self._latencies)
+        return {
+            "rows": rows,
+            "rows_per_second": rows / elapsed,
+            "latency_p50": _percentile(latencies, 0.5),
+            "latency_p95": _percentile(latencies, 0.95),
+            "latency_p99": _percentile(latencies, 0.99),
+            "latency_max": latencies[-1] if latencies else 0.0,
+            "bytes_parsed": parsed,
+            "bytes_total": total,
+            "rejected": sum(self._rejected.values()),
+            "progress": min(done / total, 1.0) if total else 0.0,
+            "eta_seconds": (total - done) / rate if rate > 0 else None,
+            "elapsed_seconds": elapsed,
+        }
+
+
+def _percentile(values, fraction):
+    """已排序列表的最近秩分位数"""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
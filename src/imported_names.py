@@ -0,0 +1,201 @@
+"""
+已导入节点名称集合：在解析阶段跳过图谱中已有的节点，避免重复的 MERGE 查找
+"""
+import hashlib
+import logging
+import os
+import threading
+from array import array
+from bisect import bisect_left
+from itertools import chain
+
+logger = logging.getLogger("ImportedNames")
+
+# 每个名称存为 8 字节摘要，百万级名称的碰撞概率可以忽略
+DIGEST_SIZE = 8
+
+# 名称集合文件所在目录，相对于导入状态目录（Neo4jHandler 的 state_dir，默认为工作目录）
+IMPORTED_NAMES_DIR = "import_names"
+
+# 新增摘要缓冲区的最小合并阈值；缓冲区超过该值且超过有序数组长度的 1/8 时合并
+MIN_MERGE_SIZE = 4096
+
+
+def name_digest(name):
+    """计算名称的 64 位摘要"""
+    digest = hashlib.blake2b(str(name).encode("utf-8"), digest_size=DIGEST_SIZE).digest()
+    return int.from_bytes(digest, "little")
+
+
+def reset_names_dir(names_dir=IMPORTED_NAMES_DIR):
+    """
+    删除目录中的名称集合和内容哈希文件（数据库被清空后调用）
+
+    Args:
+        names_dir: 名称集合目录
+    """
+    if os.path.isdir(names_dir):
+        for file_name in os.listdir(names_dir):
+            if file_name.endswith((".bin", ".jsonl")):
+                os.remove(os.path.join(names_dir, file_name))
+
+
+class DigestSet:
+    """
+    紧凑的 64 位摘要集合
+
+    摘要保存在有序的 array('Q') 中（每个 8 字节），二分查找判断是否存在；
+    新增的摘要先放入较小的缓冲集合，缓冲区增长到有序数组的一定比例后合并，合并的总开销与元素数成正比。
+    """
+
+    def __init__(self, digests=()):
+        self._sorted = array("Q", sorted(set(digests)))
+        self._recent = set()
+
+    def __len__(self):
+        return len(self._sorted) + len(self._recent)
+
+    def __contains__(self, digest):
+        if digest in self._recent:
+            return True
+        index = bisect_left(self._sorted, digest)
+        return index < len(self._sorted) and self._sorted[index] == digest
+
+    def add(self, digest):
+        """
+        加入摘要
+
+        Returns:
+            是否为新摘要
+        """
+        if digest in self:
+            return False
+        self._recent.add(digest)
+        if len(self._recent) >= max(MIN_MERGE_SIZE, len(self._sorted) // 8):
+            self._merge()
+        return True
+
+    def remove(self, digests):
+        """
+        删除摘要
+
+        Returns:
+            实际删除的数量
+        """
+        self._merge()
+        removed = set(digests)
+        kept = array("Q", (digest for digest in self._sorted if digest not in removed))
+        count = len(self._sorted) - len(kept)
+        self._sorted = kept
+        return count
+
+    def tofile(self, f):
+        """按升序写入全部摘要"""
+        self._merge()
+        self._sorted.tofile(f)
+
+    def clear(self):
+        self._sorted = array("Q")
+        self._recent.clear()
+
+    def _merge(self):
+        if self._recent:
+            self._sorted = array("Q", sorted(chain(self._sorted, self._recent)))
+            self._recent.clear()
+
+
+class ImportedNameSet:
+    """
+    持久化的已导入名称集合
+
+    只记录名称摘要，不存原文，内存中使用 DigestSet。与布隆过滤器不同，这里不会误判，
+    因此不会因为误判跳过图谱中实际不存在的节点。
+    新写入的摘要追加到文件末尾，加载时忽略末尾不完整的记录。
+    """
+
+    def __init__(self, path):
+        """
+        初始化名称集合
+
+        Args:
+            path: 持久化文件路径
+        """
+        self.path = path
+        self._digests = DigestSet()
+        self._pending = array("Q")
+        self._lock = threading.Lock()
+        self.load()
+
+    def __len__(self):
+        return len(self._digests)
+
+    def __contains__(self, digest):
+        return digest in self._digests
+
+    def load(self):
+        """从文件加载摘要"""
+        self._digests.clear()
+        self._pending = array("Q")
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            data = f.read()
+        usable = len(data) - len(data) % DIGEST_SIZE
+        if usable != len(data):
+            logger.warning(f"忽略名称集合文件末尾不完整的记录: {self.path}")
+        digests = array("Q")
+        digests.frombytes(data[:usable])
+        self._digests = DigestSet(digests)
+
+    def add(self, names):
+        """
+        记录已写入图谱的名称
+
+        Args:
+            names: 名称可迭代对象
+        """
+        with self._lock:
+            for name in names:
+                digest = name_digest(name)
+                if self._digests.add(digest):
+                    self._pending.append(digest)
+
+    def discard(self, names):
+        """
+        删除名称（节点被删除后调用），立即重写文件
+
+        Args:
+            names: 名称可迭代对象
+        """
+        with self._lock:
+            if not self._digests.remove(name_digest(name) for name in names):
+                return
+            self._pending = array("Q")
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "wb") as f:
+                self._digests.tofile(f)
+            os.replace(tmp_path, self.path)
+
+    def flush(self):
+        """把新增摘要追加到文件"""
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, array("Q")
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "ab") as f:
+                # 先补齐上次中断留下的不完整记录
+                tail = f.tell() % DIGEST_SIZE
+                if tail:
+                    f.truncate(f.tell() - tail)
+                    f.seek(0, os.SEEK_END)
+                pending.tofile(f)
+
+    def reset(self):
+        """清空集合并删除文件"""
+        with self._lock:
+            self._digests.clear()
+            self._pending = array("Q")
+            if os.path.exists(self.path):
+                os.remove(self.path)
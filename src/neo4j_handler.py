@@ -1,12 +1,101 @@
-from py2neo import Graph
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import hashlib
 import json
 import os
+import random
+import threading
+import time
+import zlib
+
+from src.import_journal import ImportJournal
+from src.import_pipeline import ImportPipeline
+from src.batch_sizer import AdaptiveBatchSizer, is_resource_error
+from src.schema_manager import SchemaManager
+from src.field_mapping import NodeMapping, RejectedRowWriter, relationship_mapping
+from src.imported_names import IMPORTED_NAMES_DIR, DigestSet, ImportedNameSet, name_digest, reset_names_dir
+from src.content_hashes import ContentHashStore, content_hash
+from src.node_id_cache import NodeIdCache
+from src.import_telemetry import ImportTelemetry
+from src.compressed_input import (
+    at_end, find_input, input_signature, input_size, is_compressed_input, locate_shard, open_input, progress_position
+)
+from src.columnar_staging import ColumnarInput, is_columnar, staged_input
+from src.database_cleaner import DEFAULT_CHUNK_SIZE, clear_graph
+from src.connection_registry import DEFAULT_FETCH_SIZE, get_registry
+from src import graph_writes
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("Neo4jHandler")
 
+# 字段映射时被拒绝的行写入的目录
+REJECTED_ROWS_DIR = os.path.join("logs", "rejected")
+
+# 计算文件指纹时采样的字节数
+FINGERPRINT_SAMPLE_SIZE = 4096
+
+# 可重试的事务错误标识（死锁、锁等待超时等瞬时错误）
+TRANSIENT_ERROR_MARKERS = ("Neo.TransientError", "DeadlockDetected", "TransientError", "LockClient")
+
+
+def _is_transient_error(error):
+    """判断异常是否为可重试的瞬时事务错误"""
+    text = f"{type(error).__name__} {getattr(error, 'code', '') or ''} {error}"
+    return any(marker in text for marker in TRANSIENT_ERROR_MARKERS)
+
+
+def _input_position(f, offset):
+    """用于统计进度的字节位置（列式暂存文件按行号折算，其余见 progress_position）"""
+    if isinstance(f, ColumnarInput):
+        return f.byte_position(offset)
+    return progress_position(f, offset)
+
+
+def _input_exhausted(f, offset):
+    """
+    输入是否已全部读取
+
+    不能用 _input_position 与 input_size 比较：压缩输入的前者是解压预读后的压缩字节数，
+    逐行定位后可能已经等于文件大小，而后面还有未导入的行。
+    """
+    if isinstance(f, ColumnarInput):
+        return offset >= f.num_rows
+    return at_end(f)
+
+
+class ImportInterrupted(Exception):
+    """导入被暂停或取消（已在批次边界保存检查点，可以从中断处续传）"""
+
+
+def resolve_data_paths(data_dir="data", columnar=True):
+    """
+    确定各数据文件路径，优先使用 .jsonl 文件
+    
+    也识别压缩文件（如 company.jsonl.gz）和分片目录（如 company/），见 src.compressed_input。
+    
+    Args:
+        data_dir: 数据目录
+        columnar: 是否优先使用 src.columnar_staging 生成的列式暂存文件（不比源文件旧时）
+        
+    Returns:
+        以 Neo4jHandler 属性名为键的路径字典
+    """
+    def find(name, extensions=(".jsonl", ".json")):
+        source = find_input(data_dir, name, extensions)
+        return (staged_input(source) or source) if columnar else source
+    
+    return {
+        "company_path": find("company"),
+        "industry_path": find("industry"),
+        "product_path": find("product"),
+        "company_industry_path": find("company_industry"),
+        "industry_industry": find("industry_industry", (".json",)),
+        "company_product_path": find("company_product"),
+        "product_product": find("product_product", (".json",))
+    }
+
+
 class Config:
     """配置类，用于管理Neo4j连接参数"""
     
@@ -34,12 +123,14 @@ class Config:
 class Neo4jHandler:
     """Neo4j处理器类，处理与Neo4j数据库的交互"""
     
-    def __init__(self, config=None):
+    def __init__(self, config=None, data_dir="data", state_dir="."):
         """
         初始化Neo4j处理器
         
         Args:
             config: Config对象或配置字典
+            data_dir: 数据文件目录（如 src.synthetic_data 生成的目录）
+            state_dir: 导入状态和已导入名称集合的存放目录
         """
         if config is None:
             # 尝试从配置文件加载
@@ -55,15 +146,37 @@ class Neo4jHandler:
         self.config = config
         self.g = None
         self.import_state = {}
+        self.journal = ImportJournal(os.path.join(state_dir, "import_state.json"))
+        # 多个标签并行导入时保护导入状态的修改和保存
+        self.state_lock = threading.RLock()
+        # 最近一次流水线导入的各阶段耗时，按导入状态键名记录
+        self.import_stats = {}
+        # 当前导入阶段的吞吐量和延迟遥测
+        self.telemetry = ImportTelemetry()
+        # 设置后导入在下一个批次边界停止，用于后台任务的暂停和取消
+        self.interrupt_event = threading.Event()
+        # 导入过程中记录的失败信息，导入方法捕获异常后返回 0，调用方据此判断是否失败
+        self.import_errors = []
+        # 各节点标签和关系类型已写入数据库的行数，没有实际写入时不发布写入事件
+        self.rows_written = {}
+        # 约束和索引是否已在本实例中创建
+        self._schema_ready = False
+        # 各标签已导入的节点名称集合和增量导入的内容哈希，按需加载
+        self._imported_names = {}
+        self._content_hashes = {}
+        self.names_dir = os.path.join(state_dir, IMPORTED_NAMES_DIR)
+        # 关系导入使用的 属性值 → 节点 ID 缓存，连接成功后创建
+        self.id_cache = None
         
         # 数据文件路径
-        self.company_path = "data/company.jsonl" if os.path.exists("data/company.jsonl") else "data/company.json"
-        self.industry_path = "data/industry.jsonl" if os.path.exists("data/industry.jsonl") else "data/industry.json"
-        self.product_path = "data/product.jsonl" if os.path.exists("data/product.jsonl") else "data/product.json"
-        self.company_industry_path = "data/company_industry.jsonl" if os.path.exists("data/company_industry.jsonl") else "data/company_industry.json"
-        self.industry_industry = "data/industry_industry.json"
-        self.company_product_path = "data/company_product.jsonl" if os.path.exists("data/company_product.jsonl") else "data/company_product.json"
-        self.product_product = "data/product_product.json"
+        paths = resolve_data_paths(data_dir)
+        self.company_path = paths["company_path"]
+        self.industry_path = paths["industry_path"]
+        self.product_path = paths["product_path"]
+        self.company_industry_path = paths["company_industry_path"]
+        self.industry_industry = paths["industry_industry"]
+        self.company_product_path = paths["company_product_path"]
+        self.product_product = paths["product_product"]
         
         # 尝试加载导入状态
         self.load_import_state()
@@ -74,10 +187,11 @@ class Neo4jHandler:
     def _connect(self):
         """连接到Neo4j数据库"""
         try:
-            self.g = Graph(
-                self.config.uri,
-                auth=(self.config.username, self.config.password)
+            # 与页面共用进程级连接池
+            self.g = get_registry().graph(
+                self.config.uri, self.config.username, self.config.password, caller="import"
             )
+            self.id_cache = NodeIdCache(self.g)
             logger.info(f"成功连接到Neo4j数据库: {self.config.uri}")
             return True
         except Exception as e:
@@ -107,6 +221,24 @@ class Neo4jHandler:
         except Exception as e:
             logger.error(f"执行查询失败: {e}")
             return []
+
+    def stream_query(self, query, fetch_size=DEFAULT_FETCH_SIZE, **params):
+        """
+        执行Cypher查询并逐条产出结果，内存中最多保留 fetch_size 行
+
+        Args:
+            query: Cypher查询字符串
+            fetch_size: 每批读取的行数
+            **params: 查询参数
+
+        Yields:
+            结果字典
+        """
+        if not self.g and not self._connect():
+            logger.error("数据库未连接，无法执行查询")
+            return
+        for batch in self.g.stream(query, params, fetch_size):
+            yield from batch
     
     def create_index(self, label, property_name):
         """
@@ -117,23 +249,64 @@ class Neo4jHandler:
             property_name: 属性名称
         """
         try:
-            query = f"CREATE INDEX ON :{label}({property_name})"
-            self.g.run(query)
-            logger.info(f"创建索引: {label}({property_name})")
-            return True
+            return SchemaManager(self.g).create_index(label, property_name)
         except Exception as e:
             logger.error(f"创建索引失败: {e}")
             return False
     
-    def clear_database(self):
-        """清空数据库中的所有节点和关系"""
+    def ensure_schema(self):
+        """
+        导入前创建 name 唯一约束以及 code/fullname 索引
+        
+        语句本身是幂等的，每个处理器实例只执行一次，避免每个文件都重复提交。
+        """
+        if self._schema_ready:
+            return True
+        try:
+            SchemaManager(self.g).apply()
+            self._schema_ready = True
+            return True
+        except Exception as e:
+            logger.error(f"创建约束和索引失败: {e}")
+            return False
+    
+    def verify_schema(self):
+        """
+        用 EXPLAIN 检查导入和查找的热点查询是否使用了索引
+        
+        Returns:
+            检查结果列表
+        """
+        try:
+            return SchemaManager(self.g).verify()
+        except Exception as e:
+            logger.error(f"检查执行计划失败: {e}")
+            return []
+    
+    def clear_database(self, chunk_size=DEFAULT_CHUNK_SIZE, progress=None, recreate=False):
+        """
+        分块清空数据库中的所有节点和关系（见 src.database_cleaner.clear_graph）
+        
+        Args:
+            chunk_size: 每个事务删除的关系或节点数
+            progress: 进度回调，参数为事件字典
+            recreate: 是否先尝试重建数据库（需要企业版和管理员权限）
+        """
         try:
-            self.g.run("MATCH (n) DETACH DELETE n")
+            result = clear_graph(self.g, chunk_size, progress, recreate, names_dir=self.names_dir)
+            if result["recreated"]:
+                # 重建数据库会删除约束和索引，下次导入前重新创建
+                self._schema_ready = False
             logger.info("已清空数据库")
             return True
         except Exception as e:
             logger.error(f"清空数据库失败: {e}")
             return False
+        finally:
+            # clear_graph 已删除名称集合文件，中途失败时也可能删除了部分节点
+            self.reset_imported_names()
+            if self.id_cache:
+                self.id_cache.clear()
     
     def get_node_count(self, label=None):
         """
@@ -179,122 +352,675 @@ class Neo4jHandler:
             logger.error(f"获取关系数量失败: {e}")
             return 0
     
-    def save_import_state(self):
-        """保存导入状态"""
+    def save_import_state(self, sync=False):
+        """
+        保存导入状态
+
+        只把变化的部分追加到导入日志，按组提交策略 fsync，日志过长时自动合并为快照。
+
+        Args:
+            sync: 是否立即将日志 fsync 到磁盘
+        """
         try:
-            with open("import_state.json", "w", encoding="utf-8") as f:
-                json.dump(self.import_state, f, ensure_ascii=False, indent=2)
-            logger.info("已保存导入状态")
+            with self.state_lock:
+                self.journal.commit(self.import_state, sync=sync)
+            logger.debug("已保存导入状态")
             return True
         except Exception as e:
             logger.error(f"保存导入状态失败: {e}")
             return False
     
     def load_import_state(self):
-        """加载导入状态"""
+        """加载导入状态（读取快照并重放导入日志）"""
         try:
-            if os.path.exists("import_state.json"):
-                with open("import_state.json", "r", encoding="utf-8") as f:
-                    self.import_state = json.load(f)
-                logger.info("已加载导入状态")
-                return True
-            else:
-                logger.info("导入状态文件不存在，使用空状态")
-                self.import_state = {}
-                return False
+            with self.state_lock:
+                if self.journal.exists():
+                    state = self.journal.load()
+                    self.import_state.clear()
+                    self.import_state.update(state)
+                    logger.info("已加载导入状态")
+                    return True
+                else:
+                    logger.info("导入状态文件不存在，使用空状态")
+                    self.import_state.clear()
+                    return False
         except Exception as e:
             logger.error(f"加载导入状态失败: {e}")
-            self.import_state = {}
+            with self.state_lock:
+                self.import_state.clear()
             return False
     
     def reset_import_state(self):
         """重置导入状态"""
-        self.import_state = {}
-        logger.info("已重置导入状态")
-        return self.save_import_state()
+        try:
+            with self.state_lock:
+                self.import_state.clear()
+                self.journal.reset()
+            self.reset_imported_names()
+            logger.info("已重置导入状态")
+            return True
+        except Exception as e:
+            logger.error(f"重置导入状态失败: {e}")
+            return False
+    
+    def imported_names(self, label):
+        """
+        获取标签的已导入节点名称集合
+
+        Args:
+            label: 节点标签
+        """
+        if label not in self._imported_names:
+            self._imported_names[label] = ImportedNameSet(
+                os.path.join(self.names_dir, f"{label}.bin")
+            )
+        return self._imported_names[label]
+    
+    def content_hashes(self, label):
+        """
+        获取标签的节点内容哈希表（增量导入使用）
+
+        Args:
+            label: 节点标签
+        """
+        if label not in self._content_hashes:
+            self._content_hashes[label] = ContentHashStore(
+                os.path.join(self.names_dir, f"{label}.hashes.jsonl")
+            )
+        return self._content_hashes[label]
+    
+    def _verify_imported_names(self, label):
+        """
+        核对名称集合和内容哈希是否仍与数据库一致
+
+        数据库被外部清空或删除过节点（Neo4j Browser、neo4j-admin、换了数据卷）时，
+        clear_graph 没有机会清空名称集合，继续使用会把图谱中已经不存在的节点当作已导入跳过。
+        数据库中该标签的节点数少于记录的名称数时，清空该标签的名称集合和内容哈希，重新导入。
+
+        Args:
+            label: 节点标签
+        """
+        names = self.imported_names(label)
+        hashes = self.content_hashes(label)
+        recorded = max(len(names), len(hashes))
+        if not recorded:
+            return
+        result = self.g.run(f"MATCH (n:{label}) RETURN count(n) AS count").data()
+        count = result[0]["count"] if result else 0
+        if count < recorded:
+            logger.warning(
+                f"数据库中 {label} 节点数 ({count}) 少于已导入名称数 ({recorded})，"
+                f"数据库可能已被外部清空，重置该标签的名称集合和内容哈希"
+            )
+            names.reset()
+            hashes.reset()
+    
+    def reset_imported_names(self):
+        """清空所有已导入节点名称集合和内容哈希（数据库被清空后必须调用）"""
+        self._imported_names.clear()
+        self._content_hashes.clear()
+        reset_names_dir(self.names_dir)
+    
+    def _dedup_nodes(self, names):
+        """
+        创建节点去重函数和写入函数包装
+        
+        同一名称只保留第一次出现的行（与 MERGE ... ON CREATE SET 一致），
+        已记录在名称集合中的节点直接跳过。名称只在批次写入成功后才加入集合，
+        本次已接受、尚未写入的名称摘要记录在紧凑的 DigestSet 中。
+        
+        Args:
+            names: 已导入名称集合
+            
+        Returns:
+            (过滤函数, 写入函数包装, 计数字典, 持久化函数)
+        """
+        seen = DigestSet()
+        counter = {"skipped": 0}
+        
+        def accept(row):
+            digest = name_digest(row["name"])
+            if digest in names or not seen.add(digest):
+                counter["skipped"] += 1
+                return False
+            return True
+        
+        def wrap(write_batch):
+            def write(batch):
+                write_batch(batch)
+                names.add(row["name"] for row in batch)
+            return write
+        
+        return accept, wrap, counter, names.flush
+    
+    def _delta_nodes(self, hashes, names):
+        """
+        创建增量导入的过滤函数和写入函数包装
+        
+        内容摘要与上次增量导入相同的行跳过，只写入新增或变化的行；
+        写入成功后更新内容摘要和名称集合。本次出现过的名称摘要记录在计数字典的 seen（DigestSet）中。
+        
+        Args:
+            hashes: 内容哈希表
+            names: 已导入名称集合
+            
+        Returns:
+            (过滤函数, 写入函数包装, 计数字典, 持久化函数)
+        """
+        seen = DigestSet()
+        counter = {"skipped": 0, "seen": seen}
+        
+        def accept(row):
+            name = row["name"]
+            first = seen.add(name_digest(name))
+            if not first or hashes.get(name) == content_hash(row):
+                counter["skipped"] += 1
+                return False
+            return True
+        
+        def wrap(write_batch):
+            def write(batch):
+                write_batch(batch)
+                hashes.update((row["name"], content_hash(row)) for row in batch)
+                names.add(row["name"] for row in batch)
+            return write
+        
+        def flush():
+            hashes.flush()
+            names.flush()
+        
+        return accept, wrap, counter, flush
+    
+    def _record_deduplicated(self, key, base, skipped):
+        """把本次导入去重跳过的行数累加到导入状态"""
+        if base or skipped:
+            self.import_state.setdefault("deduplicated", {})[key] = base + skipped
     
     def _count_file_lines(self, file_path):
-        """计算文件行数"""
+        """计算文件行数（压缩文件和分片目录按解压后的内容计算，列式暂存文件读取元数据）"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
+            if is_columnar(file_path):
+                with ColumnarInput(file_path) as f:
+                    return f.num_rows
+            with open_input(file_path) as f:
                 return sum(1 for _ in f)
         except Exception as e:
             logger.error(f"计算文件行数失败: {e}")
             return 0 
 
-    def create_graphnodes(self, batch_size=10000):
+    def _file_fingerprint(self, file_path, offset, shard=None):
         """
-        创建图谱节点
+        计算文件在指定偏移量之前内容的指纹
+
+        只采样文件头部和偏移量之前的一小段字节，文件被追加内容时指纹保持不变，
+        而已导入部分被修改时指纹会发生变化。压缩输入无法廉价地随机读取解压后的内容，
+        改为采样检查点所在分片及之前各分片的大小和头部（见 input_signature）；
+        列式暂存文件的偏移量是行号，采样整个文件的大小和头部。
+
+        Args:
+            file_path: 数据文件路径
+            offset: 已导入内容的字节偏移量
+            shard: 压缩输入的 (分片序号, 分片内偏移)
+
+        Returns:
+            指纹字符串
+        """
+        if shard is not None:
+            return f"{offset}:{shard[0]}:{shard[1]}:{input_signature(file_path, shard[0])}"
+        if is_columnar(file_path):
+            return f"{offset}:rows:{input_signature(file_path, 0)}"
+        digest = hashlib.sha1()
+        with open(file_path, 'rb') as f:
+            digest.update(f.read(min(offset, FINGERPRINT_SAMPLE_SIZE)))
+            tail_start = max(0, offset - FINGERPRINT_SAMPLE_SIZE)
+            f.seek(tail_start)
+            digest.update(f.read(offset - tail_start))
+        return f"{offset}:{digest.hexdigest()}"
+
+    def _get_checkpoint(self, key, file_path):
+        """
+        获取可用于续传的字节偏移检查点
+
+        Args:
+            key: 导入状态键名（节点标签或关系键名）
+            file_path: 数据文件路径
+
+        Returns:
+            (已导入行数, 字节偏移量, 压缩输入的分片位置, 已读取行数)，检查点不可用时返回 None
+        """
+        checkpoint = self.import_state.get("checkpoints", {}).get(key)
+        if not checkpoint:
+            return None
+
+        imported = self.import_state.get(key, 0)
+        offset = checkpoint.get("offset", 0)
+        shard = tuple(checkpoint["shard"]) if checkpoint.get("shard") else None
+        try:
+            compressed = is_compressed_input(file_path)
+            if (checkpoint.get("file") != file_path
+                    or checkpoint.get("imported") != imported
+                    or compressed != (shard is not None)
+                    or (not compressed and offset > os.path.getsize(file_path))
+                    or checkpoint.get("fingerprint") != self._file_fingerprint(file_path, offset, shard)):
+                logger.warning(f"{key}的导入检查点已失效，将按行数重新定位")
+                return None
+        except OSError as e:
+            logger.error(f"校验导入检查点失败: {e}")
+            return None
+        return imported, offset, shard, checkpoint.get("consumed", imported)
+
+    def _set_checkpoint(self, key, file_path, imported, offset, shard=None, consumed=None):
+        """
+        记录导入数量及对应的字节偏移检查点
+
+        Args:
+            key: 导入状态键名（节点标签或关系键名）
+            file_path: 数据文件路径
+            imported: 已导入行数（写入数据库的行，不含被拒绝、去重或未变化而跳过的行）
+            offset: 已导入内容的字节偏移量（压缩输入为解压后的偏移量）
+            shard: 压缩输入中该偏移量所在的 (分片序号, 分片内偏移)
+            consumed: 偏移量之前的数据行数（含跳过的行），检查点失效时按它逐行定位，默认等于 imported
+        """
+        consumed = imported if consumed is None else consumed
+        self.import_state[key] = imported
+        self.import_state.setdefault("consumed", {})[key] = consumed
+        checkpoint = {
+            "file": file_path,
+            "offset": offset,
+            "imported": imported,
+            "consumed": consumed,
+            "fingerprint": self._file_fingerprint(file_path, offset, shard)
+        }
+        if shard is not None:
+            checkpoint["shard"] = list(shard)
+        self.import_state.setdefault("checkpoints", {})[key] = checkpoint
+
+    def _open_at_checkpoint(self, key, file_path):
+        """
+        打开数据文件并定位到上次导入结束的位置
+
+        检查点有效时直接 seek 到保存的字节偏移量（压缩输入从检查点所在分片开始解压）；
+        否则退回到逐行跳过已读取的行（按已读取行数而不是已导入行数，被拒绝或跳过的行同样占一行）。
+        列式暂存文件的偏移量就是行号。
+
+        Args:
+            key: 导入状态键名（节点标签或关系键名）
+            file_path: 数据文件路径
+
+        Returns:
+            (二进制文件对象或 ColumnarInput, 已导入行数, 当前偏移量, 已读取行数)
+        """
+        checkpoint = self._get_checkpoint(key, file_path)
+        if is_columnar(file_path):
+            f = ColumnarInput(file_path)
+            if checkpoint:
+                imported, offset, _, consumed = checkpoint
+            else:
+                imported = self.import_state.get(key, 0)
+                offset = consumed = min(self.consumed_lines(key), f.num_rows)
+            return f, imported, offset, consumed
+        if checkpoint:
+            imported, offset, shard, consumed = checkpoint
+            return open_input(file_path, offset, shard), imported, offset, consumed
+
+        f = open_input(file_path)
+        imported = self.import_state.get(key, 0)
+        offset = consumed = 0
+        for _ in range(self.consumed_lines(key)):
+            line = f.readline()
+            if not line:
+                break
+            offset += len(line)
+            consumed += 1
+        return f, imported, offset, consumed
+
+    def consumed_lines(self, key):
+        """
+        数据文件中已读取的行数（含被拒绝、去重或未变化而跳过的行），用于续传定位和计算剩余行数
+
+        Args:
+            key: 导入状态键名（节点标签或关系键名）
+        """
+        consumed = self.import_state.get("consumed", {})
+        # 没有记录时（旧版本的导入状态）每个已读取的行都已导入
+        return consumed[key] if key in consumed else self.import_state.get(key, 0)
+
+    def _read_batches(self, f, offset, batch_size, sizer=None, transform=None, consumed=0):
+        """
+        从当前位置读取并解析数据行，按批次产出
+        
+        最后总会产出一个（可能为空的）批次，使检查点覆盖文件末尾无法解析的行。
+        列式暂存文件直接按列读出行字典，不再解析 JSON，偏移量以行计。
+        
+        Args:
+            f: 已定位的二进制文件对象或 ColumnarInput
+            offset: 当前偏移量
+            batch_size: 批次大小，或每个批次开始时调用以获取批次大小的函数
+            sizer: 自适应批次控制器，用于记录每批数据量
+            transform: 解析后对每行调用的映射函数，返回 None 表示丢弃该行
+            consumed: 当前偏移量之前已读取的行数
+            
+        Yields:
+            (批次数据列表, (批次最后一行结束处的字节偏移量, 到此为止已读取的行数))
+        """
+        def current_limit():
+            return batch_size() if callable(batch_size) else batch_size
+        
+        if isinstance(f, ColumnarInput):
+            records, unit_bytes = f.records(offset), f.row_bytes
+        else:
+            records, unit_bytes = self._json_records(f), 1
+        
+        self._check_interrupted()
+        batch = []
+        batch_start = offset
+        limit = current_limit()
+        for row, size in records:
+            offset += size
+            consumed += 1
+            if row is None:
+                continue
+            
+            if transform:
+                row = transform(row)
+                if row is None:
+                    continue
+            batch.append(row)
+            
+            if len(batch) >= limit:
+                if sizer:
+                    sizer.observe_payload(len(batch), (offset - batch_start) * unit_bytes)
+                yield batch, (offset, consumed)
+                self._check_interrupted()
+                batch = []
+                batch_start = offset
+                limit = current_limit()
+        yield batch, (offset, consumed)
+    
+    def _json_records(self, f):
+        """逐行解析 JSON，产出 (行字典, 行字节数)；无法解析的行产出 (None, 行字节数)"""
+        for raw_line in f:
+            line = raw_line.decode('utf-8', errors='replace')
+            try:
+                row = json.loads(line.strip())
+            except json.JSONDecodeError:
+                logger.error(f"JSON解析错误: {line}")
+                row = None
+            yield row, len(raw_line)
+    
+    def _import_failed(self, message):
+        """记录导入失败：写入日志并加入 import_errors"""
+        logger.error(message)
+        with self.state_lock:
+            self.import_errors.append(message)
+    
+    def _check_interrupted(self):
+        """收到暂停或取消请求时在批次边界抛出 ImportInterrupted"""
+        if self.interrupt_event.is_set():
+            raise ImportInterrupted("导入已中断")
+    
+    def _mapping_filter(self, key, mapping, accept=None):
+        """
+        创建解析阶段使用的字段映射函数
+        
+        无法导入的行（缺少名称、端点字段等）写入 logs/rejected/<key>.jsonl，不进入批次。
         
         Args:
+            key: 导入状态键名（节点标签或关系键名）
+            mapping: 编译后的字段映射
+            accept: 映射成功后调用的过滤函数，返回 False 表示跳过该行（如重复节点）
+            
+        Returns:
+            (映射函数, 被拒绝行的记录器)
+        """
+        rejected = RejectedRowWriter(os.path.join(REJECTED_ROWS_DIR, f"{key}.jsonl"))
+        
+        def transform(row):
+            mapped, reason = mapping.apply(row)
+            if reason:
+                rejected.write(row, reason)
+                return None
+            if accept and not accept(mapped):
+                return None
+            return mapped
+        
+        return transform, rejected
+    
+    def _record_rejected(self, key, base, count):
+        """把本次导入拒绝的行数累加到导入状态（与已导入行数分开记录）"""
+        if base or count:
+            self.import_state.setdefault("rejected", {})[key] = base + count
+    
+    def _import_file(self, key, data, batch_size, write_batch, pipelined=False, writers=1, adaptive=False, mapping=None, row_filter=None):
+        """
+        从检查点位置开始按批次导入数据文件
+        
+        Args:
+            key: 导入状态键名（节点标签或关系键名）
+            data: 数据文件路径
             batch_size: 批次大小
+            write_batch: 写入一个批次的函数
+            mapping: 解析阶段应用的字段映射
+            pipelined: 是否使用流水线导入
+            writers: 流水线写入线程数
+            adaptive: 是否自适应调整批次大小
+            row_filter: 解析阶段的行过滤（见 _dedup_nodes / _delta_nodes），跳过重复或无需写入的行
             
         Returns:
-            创建的节点数量
+            导入的行数
         """
+        # 定位到上次导入结束的位置
+        f, imported, offset, consumed = self._open_at_checkpoint(key, data)
+        logger.info(f"{key}已导入: {imported}，已读取 {consumed} 行")
+        
+        self.telemetry.begin_file(key, _input_position(f, offset), input_size(data))
+        if _input_exhausted(f, offset):
+            f.close()
+            logger.info(f"{key}已全部导入")
+            return 0
+        
+        write_batch = self.telemetry.timed(write_batch)
+        accept = dedup = None
+        if row_filter is not None:
+            accept, wrap, dedup, flush_filter = row_filter
+            write_batch = wrap(write_batch)
+        
+        sizer = None
+        if adaptive:
+            sizer = self._batch_sizer(key, batch_size)
+            write_batch = self._adaptive_writer(write_batch, sizer)
+        
+        transform, rejected = self._mapping_filter(key, mapping, accept) if mapping else (None, None)
+        rejected_base = self.import_state.get("rejected", {}).get(key, 0)
+        dedup_base = self.import_state.get("deduplicated", {}).get(key, 0)
+        progress = {"imported": imported}
+        
+        def commit(rows, position):
+            end_offset, end_consumed, rejected_count, skipped = position
+            progress["imported"] += rows
+            if dedup:
+                flush_filter()
+            with self.state_lock:
+                self._set_checkpoint(
+                    key, data, progress["imported"], end_offset, locate_shard(f, end_offset), end_consumed
+                )
+                if sizer:
+                    self.import_state.setdefault("batch_sizes", {})[key] = sizer.size
+                if rejected:
+                    self._record_rejected(key, rejected_base, rejected_count)
+                if dedup:
+                    self._record_deduplicated(key, dedup_base, skipped)
+                self.save_import_state()
+            self.telemetry.commit(key, rows, _input_position(f, end_offset), rejected_count)
+        
         try:
-            node_count = 0
+            batches = self._read_batches(
+                f, offset, (lambda: sizer.size) if sizer else batch_size, sizer, transform, consumed
+            )
+            # 在解析时记下每个批次边界处的拒绝和跳过行数，流水线预读但尚未提交的行不计入检查点
+            batches = (
+                (batch, (end_offset, end_consumed, rejected.total if rejected else 0, dedup["skipped"] if dedup else 0))
+                for batch, (end_offset, end_consumed) in batches
+            )
+            if pipelined:
+                pipeline = ImportPipeline(write_batch, writers=writers)
+                count = pipeline.run(batches, commit)
+                self.import_stats[key] = dict(pipeline.stats, bottleneck=pipeline.bottleneck())
+                logger.info(f"{key}流水线阶段耗时: {self.import_stats[key]}")
+                return count
             
-            # 导入公司节点
-            company_count = self.import_nodes("company", self.company_path, batch_size)
-            node_count += company_count
+            count = 0
+            for batch, position in batches:
+                if batch:
+                    write_batch(batch)
+                count += len(batch)
+                commit(len(batch), position)
+            return count
+        finally:
+            f.close()
+            if rejected:
+                rejected.close()
+            if dedup and dedup["skipped"]:
+                logger.info(f"{key}跳过重复、已导入或未变化的行: {dedup['skipped']}")
+    
+    def _batch_sizer(self, key, batch_size):
+        """
+        创建自适应批次控制器，初始值沿用上次导入记录的批次大小
+        
+        Args:
+            key: 导入状态键名（节点标签或关系键名）
+            batch_size: 未记录过批次大小时使用的初始值
+        """
+        initial = self.import_state.get("batch_sizes", {}).get(key, batch_size)
+        logger.info(f"{key}使用自适应批次大小，初始值: {initial}")
+        return AdaptiveBatchSizer(initial=initial, max_size=max(50000, batch_size))
+    
+    def _adaptive_writer(self, write_batch, sizer):
+        """
+        包装写入函数：记录事务耗时以调整批次大小，遇到超时或内存错误时拆成两半重试
+        
+        Args:
+            write_batch: 写入一个批次的函数
+            sizer: 自适应批次控制器
+        """
+        def write(batch):
+            started = time.time()
+            try:
+                write_batch(batch)
+            except Exception as e:
+                if len(batch) <= 1 or not is_resource_error(e):
+                    raise
+                sizer.shrink()
+                middle = len(batch) // 2
+                write(batch[:middle])
+                write(batch[middle:])
+                return
+            sizer.record(len(batch), time.time() - started)
+        return write
+    
+    def create_graphnodes(self, batch_size=10000, pipelined=False, adaptive=False, progress_callback=None, delta=False, delete_missing=False, concurrent=False):
+        """
+        创建图谱节点
+        
+        Args:
+            batch_size: 批次大小（自适应模式下为初始值）
+            pipelined: 是否使用流水线导入（解析与写入重叠执行）
+            adaptive: 是否根据事务耗时和数据量自适应调整批次大小
+            progress_callback: 每提交一个批次调用一次的回调，参数为遥测事件字典（见 ImportTelemetry）
+            delta: 增量导入，只写入新增或内容变化的节点，并更新已有节点的属性
+            delete_missing: 增量导入时删除数据文件中已不存在的节点
+            concurrent: 是否并行导入各标签（标签之间没有锁冲突，每个线程从连接池取用独立的连接）
             
-            # 导入行业节点
-            industry_count = self.import_nodes("industry", self.industry_path, batch_size)
-            node_count += industry_count
+        Returns:
+            创建的节点数量
+        """
+        try:
+            node_files = {
+                "company": self.company_path,
+                "industry": self.industry_path,
+                "product": self.product_path,
+            }
+            self.telemetry.start(progress_callback, files=node_files)
+            # 约束只需创建一次，避免并行导入时重复执行
+            self.ensure_schema()
+            
+            def import_label(label):
+                return self.import_nodes(
+                    label, node_files[label], batch_size=batch_size, pipelined=pipelined,
+                    adaptive=adaptive, delta=delta, delete_missing=delete_missing
+                )
             
-            # 导入产品节点
-            product_count = self.import_nodes("product", self.product_path, batch_size)
-            node_count += product_count
+            if concurrent:
+                # 各标签并行导入，进度通过共享的遥测汇总
+                with ThreadPoolExecutor(max_workers=len(node_files), thread_name_prefix="import-nodes") as executor:
+                    futures = [executor.submit(import_label, label) for label in node_files]
+                    node_count = sum(future.result() for future in futures)
+            else:
+                # 依次导入公司、行业、产品节点
+                node_count = sum(import_label(label) for label in node_files)
             
             # 保存导入状态
-            self.save_import_state()
+            self.save_import_state(sync=True)
             
             logger.info(f"总共导入 {node_count} 个节点")
             return node_count
+        except ImportInterrupted:
+            raise
         except Exception as e:
-            logger.error(f"创建图谱节点失败: {e}")
+            self._import_failed(f"创建图谱节点失败: {e}")
             return 0
     
-    def create_graphrels(self, batch_size=10000):
+    def create_graphrels(self, batch_size=10000, workers=1, pipelined=False, adaptive=False, progress_callback=None):
         """
         创建图谱关系
         
         Args:
-            batch_size: 批次大小
+            batch_size: 批次大小（自适应模式下为初始值）
+            workers: 并行写入线程数，大于1时按起始节点分区并行导入
+            pipelined: 是否使用流水线导入（解析与写入重叠执行）
+            adaptive: 是否根据事务耗时和数据量自适应调整批次大小
+            progress_callback: 每提交一个批次调用一次的回调，参数为遥测事件字典（见 ImportTelemetry）
             
         Returns:
             创建的关系数量
         """
         try:
             rel_count = 0
+            self.telemetry.start(progress_callback, files={
+                "company_industry": self.company_industry_path,
+                "industry_industry": self.industry_industry,
+                "company_product": self.company_product_path,
+                "product_product": self.product_product,
+            })
             
             # 导入公司-行业关系
-            ci_count = self.import_company_industry_rels(self.company_industry_path, batch_size)
+            ci_count = self.import_company_industry_rels(self.company_industry_path, batch_size, workers, pipelined, adaptive)
             rel_count += ci_count
             
             # 导入行业-行业关系
-            ii_count = self.import_industry_industry_rels(self.industry_industry, batch_size)
+            ii_count = self.import_industry_industry_rels(self.industry_industry, batch_size, workers, pipelined, adaptive)
             rel_count += ii_count
             
             # 导入公司-产品关系
-            cp_count = self.import_company_product_rels(self.company_product_path, batch_size)
+            cp_count = self.import_company_product_rels(self.company_product_path, batch_size, workers, pipelined, adaptive)
             rel_count += cp_count
             
             # 导入产品-产品关系
-            pp_count = self.import_product_product_rels(self.product_product, batch_size)
+            pp_count = self.import_product_product_rels(self.product_product, batch_size, workers, pipelined, adaptive)
             rel_count += pp_count
             
             # 保存导入状态
-            self.save_import_state()
+            self.save_import_state(sync=True)
             
             logger.info(f"总共导入 {rel_count} 条关系")
             return rel_count
+        except ImportInterrupted:
+            raise
         except Exception as e:
-            logger.error(f"创建图谱关系失败: {e}")
+            self._import_failed(f"创建图谱关系失败: {e}")
             return 0
     
-    def import_nodes(self, label, data, is_file=True, batch_size=10000):
+    def import_nodes(self, label, data, is_file=True, batch_size=10000, pipelined=False, writers=1, adaptive=False, dedup=True, delta=False, delete_missing=False):
         """
         导入节点
         
@@ -303,84 +1029,154 @@ class Neo4jHandler:
             data: 数据文件路径或数据列表
             is_file: 如果data是文件路径，则为True，否则为False
             batch_size: 批次大小
+            pipelined: 是否使用流水线导入（解析与写入重叠执行）
+            writers: 流水线写入线程数
+            adaptive: 是否自适应调整批次大小
+            dedup: 是否在客户端去重，并跳过名称集合中记录的已导入节点
+            delta: 增量导入，只写入内容与上次增量导入不同的行，已有节点的属性也会更新
+            delete_missing: 增量导入时删除上次导入过、但本次文件中不存在的节点
             
         Returns:
             导入的节点数量
         """
+        written = self._rows_written(("label", label))
         try:
-            if is_file:
+            self.ensure_schema()
+            names = None
+            if dedup or delta:
+                self._verify_imported_names(label)
+                names = self.imported_names(label)
+            if is_file and delta:
                 if not os.path.exists(data):
                     logger.warning(f"数据文件不存在: {data}")
                     return 0
-                
-                # 获取已导入数量
-                imported = self.import_state.get(label, 0)
-                logger.info(f"{label}节点已导入: {imported}")
-                
-                # 获取文件总行数
-                total_lines = self._count_file_lines(data)
-                if imported >= total_lines:
-                    logger.info(f"{label}节点已全部导入")
+                return self._import_nodes_delta(
+                    label, data, batch_size, pipelined, writers, adaptive, delete_missing
+                )
+            if is_file:
+                if not os.path.exists(data):
+                    logger.warning(f"数据文件不存在: {data}")
                     return 0
                 
-                # 读取JSON文件
-                with open(data, 'r', encoding='utf-8') as f:
-                    # 跳过已导入的行
-                    for _ in range(imported):
-                        next(f)
-                    
-                    # 批量导入
-                    count = 0
-                    batch = []
-                    
-                    for line in f:
-                        try:
-                            line_data = json.loads(line.strip())
-                            batch.append(line_data)
-                            count += 1
-                            
-                            if len(batch) >= batch_size:
-                                self._create_nodes_batch(label, batch)
-                                imported += len(batch)
-                                self.import_state[label] = imported
-                                batch = []
-                                
-                                # 保存导入状态
-                                self.save_import_state()
-                        except json.JSONDecodeError:
-                            logger.error(f"JSON解析错误: {line}")
-                            continue
-                        except Exception as e:
-                            logger.error(f"处理行时出错: {e}")
-                            continue
-                    
-                    # 处理剩余批次
-                    if batch:
-                        self._create_nodes_batch(label, batch)
-                        imported += len(batch)
-                        self.import_state[label] = imported
-                        
-                        # 保存导入状态
-                        self.save_import_state()
-                    
-                    logger.info(f"导入 {count} 个 {label} 节点")
-                    return count
+                count = self._import_file(
+                    label, data, batch_size,
+                    lambda batch: self._create_nodes_batch(label, batch),
+                    pipelined=pipelined, writers=writers, adaptive=adaptive,
+                    mapping=NodeMapping(), row_filter=self._dedup_nodes(names) if names is not None else None
+                )
+                logger.info(f"导入 {count} 个 {label} 节点")
+                return count
             else:
                 # 直接从数据列表导入
-                self._create_nodes_batch(label, data)
+                if names is not None:
+                    accept, wrap, _, _ = self._dedup_nodes(names)
+                    data = [row for row in data if row.get("name") and accept(row)]
+                    wrap(lambda batch: self._create_nodes_batch(label, batch))(data)
+                    names.flush()
+                else:
+                    self._create_nodes_batch(label, data)
                 logger.info(f"从列表导入 {len(data)} 个 {label} 节点")
                 return len(data)
+        except ImportInterrupted:
+            raise
         except Exception as e:
-            logger.error(f"导入{label}节点失败: {e}")
+            self._import_failed(f"导入{label}节点失败: {e}")
             return 0
+        finally:
+            # 中断或失败时已提交的批次同样需要让查询缓存失效
+            if self._rows_written(("label", label)) > written:
+                graph_writes.publish(labels=[label])
+    
+    def _import_nodes_delta(self, label, data, batch_size, pipelined, writers, adaptive, delete_missing):
+        """
+        增量导入节点文件
+        
+        每次都从头扫描整个文件（只有上次增量导入被中断时才从检查点续传），
+        按内容哈希跳过未变化的行。从检查点续传时前半部分出现过的名称已无法得知，不执行删除。
+        
+        Returns:
+            写入（新增或更新）的节点数量
+        """
+        hashes = self.content_hashes(label)
+        names = self.imported_names(label)
+        with self.state_lock:
+            pending = self.import_state.setdefault("delta_pending", {})
+            resumed = bool(pending.get(label)) and self._get_checkpoint(label, data) is not None
+            if not resumed:
+                self.import_state[label] = 0
+                self.import_state.get("consumed", {}).pop(label, None)
+                self.import_state.get("checkpoints", {}).pop(label, None)
+            pending[label] = True
+            self.save_import_state()
+        # 导入期间导入状态可能被重新加载，之后每次都从 import_state 重新取 delta_pending，不持有旧字典
+        
+        row_filter = self._delta_nodes(hashes, names)
+        count = self._import_file(
+            label, data, batch_size,
+            lambda batch: self._create_nodes_batch(label, batch, update=True),
+            pipelined=pipelined, writers=writers, adaptive=adaptive,
+            mapping=NodeMapping(), row_filter=row_filter
+        )
+        
+        deleted = 0
+        if delete_missing:
+            if resumed:
+                logger.warning(f"{label}增量导入从检查点续传，本次不删除缺失的节点")
+            else:
+                missing = [name for name in hashes.names() if name_digest(name) not in row_filter[2]["seen"]]
+                deleted = self._delete_nodes(label, missing, hashes, names)
+        
+        with self.state_lock:
+            self.import_state.setdefault("delta_pending", {}).pop(label, None)
+            self.import_state.setdefault("delta", {})[label] = {
+                "changed": count,
+                "unchanged": row_filter[2]["skipped"],
+                "deleted": deleted,
+            }
+            self.save_import_state(sync=True)
+        logger.info(f"{label}增量导入: 新增或更新 {count} 个，未变化 {row_filter[2]['skipped']} 个，删除 {deleted} 个")
+        return count
+    
+    def _delete_nodes(self, label, node_names, hashes, names, batch_size=10000):
+        """
+        删除节点及其关系，并从内容哈希、名称集合和节点 ID 缓存中移除
+        
+        Returns:
+            删除的节点数量
+        """
+        for i in range(0, len(node_names), batch_size):
+            batch = node_names[i:i + batch_size]
+            self._run_with_retry(
+                self.g.run,
+                f"UNWIND $names AS name MATCH (n:{label} {{name: name}}) DETACH DELETE n",
+                {"names": batch}
+            )
+            self._count_written(("label", label), len(batch))
+            hashes.remove(batch)
+            hashes.flush()
+            names.discard(batch)
+        if node_names and self.id_cache:
+            self.id_cache.clear()
+        return len(node_names)
+    
+    def _count_written(self, key, count):
+        """记录写入数据库的行数，key 为 ("label", 标签) 或 ("rel_type", 关系类型)"""
+        if count:
+            with self.state_lock:
+                self.rows_written[key] = self.rows_written.get(key, 0) + count
     
-    def _create_nodes_batch(self, label, nodes_data):
+    def _rows_written(self, key):
+        with self.state_lock:
+            return self.rows_written.get(key, 0)
+    
+    def _create_nodes_batch(self, label, nodes_data, update=False):
         """
         批量创建节点
         
         Args:
             label: 节点标签
             nodes_data: 节点数据列表
+            update: 节点已存在时是否用新数据覆盖同名属性（增量导入使用）
         """
         try:
             # 构建批量创建节点的Cypher查询
@@ -389,20 +1185,34 @@ class Neo4jHandler:
             MERGE (n:{label} {{name: node.name}})
             ON CREATE SET n += node
             """
+            if update:
+                query += "ON MATCH SET n += node\n"
             
-            # 执行查询
-            self.g.run(query, nodes=nodes_data)
+            # 已缓存该标签节点 ID 时顺便取回新节点的 ID
+            keys = self.id_cache.loaded_keys(label) if self.id_cache else []
+            if keys:
+                projection = ", ".join(f".{key}" for key in keys)
+                query += f"RETURN n {{{projection}, id: {self.id_cache.id_function}(n)}} AS node"
+                rows = [record["node"] for record in self.g.run(query, nodes=nodes_data)]
+                self.id_cache.update(label, rows)
+            else:
+                # 执行查询
+                self.g.run(query, nodes=nodes_data)
+            self._count_written(("label", label), len(nodes_data))
         except Exception as e:
             logger.error(f"批量创建{label}节点失败: {e}")
             raise
     
-    def import_company_industry_rels(self, file_path, batch_size=10000):
+    def import_company_industry_rels(self, file_path, batch_size=10000, workers=1, pipelined=False, adaptive=False):
         """
         导入公司-行业关系
         
         Args:
             file_path: 数据文件路径
             batch_size: 批次大小
+            workers: 并行写入线程数
+            pipelined: 是否使用流水线导入
+            adaptive: 是否自适应调整批次大小
             
         Returns:
             导入的关系数量
@@ -414,19 +1224,25 @@ class Neo4jHandler:
                 start_label="company", 
                 end_label="industry",
                 rel_type="属于",
-                batch_size=batch_size
+                batch_size=batch_size,
+                workers=workers,
+                pipelined=pipelined,
+                adaptive=adaptive
             )
         except Exception as e:
-            logger.error(f"导入公司-行业关系失败: {e}")
+            self._import_failed(f"导入公司-行业关系失败: {e}")
             return 0
     
-    def import_industry_industry_rels(self, file_path, batch_size=10000):
+    def import_industry_industry_rels(self, file_path, batch_size=10000, workers=1, pipelined=False, adaptive=False):
         """
         导入行业-行业关系
         
         Args:
             file_path: 数据文件路径
             batch_size: 批次大小
+            workers: 并行写入线程数
+            pipelined: 是否使用流水线导入
+            adaptive: 是否自适应调整批次大小
             
         Returns:
             导入的关系数量
@@ -438,19 +1254,25 @@ class Neo4jHandler:
                 start_label="industry", 
                 end_label="industry",
                 rel_type="上级行业",
-                batch_size=batch_size
+                batch_size=batch_size,
+                workers=workers,
+                pipelined=pipelined,
+                adaptive=adaptive
             )
         except Exception as e:
-            logger.error(f"导入行业-行业关系失败: {e}")
+            self._import_failed(f"导入行业-行业关系失败: {e}")
             return 0
     
-    def import_company_product_rels(self, file_path, batch_size=10000):
+    def import_company_product_rels(self, file_path, batch_size=10000, workers=1, pipelined=False, adaptive=False):
         """
         导入公司-产品关系
         
         Args:
             file_path: 数据文件路径
             batch_size: 批次大小
+            workers: 并行写入线程数
+            pipelined: 是否使用流水线导入
+            adaptive: 是否自适应调整批次大小
             
         Returns:
             导入的关系数量
@@ -462,19 +1284,25 @@ class Neo4jHandler:
                 start_label="company", 
                 end_label="product",
                 rel_type="拥有",
-                batch_size=batch_size
+                batch_size=batch_size,
+                workers=workers,
+                pipelined=pipelined,
+                adaptive=adaptive
             )
         except Exception as e:
-            logger.error(f"导入公司-产品关系失败: {e}")
+            self._import_failed(f"导入公司-产品关系失败: {e}")
             return 0
     
-    def import_product_product_rels(self, file_path, batch_size=10000):
+    def import_product_product_rels(self, file_path, batch_size=10000, workers=1, pipelined=False, adaptive=False):
         """
         导入产品-产品关系
         
         Args:
             file_path: 数据文件路径
             batch_size: 批次大小
+            workers: 并行写入线程数
+            pipelined: 是否使用流水线导入
+            adaptive: 是否自适应调整批次大小
             
         Returns:
             导入的关系数量
@@ -486,13 +1314,16 @@ class Neo4jHandler:
                 start_label="product", 
                 end_label="product",
                 rel_type="上游材料",
-                batch_size=batch_size
+                batch_size=batch_size,
+                workers=workers,
+                pipelined=pipelined,
+                adaptive=adaptive
             )
         except Exception as e:
-            logger.error(f"导入产品-产品关系失败: {e}")
+            self._import_failed(f"导入产品-产品关系失败: {e}")
             return 0
     
-    def _import_relationships(self, rel_key, data, start_label, end_label, rel_type, is_file=True, batch_size=10000):
+    def _import_relationships(self, rel_key, data, start_label, end_label, rel_type, is_file=True, batch_size=10000, workers=1, pipelined=False, adaptive=False):
         """
         导入关系通用方法
         
@@ -504,78 +1335,158 @@ class Neo4jHandler:
             rel_type: 关系类型
             is_file: 如果data是文件路径，则为True，否则为False
             batch_size: 批次大小
+            workers: 并行写入线程数，大于1时使用分区并行导入
+            pipelined: 是否使用流水线导入（解析与写入重叠执行）
+            adaptive: 是否自适应调整批次大小
             
         Returns:
             导入的关系数量
         """
+        written = self._rows_written(("rel_type", rel_type))
         try:
+            self.ensure_schema()
             if is_file:
                 if not os.path.exists(data):
                     logger.warning(f"数据文件不存在: {data}")
                     return 0
                 
-                # 获取已导入数量
-                imported = self.import_state.get(rel_key, 0)
-                logger.info(f"{rel_key}关系已导入: {imported}")
+                # 各来源文件的字段在解析阶段就映射为统一格式，无法导入的行不进入批次
+                mapping = relationship_mapping(rel_key)
                 
-                # 获取文件总行数
-                total_lines = self._count_file_lines(data)
-                if imported >= total_lines:
-                    logger.info(f"{rel_key}关系已全部导入")
-                    return 0
+                def write_batch(batch):
+                    self._run_with_retry(
+                        self._create_relationships_batch, batch, start_label, end_label, rel_type, True
+                    )
                 
-                # 读取JSON文件
-                with open(data, 'r', encoding='utf-8') as f:
-                    # 跳过已导入的行
-                    for _ in range(imported):
-                        next(f)
-                    
-                    # 批量导入
-                    count = 0
-                    batch = []
-                    
-                    for line in f:
-                        try:
-                            line_data = json.loads(line.strip())
-                            batch.append(line_data)
-                            count += 1
-                            
-                            if len(batch) >= batch_size:
-                                self._create_relationships_batch(batch, start_label, end_label, rel_type)
-                                imported += len(batch)
-                                self.import_state[rel_key] = imported
-                                batch = []
-                                
-                                # 保存导入状态
-                                self.save_import_state()
-                        except json.JSONDecodeError:
-                            logger.error(f"JSON解析错误: {line}")
-                            continue
-                        except Exception as e:
-                            logger.error(f"处理行时出错: {e}")
-                            continue
-                    
-                    # 处理剩余批次
-                    if batch:
-                        self._create_relationships_batch(batch, start_label, end_label, rel_type)
-                        imported += len(batch)
-                        self.import_state[rel_key] = imported
-                        
-                        # 保存导入状态
-                        self.save_import_state()
-                    
-                    logger.info(f"导入 {count} 条 {rel_key} 关系")
-                    return count
+                if workers > 1:
+                    return self._import_relationships_parallel(
+                        rel_key, data, batch_size, workers, write_batch, adaptive, mapping
+                    )
+                
+                count = self._import_file(
+                    rel_key, data, batch_size, write_batch,
+                    pipelined=pipelined, adaptive=adaptive, mapping=mapping
+                )
+                logger.info(f"导入 {count} 条 {rel_key} 关系")
+                return count
             else:
                 # 直接从数据列表导入
-                self._create_relationships_batch(data, start_label, end_label, rel_type)
-                logger.info(f"从列表导入 {len(data)} 条 {rel_key} 关系")
-                return len(data)
+                mapping = relationship_mapping(rel_key)
+                rels = [mapped for mapped, _ in map(mapping.apply, data) if mapped]
+                if len(rels) < len(data):
+                    logger.warning(f"{rel_key}有 {len(data) - len(rels)} 条关系缺少端点字段，已跳过")
+                self._create_relationships_batch(rels, start_label, end_label, rel_type, prepared=True)
+                logger.info(f"从列表导入 {len(rels)} 条 {rel_key} 关系")
+                return len(rels)
+        except ImportInterrupted:
+            raise
         except Exception as e:
-            logger.error(f"导入{rel_key}关系失败: {e}")
+            self._import_failed(f"导入{rel_key}关系失败: {e}")
             return 0
+        finally:
+            if self._rows_written(("rel_type", rel_type)) > written:
+                graph_writes.publish(rel_types=[rel_type])
     
-    def _create_relationships_batch(self, rels_data, start_label, end_label, rel_type):
+    def _import_relationships_parallel(self, rel_key, data, batch_size, workers, write_batch, adaptive=False, mapping=None):
+        """
+        分区并行导入关系
+        
+        每轮读取 batch_size * workers 行，按起始节点名称的哈希分到 workers 个分区，
+        每个分区在独立事务中由一个线程写入，同一轮内的并发事务不会锁定相同的起始节点。
+        一轮全部完成后才记录检查点，保证续传位置正确。
+        
+        Args:
+            rel_key: 关系键名，用于导入状态记录
+            data: 数据文件路径
+            batch_size: 每个分区的批次大小
+            workers: 并行写入线程数
+            write_batch: 写入一个分区批次的函数
+            adaptive: 是否自适应调整批次大小
+            mapping: 解析阶段应用的字段映射
+            
+        Returns:
+            导入的关系数量
+        """
+        f, imported, offset, consumed = self._open_at_checkpoint(rel_key, data)
+        logger.info(f"{rel_key}关系已导入: {imported}，已读取 {consumed} 行，并行线程数: {workers}")
+        
+        self.telemetry.begin_file(rel_key, _input_position(f, offset), input_size(data))
+        if _input_exhausted(f, offset):
+            f.close()
+            logger.info(f"{rel_key}已全部导入")
+            return 0
+        
+        write_batch = self.telemetry.timed(write_batch)
+        sizer = None
+        round_size = batch_size * workers
+        if adaptive:
+            sizer = self._batch_sizer(rel_key, batch_size)
+            write_batch = self._adaptive_writer(write_batch, sizer)
+            round_size = lambda: sizer.size * workers
+        
+        transform, rejected = self._mapping_filter(rel_key, mapping) if mapping else (None, None)
+        rejected_base = self.import_state.get("rejected", {}).get(rel_key, 0)
+        
+        count = 0
+        try:
+            with f, ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"import-{rel_key}") as executor:
+                for rows, (offset, consumed) in self._read_batches(f, offset, round_size, sizer, transform, consumed):
+                    partitions = [[] for _ in range(workers)]
+                    for row in rows:
+                        partitions[self._partition_of(row, workers)].append(row)
+                    self._run_partitions(executor, partitions, write_batch)
+                    imported += len(rows)
+                    count += len(rows)
+                    with self.state_lock:
+                        self._set_checkpoint(rel_key, data, imported, offset, locate_shard(f, offset), consumed)
+                        if sizer:
+                            self.import_state.setdefault("batch_sizes", {})[rel_key] = sizer.size
+                        if rejected:
+                            self._record_rejected(rel_key, rejected_base, rejected.total)
+                        self.save_import_state()
+                    self.telemetry.commit(
+                        rel_key, len(rows), _input_position(f, offset), rejected.total if rejected else 0
+                    )
+        finally:
+            if rejected:
+                rejected.close()
+        
+        logger.info(f"导入 {count} 条 {rel_key} 关系")
+        return count
+    
+    def _partition_of(self, rel, partitions):
+        """按起始节点名称的哈希计算关系所属分区"""
+        start = str(rel.get("start", ""))
+        return zlib.crc32(start.encode('utf-8')) % partitions
+    
+    def _run_partitions(self, executor, partitions, write_batch):
+        """并发写入各分区的批次，等待全部完成"""
+        futures = [executor.submit(write_batch, partition) for partition in partitions if partition]
+        for future in futures:
+            future.result()
+    
+    def _run_with_retry(self, func, *args, max_retries=5, base_delay=0.2):
+        """
+        执行写入操作，遇到死锁等瞬时错误时按指数退避重试
+        
+        Args:
+            func: 写入函数
+            *args: 写入函数参数
+            max_retries: 最大重试次数
+            base_delay: 首次重试等待秒数
+        """
+        for attempt in range(max_retries + 1):
+            try:
+                return func(*args)
+            except Exception as e:
+                # 超时和内存不足不是锁冲突，原样重试无济于事，交给调用方缩小批次
+                if attempt >= max_retries or not _is_transient_error(e) or is_resource_error(e):
+                    raise
+                delay = base_delay * (2 ** attempt) * (0.5 + random.random())
+                logger.warning(f"事务冲突，{delay:.2f}秒后第{attempt + 1}次重试: {e}")
+                time.sleep(delay)
+    
+    def _create_relationships_batch(self, rels_data, start_label, end_label, rel_type, prepared=False):
         """
         批量创建关系
         
@@ -584,40 +1495,103 @@ class Neo4jHandler:
             start_label: 起始节点标签
             end_label: 结束节点标签
             rel_type: 关系类型
+            prepared: 数据是否已经过字段映射（见 src/field_mapping.py），
+                否则按 start_name/end_name 字段映射
         """
         try:
-            # 构建批量创建关系的Cypher查询
-            query = f"""
-            UNWIND $rels AS rel
-            MATCH (start:{start_label} {{name: rel.start_name}})
-            MATCH (end:{end_label} {{name: rel.end_name}})
-            MERGE (start)-[r:{rel_type}]->(end)
-            ON CREATE SET r += rel.properties
-            """
+            if not prepared:
+                mapping = relationship_mapping(None)
+                rels_data = [mapped for mapped, _ in map(mapping.apply, rels_data) if mapped]
+            
+            count = len(rels_data)
+            # 先用节点 ID 缓存定位端点，按 ID 直接取节点，不再逐行做索引查找
+            if self.id_cache:
+                rels_data = self._create_relationships_by_id(rels_data, start_label, end_label, rel_type)
             
-            # 准备关系数据
-            formatted_rels = []
+            # 端点可能按名称或代码匹配，按匹配方式分组，每组一条查询
+            groups = {}
             for rel in rels_data:
-                start_name = rel.get("start_name", "")
-                end_name = rel.get("end_name", "")
-                
-                # 跳过缺少起始或结束节点名称的关系
-                if not start_name or not end_name:
-                    continue
-                
-                # 提取关系属性
-                properties = {k: v for k, v in rel.items() 
-                             if k not in ["start_name", "end_name"]}
+                groups.setdefault((rel["start_key"], rel["end_key"]), []).append(rel)
+            
+            for (start_key, end_key), rels in groups.items():
+                # 构建批量创建关系的Cypher查询
+                query = f"""
+                UNWIND $rels AS rel
+                MATCH (start:{start_label} {{{start_key}: rel.start}})
+                MATCH (end:{end_label} {{{end_key}: rel.end}})
+                MERGE (start)-[r:{rel_type}]->(end)
+                ON CREATE SET r += rel.properties
+                """
                 
-                formatted_rels.append({
-                    "start_name": start_name,
-                    "end_name": end_name,
-                    "properties": properties
-                })
-            
-            # 执行查询
-            if formatted_rels:
-                self.g.run(query, rels=formatted_rels)
+                # 执行查询
+                self.g.run(query, rels=rels)
+            self._count_written(("rel_type", rel_type), count)
         except Exception as e:
             logger.error(f"批量创建关系失败: {e}")
-            raise 
\ No newline at end of file
+            raise
+    
+    def _create_relationships_by_id(self, rels_data, start_label, end_label, rel_type):
+        """
+        按缓存的节点 ID 批量创建关系
+        
+        Args:
+            rels_data: 已映射的关系数据列表
+            start_label: 起始节点标签
+            end_label: 结束节点标签
+            rel_type: 关系类型
+            
+        Returns:
+            缓存中找不到端点的关系，交给按属性匹配的查询处理
+        """
+        resolved = {}
+        unresolved = []
+        maps = {}
+        for rel in rels_data:
+            keys = (rel["start_key"], rel["end_key"])
+            if keys not in maps:
+                maps[keys] = (self.id_cache.lookup(start_label, keys[0]), self.id_cache.lookup(end_label, keys[1]))
+            start_ids, end_ids = maps[keys]
+            start_id = start_ids.get(rel["start"]) if start_ids is not None else None
+            end_id = end_ids.get(rel["end"]) if end_ids is not None else None
+            if start_id is None or end_id is None:
+                unresolved.append(rel)
+            else:
+                resolved.setdefault(keys, []).append(rel)
+        
+        # 数据库在本进程之外被清空后，缓存的 ID 可能已被新节点复用，
+        # 按 ID 取到节点后再核对标签和匹配属性，核对失败的关系退回按属性匹配
+        id_function = self.id_cache.id_function
+        stale = False
+        for (start_key, end_key), rels in resolved.items():
+            start_ids, end_ids = maps[(start_key, end_key)]
+            rows = [
+                {
+                    "index": index,
+                    "start_id": start_ids[rel["start"]],
+                    "end_id": end_ids[rel["end"]],
+                    "start": rel["start"],
+                    "end": rel["end"],
+                    "properties": rel["properties"],
+                }
+                for index, rel in enumerate(rels)
+            ]
+            query = f"""
+            UNWIND $rels AS rel
+            MATCH (start) WHERE {id_function}(start) = rel.start_id
+                AND start:{start_label} AND start.{start_key} = rel.start
+            MATCH (end) WHERE {id_function}(end) = rel.end_id
+                AND end:{end_label} AND end.{end_key} = rel.end
+            MERGE (start)-[r:{rel_type}]->(end)
+            ON CREATE SET r += rel.properties
+            RETURN rel.index AS index
+            """
+            matched = {record["index"] for record in self.g.run(query, rels=rows).data()}
+            if len(matched) < len(rels):
+                stale = True
+                unresolved.extend(rel for index, rel in enumerate(rels) if index not in matched)
+        
+        if stale:
+            logger.warning(f"{start_label}/{end_label} 的节点 ID 缓存与数据库不一致，已清空这两个标签的缓存")
+            self.id_cache.invalidate(start_label)
+            self.id_cache.invalidate(end_label)
+        return unresolved
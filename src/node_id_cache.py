@@ -0,0 +1,116 @@
+"""
+节点 ID 缓存：关系导入前按标签一次性取回 属性值 → 节点 ID 的映射，关系批次直接按 ID 定位端点
+"""
+import logging
+import threading
+
+logger = logging.getLogger("NodeIdCache")
+
+
+class NodeIdCache:
+    """
+    按 (标签, 匹配属性) 缓存节点 ID
+
+    - 第一次查询某个 (标签, 属性) 时整体加载，之后只在进程内查找
+    - 标签节点数超过 max_entries 时不缓存该标签，调用方退回按索引匹配
+    - 数据库被清空后应调用 clear()；外部清空时调用方按 ID 取到节点后还要核对匹配属性，
+      因为旧 ID 可能已被新节点复用，核对失败时用 invalidate() 丢弃该标签的缓存
+    """
+
+    def __init__(self, graph, max_entries=2000000):
+        """
+        初始化缓存
+
+        Args:
+            graph: py2neo Graph 对象
+            max_entries: 单个标签最多缓存的节点数
+        """
+        self.g = graph
+        self.max_entries = max_entries
+        self._maps = {}
+        self._lock = threading.Lock()
+        self._id_function = None
+
+    @property
+    def id_function(self):
+        """节点 ID 函数：Neo4j 5 使用 elementId，旧版本使用 id"""
+        if self._id_function is None:
+            try:
+                self.g.run("RETURN elementId(null) AS id").data()
+                self._id_function = "elementId"
+            except Exception:
+                self._id_function = "id"
+        return self._id_function
+
+    def lookup(self, label, key):
+        """
+        获取 (标签, 属性) 的 属性值 → 节点 ID 映射，首次调用时从数据库加载
+
+        Args:
+            label: 节点标签
+            key: 匹配属性
+
+        Returns:
+            映射字典；节点过多不缓存时返回 None
+        """
+        with self._lock:
+            if (label, key) not in self._maps:
+                self._maps[(label, key)] = self._load(label, key)
+            return self._maps[(label, key)]
+
+    def loaded_keys(self, label):
+        """已加载且可用的匹配属性列表"""
+        with self._lock:
+            return [key for (lbl, key), ids in self._maps.items() if lbl == label and ids is not None]
+
+    def update(self, label, rows):
+        """
+        记录新建节点的 ID
+
+        Args:
+            label: 节点标签
+            rows: 包含 id 和各匹配属性值的字典列表
+        """
+        with self._lock:
+            for (lbl, key), ids in self._maps.items():
+                if lbl != label or ids is None:
+                    continue
+                for row in rows:
+                    value = row.get(key)
+                    if value is not None:
+                        ids.setdefault(value, row["id"])
+
+    def invalidate(self, label):
+        """
+        丢弃标签的全部缓存，下次查询时重新加载
+
+        Args:
+            label: 节点标签
+        """
+        with self._lock:
+            for key in [key for key in self._maps if key[0] == label]:
+                del self._maps[key]
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._maps.clear()
+
+    def _load(self, label, key):
+        count = self.g.run(
+            f"MATCH (n:{label}) WHERE n.{key} IS NOT NULL RETURN count(n) AS count"
+        ).data()[0]["count"]
+        if count > self.max_entries:
+            logger.info(f"{label}.{key} 有 {count} 个节点，超过缓存上限，按索引匹配")
+            return None
+
+        ids = {}
+        cursor = self.g.run(
+            f"MATCH (n:{label}) WHERE n.{key} IS NOT NULL "
+            f"RETURN n.{key} AS value, {self.id_function}(n) AS id"
+        )
+        for record in cursor:
+            # 有唯一约束时每个值只对应一个节点；没有约束时保留第一个
+            ids.setdefault(record["value"], record["id"])
+        logger.info(f"已缓存 {len(ids)} 个 {label}.{key} 节点 ID")
+        return ids
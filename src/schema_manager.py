@@ -0,0 +1,203 @@
+"""
+图谱模式管理：在导入前创建唯一约束和索引，并用 EXPLAIN 检查热点查询是否用上了索引
+"""
+import logging
+
+logger = logging.getLogger("SchemaManager")
+
+# 唯一约束：(标签, 属性)。MERGE/MATCH 都按 name 查找节点，唯一约束同时提供索引
+UNIQUE_CONSTRAINTS = [
+    ("company", "name"),
+    ("industry", "name"),
+    ("product", "name"),
+]
+
+# 普通索引：(标签, 属性)
+INDEXES = [
+    ("company", "code"),
+    ("company", "fullname"),
+    ("industry", "code"),
+]
+
+# 需要检查执行计划的热点查询：(说明, 查询, 参数)
+HOT_QUERIES = [
+    ("导入公司节点", "UNWIND $nodes AS node MERGE (n:company {name: node.name}) ON CREATE SET n += node",
+     {"nodes": [{"name": ""}]}),
+    ("导入行业节点", "UNWIND $nodes AS node MERGE (n:industry {name: node.name}) ON CREATE SET n += node",
+     {"nodes": [{"name": ""}]}),
+    ("导入产品节点", "UNWIND $nodes AS node MERGE (n:product {name: node.name}) ON CREATE SET n += node",
+     {"nodes": [{"name": ""}]}),
+    ("导入公司-产品关系",
+     "UNWIND $rels AS rel MATCH (start:company {name: rel.start}) "
+     "MATCH (end:product {name: rel.end}) MERGE (start)-[r:拥有]->(end)",
+     {"rels": [{"start": "", "end": ""}]}),
+    ("导入行业-行业关系（按代码）",
+     "UNWIND $rels AS rel MATCH (start:industry {code: rel.start}) "
+     "MATCH (end:industry {code: rel.end}) MERGE (start)-[r:上级行业]->(end)",
+     {"rels": [{"start": "", "end": ""}]}),
+    ("按名称查找公司", "MATCH (n:company {name: $name}) RETURN n", {"name": ""}),
+    ("按名称查找行业", "MATCH (n:industry {name: $name}) RETURN n", {"name": ""}),
+    ("按名称查找产品", "MATCH (n:product {name: $name}) RETURN n", {"name": ""}),
+    ("按代码查找公司", "MATCH (n:company {code: $code}) RETURN n", {"code": ""}),
+]
+
+# 执行计划中表示使用了索引的算子
+INDEX_OPERATORS = ("NodeUniqueIndexSeek", "NodeIndexSeek", "MultiNodeIndexSeek", "NodeIndexContainsScan")
+# 执行计划中表示全量扫描的算子
+SCAN_OPERATORS = ("NodeByLabelScan", "AllNodesScan")
+
+
+class SchemaManager:
+    """图谱模式管理器"""
+
+    def __init__(self, graph):
+        """
+        初始化模式管理器
+
+        Args:
+            graph: py2neo Graph 对象
+        """
+        self.g = graph
+
+    def apply(self, wait_seconds=300):
+        """
+        幂等地创建全部约束和索引，并等待索引上线
+
+        Args:
+            wait_seconds: 等待索引上线的最长秒数
+
+        Returns:
+            成功创建（或已存在）的约束和索引数量
+        """
+        applied = 0
+        for label, prop in UNIQUE_CONSTRAINTS:
+            if self.create_unique_constraint(label, prop):
+                applied += 1
+        for label, prop in INDEXES:
+            if self.create_index(label, prop):
+                applied += 1
+
+        try:
+            self.g.run(f"CALL db.awaitIndexes({int(wait_seconds)})")
+        except Exception as e:
+            logger.warning(f"等待索引上线失败: {e}")
+
+        logger.info(f"已应用 {applied}/{len(UNIQUE_CONSTRAINTS) + len(INDEXES)} 个约束和索引")
+        return applied
+
+    def create_unique_constraint(self, label, prop):
+        """
+        创建唯一约束（已存在时不做任何事）
+
+        已有数据存在重复值导致无法创建时，退而创建普通索引以保证查找性能。
+
+        Args:
+            label: 节点标签
+            prop: 属性名称
+        """
+        name = f"{label}_{prop}_unique"
+        statements = [
+            # Neo4j 4.4+ / 5.x
+            f"CREATE CONSTRAINT {name} IF NOT EXISTS FOR (n:{label}) REQUIRE n.{prop} IS UNIQUE",
+            # Neo4j 4.0 - 4.3
+            f"CREATE CONSTRAINT {name} IF NOT EXISTS ON (n:{label}) ASSERT n.{prop} IS UNIQUE",
+        ]
+        if self._run_first_supported(statements):
+            logger.info(f"唯一约束已就绪: {label}({prop})")
+            return True
+
+        logger.warning(f"无法创建唯一约束 {label}({prop})，改为创建普通索引")
+        return self.create_index(label, prop)
+
+    def create_index(self, label, prop):
+        """
+        创建普通索引（已存在时不做任何事）
+
+        Args:
+            label: 节点标签
+            prop: 属性名称
+        """
+        name = f"{label}_{prop}_index"
+        statements = [
+            # Neo4j 4.x / 5.x
+            f"CREATE INDEX {name} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})",
+        ]
+        if self._run_first_supported(statements):
+            logger.info(f"索引已就绪: {label}({prop})")
+            return True
+        logger.error(f"创建索引失败: {label}({prop})")
+        return False
+
+    def drop(self):
+        """
+        删除本模块创建的全部约束和索引（用于对比有无索引时的导入性能）
+
+        Returns:
+            执行成功的删除语句数量
+        """
+        names = [f"{label}_{prop}_unique" for label, prop in UNIQUE_CONSTRAINTS]
+        # 唯一约束创建失败时会退而创建同名属性的普通索引
+        names += [f"{label}_{prop}_index" for label, prop in UNIQUE_CONSTRAINTS + INDEXES]
+        dropped = 0
+        for name in names:
+            kind = "CONSTRAINT" if name.endswith("_unique") else "INDEX"
+            if self._run_first_supported([f"DROP {kind} {name} IF EXISTS"]):
+                dropped += 1
+        logger.info(f"已删除约束和索引（执行 {dropped}/{len(names)} 条语句）")
+        return dropped
+
+    def verify(self):
+        """
+        用 EXPLAIN 检查热点查询是否使用索引
+
+        Returns:
+            每个查询的检查结果列表，包含说明、使用的算子和是否走索引
+        """
+        results = []
+        for description, query, params in HOT_QUERIES:
+            try:
+                plan = self.g.run(f"EXPLAIN {query}", **params).plan()
+                operators = _plan_operators(plan)
+            except Exception as e:
+                logger.error(f"获取执行计划失败 [{description}]: {e}")
+                results.append({"query": description, "operators": [], "uses_index": False, "error": str(e)})
+                continue
+
+            uses_index = any(op.startswith(INDEX_OPERATORS) for op in operators)
+            scans = [op for op in operators if op.startswith(SCAN_OPERATORS)]
+            if not uses_index or scans:
+                logger.warning(f"查询未完全使用索引 [{description}]: {operators}")
+            results.append({
+                "query": description,
+                "operators": operators,
+                "uses_index": uses_index and not scans,
+            })
+        return results
+
+    def _run_first_supported(self, statements):
+        """依次尝试各版本语法，成功执行任意一条即返回 True"""
+        for statement in statements:
+            try:
+                self.g.run(statement)
+                return True
+            except Exception as e:
+                logger.debug(f"模式语句执行失败: {statement}: {e}")
+        return False
+
+
+def _plan_operators(plan):
+    """展开执行计划树，返回所有算子名称（去掉 @neo4j 之类的运行时后缀）"""
+    operators = []
+    stack = [plan] if plan is not None else []
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            operator = node.get("operatorType") or node.get("operator_type", "")
+            children = node.get("children", [])
+        else:
+            operator = getattr(node, "operator_type", "")
+            children = getattr(node, "children", [])
+        if operator:
+            operators.append(operator.split("@")[0])
+        stack.extend(children or [])
+    return operators
@@ -0,0 +1,331 @@
+"""
+合成数据生成：按 data/ 下的文件格式流式生成大规模公司、行业、产品及关系数据，用于导入和查询压测
+
+用法:
+    python -m src.synthetic_data --scale 1000000 --output data/synthetic --seed 42 --processes 8
+
+生成的目录可直接作为 Neo4jHandler(data_dir=...) 或 BulkExporter 的数据目录。
+相同的 scale、seed 和 chunk-size 生成完全相同的文件，与进程数无关。
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import shutil
+import time
+from multiprocessing import Pool
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("SyntheticData")
+
+# 实体数量占总规模的比例，其余为产品
+COMPANY_RATIO = 0.2
+INDUSTRY_RATIO = 0.001
+MIN_INDUSTRIES = 30
+
+# 幂律参数：度数服从 Pareto 分布（alpha 越小尾部越重），
+# 被连接的目标按 int(n * random() ** skew) 选取（skew 越大越集中在少数热门节点上）
+COMPANY_INDUSTRY_DEGREE = (2.5, 3)
+PRODUCT_UPSTREAM_DEGREE = (1.8, 50)
+INDUSTRY_UP_DEGREE = (1.2, 40)
+INDUSTRY_UP_WEIGHT = (1.5, 10)
+TARGET_SKEW = 2.5
+
+INDUSTRY_CATEGORIES = [
+    "电子信息", "新能源", "医疗健康", "金融服务", "消费品", "工业制造",
+    "农业科技", "教育培训", "文化娱乐", "交通物流", "建筑地产", "环保能源",
+    "化工材料", "食品饮料", "服装纺织", "旅游酒店", "互联网服务", "软件开发",
+    "人工智能", "云计算", "大数据", "区块链", "物联网", "生物技术"
+]
+
+PRODUCT_CATEGORIES = [
+    "原材料", "半成品", "组件", "终端产品", "软件", "服务", "解决方案",
+    "智能设备", "网络设备", "计算设备", "存储设备", "显示设备", "输入设备",
+    "家电", "汽车零部件", "医疗器械", "工业设备", "农业设备", "办公设备",
+    "消费电子", "通信设备", "安防设备", "能源设备", "环保设备"
+]
+
+CITIES = [
+    "北京", "上海", "深圳", "广州", "杭州", "南京", "成都", "重庆", "武汉",
+    "西安", "苏州", "天津", "郑州", "长沙", "青岛", "宁波", "厦门", "福州",
+    "大连", "沈阳", "济南", "合肥", "昆明", "贵阳", "南宁", "哈尔滨", "长春"
+]
+
+COMPANY_WORDS = ["华", "中", "信", "科", "达", "通", "瑞", "泰", "恒", "新", "联", "创", "兴", "盛", "博", "安"]
+
+EXCHANGES = ["上海证券交易所", "深圳证券交易所", "北京证券交易所"]
+
+# 生成的文件：(文件名, 任务类型, 按哪类实体逐个生成)。与 resolve_data_paths 的文件名一致
+OUTPUT_FILES = [
+    ("company.jsonl", "company", "company"),
+    ("industry.jsonl", "industry", "industry"),
+    ("product.jsonl", "product", "product"),
+    ("company_industry.jsonl", "company_industry", "company"),
+    ("industry_industry.json", "industry_industry", "industry"),
+    ("company_product.jsonl", "company_product", "product"),
+    ("product_product.json", "product_product", "product"),
+    ("industry_up.json", "industry_up", "leaf"),
+]
+
+
+def company_name(index):
+    """第 index 个公司的名称（任何进程都能由序号直接算出）"""
+    word = COMPANY_WORDS[index % len(COMPANY_WORDS)] + COMPANY_WORDS[(index // len(COMPANY_WORDS)) % len(COMPANY_WORDS)]
+    return f"{CITIES[index % len(CITIES)]}{word}{index}"
+
+
+def product_name(index):
+    """第 index 个产品的名称"""
+    return f"{PRODUCT_CATEGORIES[index % len(PRODUCT_CATEGORIES)]}{index}"
+
+
+def build_industries(count):
+    """
+    生成三级行业树，代码格式与 industry_industry.json 一致（一级 110000、二级 110100、三级 110101）
+
+    Args:
+        count: 目标行业数量（实际数量为不小于它的完整三级树）
+
+    Returns:
+        [(名称, 代码, 上级代码或 None)] 列表，叶子行业排在最后
+    """
+    branching = min(99, max(2, math.ceil(count ** (1 / 3))))
+    levels = ([], [], [])
+    for i in range(branching):
+        category = INDUSTRY_CATEGORIES[i % len(INDUSTRY_CATEGORIES)]
+        top = f"{11 + i:02d}0000"
+        levels[0].append((f"{category}{top}", top, None))
+        for j in range(1, branching + 1):
+            middle = f"{11 + i:02d}{j:02d}00"
+            levels[1].append((f"{category}{middle}", middle, top))
+            for k in range(1, branching + 1):
+                leaf = f"{11 + i:02d}{j:02d}{k:02d}"
+                levels[2].append((f"{category}{leaf}", leaf, middle))
+    return levels[0] + levels[1] + levels[2]
+
+
+def plan(scale):
+    """
+    按总规模计算各类实体数量
+
+    Returns:
+        包含各类实体数量（company/industry/product/leaf）、行业列表、叶子行业列表和行业代码索引的字典
+    """
+    industries = build_industries(max(MIN_INDUSTRIES, int(scale * INDUSTRY_RATIO)))
+    leaves = [item for item in industries if not item[1].endswith("00")]
+    companies = max(1, int(scale * COMPANY_RATIO))
+    products = max(1, scale - companies - len(industries))
+    return {
+        "company": companies,
+        "industry": len(industries),
+        "product": products,
+        "leaf": len(leaves),
+        "industries": industries,
+        "leaves": leaves,
+        "industry_names": {code: name for name, code, _ in industries},
+    }
+
+
+def _degree(rng, shape):
+    """Pareto 分布的度数，范围 [1, 上限]"""
+    alpha, limit = shape
+    return min(limit, int(rng.paretovariate(alpha)))
+
+
+def _pick(rng, count):
+    """按幂律热度选取目标序号，小序号的节点被选中的概率更高"""
+    return min(count - 1, int(count * rng.random() ** TARGET_SKEW))
+
+
+def _line(row):
+    return json.dumps(row, ensure_ascii=False) + "\n"
+
+
+_PLAN = None
+
+
+def _init_worker(worker_plan):
+    global _PLAN
+    _PLAN = worker_plan
+
+
+def _generate_chunk(task):
+    """
+    生成一个分块文件
+
+    Args:
+        task: (任务类型, 起始序号, 结束序号, 分块编号, 输出路径, 随机种子)
+
+    Returns:
+        (输出路径, 行数)
+    """
+    kind, start, end, chunk, path, seed = task
+    # 种子只由全局种子、任务类型和分块编号决定，与进程数和调度顺序无关
+    rng = random.Random(f"{seed}:{kind}:{chunk}")
+    industries = _PLAN["industries"]
+    leaves = _PLAN["leaves"]
+    companies = _PLAN["company"]
+    products = _PLAN["product"]
+    rows = 0
+
+    with open(path, "w", encoding="utf-8") as f:
+        for index in range(start, end):
+            if kind == "company":
+                year = 1990 + rng.randrange(35)
+                f.write(_line({
+                    "name": company_name(index),
+                    "fullname": f"{company_name(index)}科技股份有限公司",
+                    "code": f"{index:06d}",
+                    "location": EXCHANGES[rng.randrange(len(EXCHANGES))],
+                    "time": f"{year}-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}",
+                }))
+                rows += 1
+            elif kind == "product":
+                category = PRODUCT_CATEGORIES[index % len(PRODUCT_CATEGORIES)]
+                f.write(_line({
+                    "name": product_name(index),
+                    "type": category,
+                    "description": f"{category}类产品，型号 {rng.randrange(100, 1000)}",
+                }))
+                rows += 1
+            elif kind == "company_industry":
+                chosen = {_pick(rng, len(leaves)) for _ in range(_degree(rng, COMPANY_INDUSTRY_DEGREE))}
+                for leaf in sorted(chosen):
+                    f.write(_line({
+                        "company_name": company_name(index),
+                        "industry_name": leaves[leaf][0],
+                        "relation_type": "所属行业",
+                    }))
+                    rows += 1
+            elif kind == "company_product":
+                f.write(_line({
+                    "company_name": company_name(_pick(rng, companies)),
+                    "product_name": product_name(index),
+                    "relation_type": "主营产品",
+                }))
+                rows += 1
+            elif kind == "product_product":
+                # 度数减一，允许没有上游材料的产品
+                chosen = {_pick(rng, products) for _ in range(_degree(rng, PRODUCT_UPSTREAM_DEGREE) - 1)}
+                chosen.discard(index)
+                for upstream in sorted(chosen):
+                    f.write(_line({
+                        "start_name": product_name(index),
+                        "end_name": product_name(upstream),
+                        "rel": "上游材料",
+                    }))
+                    rows += 1
+            elif kind == "industry_industry":
+                name, code, parent = industries[index]
+                if parent is None:
+                    continue
+                f.write(_line({
+                    "from_code": code,
+                    "from_industry": name,
+                    "rel": "上级行业",
+                    "to_industry": _PLAN["industry_names"][parent],
+                    "to_code": parent,
+                }))
+                rows += 1
+            elif kind == "industry_up":
+                name = leaves[index][0]
+                ups = {}
+                for _ in range(_degree(rng, INDUSTRY_UP_DEGREE) - 1):
+                    upstream = leaves[_pick(rng, len(leaves))][0]
+                    if upstream != name:
+                        ups[upstream] = ups.get(upstream, 0) + _degree(rng, INDUSTRY_UP_WEIGHT)
+                # 与原始数据一样按权重从高到低排列
+                f.write(_line({"industry": name, "ups": dict(sorted(ups.items(), key=lambda item: -item[1]))}))
+                rows += 1
+            elif kind == "industry":
+                name, code, _ = industries[index]
+                f.write(_line({
+                    "name": name,
+                    "code": code,
+                    "description": f"{name[:-6]}相关行业（{code}）",
+                }))
+                rows += 1
+    return path, rows
+
+
+class SyntheticGraphGenerator:
+    """多进程合成数据生成器"""
+
+    def __init__(self, output_dir="data/synthetic", scale=1000000, seed=42, processes=None, chunk_size=200000):
+        """
+        初始化生成器
+
+        Args:
+            output_dir: 输出目录
+            scale: 实体总数（公司 + 行业 + 产品）
+            seed: 随机种子
+            processes: 进程数，默认使用全部 CPU
+            chunk_size: 每个分块的实体数，决定并行粒度（改变它会改变生成结果）
+        """
+        self.output_dir = output_dir
+        self.scale = scale
+        self.seed = seed
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.plan = plan(scale)
+        self.stats = {}
+
+    def generate(self):
+        """
+        生成全部文件
+
+        Returns:
+            各文件的行数
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        parts_dir = os.path.join(self.output_dir, "parts")
+        os.makedirs(parts_dir, exist_ok=True)
+        started = time.time()
+
+        tasks = []
+        for file_name, kind, entity in OUTPUT_FILES:
+            total = self.plan[entity]
+            for chunk, chunk_start in enumerate(range(0, total, self.chunk_size)):
+                chunk_end = min(total, chunk_start + self.chunk_size)
+                part = os.path.join(parts_dir, f"{file_name}.{chunk:05d}")
+                tasks.append((kind, chunk_start, chunk_end, chunk, part, self.seed))
+
+        logger.info(
+            f"生成 {self.plan['company']} 个公司、{self.plan['industry']} 个行业、"
+            f"{self.plan['product']} 个产品，共 {len(tasks)} 个分块，{self.processes} 个进程"
+        )
+        with Pool(self.processes, initializer=_init_worker, initargs=(self.plan,)) as pool:
+            results = dict(pool.imap_unordered(_generate_chunk, tasks))
+
+        # 按分块顺序拼接，保证输出与调度顺序无关
+        for file_name, kind, _ in OUTPUT_FILES:
+            parts = [task[4] for task in tasks if task[0] == kind]
+            target = os.path.join(self.output_dir, file_name)
+            with open(target, "wb") as out:
+                for part in parts:
+                    with open(part, "rb") as f:
+                        shutil.copyfileobj(f, out, 1024 * 1024)
+                    os.remove(part)
+            self.stats[file_name] = sum(results[part] for part in parts)
+        os.rmdir(parts_dir)
+
+        logger.info(f"生成完成，耗时 {time.time() - started:.1f} 秒: {self.stats}")
+        return self.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成用于压测的合成知识图谱数据")
+    parser.add_argument("--scale", type=int, default=1000000, help="实体总数（公司 + 行业 + 产品）")
+    parser.add_argument("--output", default="data/synthetic", help="输出目录")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--processes", type=int, default=None, help="进程数，默认使用全部 CPU")
+    parser.add_argument("--chunk-size", type=int, default=200000, help="每个分块的实体数")
+    args = parser.parse_args()
+
+    SyntheticGraphGenerator(args.output, args.scale, args.seed, args.processes, args.chunk_size).generate()
+
+
+if __name__ == "__main__":
+    main()
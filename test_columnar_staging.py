@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# coding: utf-8
+# File: test_columnar_staging.py
+# 测试列式暂存：整数与浮点数混杂的列读回后数值和类型不变
+
+import json
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from src.columnar_staging import ColumnarInput, stage_file
+
+
+def test_mixed_numeric_columns(tmp_path):
+    rows = [
+        {"name": "甲", "count": 1, "ratio": 1, "price": 1.5, "code": 2 ** 60 + 1},
+        {"name": "乙", "count": 2.0, "ratio": 2.5, "price": 2.0, "code": 3},
+    ]
+    source = tmp_path / "company.jsonl"
+    source.write_text("\n".join(json.dumps(row) for row in rows), encoding="utf-8")
+    output = str(tmp_path / "company.parquet")
+    stage_file(str(source), output)
+
+    with ColumnarInput(output) as staged:
+        result = list(staged.rows())
+    # 全部是整数值的列存为 int64；整数和带小数的浮点数混杂的列按 JSON 原样还原
+    assert result == [
+        {"name": "甲", "count": 1, "ratio": 1, "price": 1.5, "code": 2 ** 60 + 1},
+        {"name": "乙", "count": 2, "ratio": 2.5, "price": 2.0, "code": 3},
+    ]
+    assert all(type(row["count"]) is int and type(row["code"]) is int for row in result)
+    assert type(result[0]["ratio"]) is int
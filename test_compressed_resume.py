@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# coding: utf-8
+# File: test_compressed_resume.py
+# 测试压缩输入续传：没有可用的检查点（旧版本导入状态、追加 gzip 成员使检查点失效）时，按行定位后继续导入剩余的行
+
+import gzip
+import json
+
+from src.neo4j_handler import Neo4jHandler
+from test_delta_import import FakeGraph
+
+
+def gzip_rows(rows):
+    return gzip.compress("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows).encode("utf-8"))
+
+
+def make_handler(tmp_path):
+    (tmp_path / "state").mkdir()
+    handler = Neo4jHandler({}, data_dir=str(tmp_path / "data"), state_dir=str(tmp_path / "state"))
+    handler.g = FakeGraph()
+    handler.id_cache = None
+    return handler
+
+
+def test_gzip_resume_without_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    path = tmp_path / "data" / "company.jsonl.gz"
+    path.write_bytes(gzip_rows([{"name": f"公司{i}"} for i in range(10)]))
+    handler = make_handler(tmp_path)
+
+    # 旧版本的导入状态只有已导入行数，没有检查点
+    handler.import_state["company"] = 5
+    assert handler.import_nodes("company", str(path), batch_size=3, dedup=False) == 5
+    assert handler.g.merged == [f"公司{i}" for i in range(5, 10)]
+
+    # 再次导入时已全部导入
+    handler.g.merged = []
+    assert handler.import_nodes("company", str(path), batch_size=3, dedup=False) == 0
+    assert handler.g.merged == []
+
+
+def test_gzip_appended_member(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    path = tmp_path / "data" / "company.jsonl.gz"
+    path.write_bytes(gzip_rows([{"name": f"公司{i}"} for i in range(10)]))
+    handler = make_handler(tmp_path)
+    assert handler.import_nodes("company", str(path), batch_size=4, dedup=False) == 10
+
+    # 追加一个 gzip 成员：文件大小变化使检查点失效，按已读取行数定位后导入新行
+    with open(path, "ab") as f:
+        f.write(gzip_rows([{"name": "公司10"}]))
+    handler.g.merged = []
+    assert handler.import_nodes("company", str(path), batch_size=4, dedup=False) == 1
+    assert handler.g.merged == ["公司10"]
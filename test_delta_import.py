@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# coding: utf-8
+# File: test_delta_import.py
+# 测试增量导入：重新加载导入状态后再次增量导入，变化的行和删除仍然生效
+
+import json
+
+from src import graph_writes
+from src.neo4j_handler import Neo4jHandler
+
+
+class FakeCursor(list):
+    """py2neo 查询结果的替身"""
+
+    def data(self):
+        return list(self)
+
+
+class FakeGraph:
+    """记录写入语句的假图数据库，不需要运行中的 Neo4j"""
+
+    def __init__(self):
+        self.merged = []
+        self.deleted = []
+        # 图谱中现存的节点名称
+        self.nodes = set()
+        # 每次写入节点时调用，用于模拟导入期间导入状态被重新加载
+        self.on_merge = None
+
+    def run(self, query, parameters=None, **kwargs):
+        params = dict(parameters or {}, **kwargs)
+        if "MERGE" in query and "nodes" in params:
+            self.merged.extend(node["name"] for node in params["nodes"])
+            self.nodes.update(node["name"] for node in params["nodes"])
+            if self.on_merge:
+                self.on_merge()
+        elif "DETACH DELETE" in query:
+            self.deleted.extend(params["names"])
+            self.nodes.difference_update(params["names"])
+        elif "count(n)" in query:
+            return FakeCursor([{"count": len(self.nodes)}])
+        return FakeCursor()
+
+
+def write_rows(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+def make_handler(tmp_path):
+    (tmp_path / "state").mkdir()
+    handler = Neo4jHandler({}, data_dir=str(tmp_path / "data"), state_dir=str(tmp_path / "state"))
+    handler.g = FakeGraph()
+    handler.id_cache = None
+    return handler
+
+
+def delta_import(handler, path, batch_size=2):
+    handler.g.merged, handler.g.deleted = [], []
+    return handler.import_nodes("company", path, batch_size=batch_size, delta=True, delete_missing=True)
+
+
+def test_delta_import_after_reload(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    path = str(tmp_path / "data" / "company.jsonl")
+    handler = make_handler(tmp_path)
+
+    write_rows(path, [{"name": "甲", "code": "1"}, {"name": "乙", "code": "2"}, {"name": "丙", "code": "3"}])
+    assert delta_import(handler, path) == 3
+
+    # 页面轮询时重新加载导入状态，之后的增量导入仍然从头扫描
+    handler.load_import_state()
+    write_rows(path, [{"name": "甲", "code": "1"}, {"name": "乙", "code": "20"}, {"name": "丁", "code": "4"}])
+    assert delta_import(handler, path) == 2
+    assert sorted(handler.g.merged) == ["丁", "乙"]
+    assert handler.g.deleted == ["丙"]
+    assert handler.import_state["delta"]["company"] == {"changed": 2, "unchanged": 1, "deleted": 1}
+
+
+def test_delta_import_state_reloaded_mid_run(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    path = str(tmp_path / "data" / "company.jsonl")
+    handler = make_handler(tmp_path)
+
+    write_rows(path, [{"name": "甲", "code": "1"}, {"name": "乙", "code": "2"}, {"name": "丙", "code": "3"}])
+    assert delta_import(handler, path) == 3
+
+    # 导入过程中导入状态被重新加载（import_state 和其中的 delta_pending 都被替换）
+    write_rows(path, [{"name": "甲", "code": "10"}, {"name": "乙", "code": "20"}, {"name": "丙", "code": "30"}])
+    handler.g.on_merge = handler.load_import_state
+    assert delta_import(handler, path) == 3
+    handler.g.on_merge = None
+    assert "company" not in handler.import_state.get("delta_pending", {})
+
+    # 下一次增量导入不会误判为续传：变化的行照常写入，缺失的节点照常删除
+    handler.load_import_state()
+    write_rows(path, [{"name": "甲", "code": "100"}, {"name": "乙", "code": "20"}])
+    assert delta_import(handler, path) == 1
+    assert handler.g.merged == ["甲"]
+    assert handler.g.deleted == ["丙"]
+    assert handler.import_state["delta"]["company"] == {"changed": 1, "unchanged": 1, "deleted": 1}
+
+
+def test_write_event_only_when_rows_written(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    path = str(tmp_path / "data" / "company.jsonl")
+    handler = make_handler(tmp_path)
+    events = []
+    listener = lambda labels, rel_types: events.append(labels)
+    graph_writes.subscribe(listener)
+    try:
+        write_rows(path, [{"name": "甲", "code": "1"}, {"name": "乙", "code": "2"}])
+        assert delta_import(handler, path) == 2
+        assert events == [{"company"}]
+
+        # 内容未变化和文件不存在时没有写入，不发布写入事件（否则会让查询缓存和内嵌图无谓地失效）
+        assert delta_import(handler, path) == 0
+        assert handler.import_nodes("company", str(tmp_path / "data" / "missing.jsonl")) == 0
+        assert events == [{"company"}]
+    finally:
+        graph_writes.unsubscribe(listener)
+
+
+def test_names_reset_after_external_wipe(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    path = str(tmp_path / "data" / "company.jsonl")
+    handler = make_handler(tmp_path)
+
+    write_rows(path, [{"name": "甲"}, {"name": "乙"}, {"name": "丙"}])
+    assert handler.import_nodes("company", path, batch_size=2) == 3
+    handler.import_state.clear()
+    assert handler.import_nodes("company", path, batch_size=2) == 0
+
+    # 数据库在 clear_graph 之外被清空，名称集合不能再用来跳过节点
+    handler.g = FakeGraph()
+    handler.import_state.clear()
+    assert handler.import_nodes("company", path, batch_size=2) == 3
+    assert sorted(handler.g.merged) == ["丙", "乙", "甲"]
+
+    # 增量导入同样重新写入全部行
+    handler.g = FakeGraph()
+    assert delta_import(handler, path) == 3
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# coding: utf-8
+# File: test_embedded_graph.py
+# 测试内嵌图后端：Cypher 子集的解析和执行（使用仓库中实际的查询）、编号宽度以及写入后的回退
+
+import json
+import os
+import sqlite3
+import time
+
+import pytest
+
+from src import graph_writes
+from utils.analytics import SECTION_NAMES, Analytics
+from utils.cypher_subset import execute, is_write, write_targets
+from utils.embedded_graph import SCHEMA, EmbeddedBackend, EmbeddedGraph, build_embedded_graph
+from utils.graph_backend import UnsupportedQuery
+from utils.search_engine import SearchEngine
+
+
+def write_rows(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+@pytest.fixture
+def graph_path(tmp_path, monkeypatch):
+    # 写入事件文件（logs/graph_writes.jsonl）也落在临时目录
+    monkeypatch.chdir(tmp_path)
+    data = tmp_path / "data"
+    data.mkdir()
+    write_rows(data / "company.jsonl", [
+        {"name": "华为", "description": "通信设备制造商"},
+        {"name": "中兴", "description": "通信设备"},
+    ])
+    write_rows(data / "industry.jsonl", [{"name": "通信设备"}, {"name": "消费电子"}])
+    write_rows(data / "product.jsonl", [{"name": "手机"}, {"name": "基站"}, {"name": "芯片"}])
+    write_rows(data / "company_industry.jsonl", [
+        {"company_name": "华为", "industry_name": "通信设备"},
+        {"company_name": "华为", "industry_name": "消费电子"},
+        {"company_name": "中兴", "industry_name": "通信设备"},
+    ])
+    write_rows(data / "company_product.jsonl", [
+        {"company_name": "华为", "product_name": "手机"},
+        {"company_name": "华为", "product_name": "基站"},
+        {"company_name": "中兴", "product_name": "基站"},
+    ])
+    write_rows(data / "product_product.json", [
+        {"start_name": "芯片", "end_name": "手机"},
+        {"start_name": "芯片", "end_name": "基站"},
+    ])
+    path = str(tmp_path / "embedded.sqlite")
+    build_embedded_graph(str(data), path)
+    return path
+
+
+@pytest.fixture
+def graph(graph_path):
+    graph = EmbeddedGraph(graph_path)
+    yield graph
+    graph.close()
+
+
+class EmbeddedDB:
+    """只用内嵌图执行查询的连接器替身，记录内嵌图不支持的查询"""
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.unsupported = []
+
+    def query(self, cypher, params=None, ttl=None):
+        try:
+            return execute(cypher, params, self.graph)
+        except UnsupportedQuery as e:
+            self.unsupported.append((cypher, str(e)))
+            return []
+
+    def query_many(self, queries, timeout=None):
+        return {name: self.query(*spec) for name, spec in queries.items()}
+
+
+def test_pattern_size_slice_and_distinct(graph):
+    rows = execute("""
+        MATCH (n:company)
+        RETURN n.name as name, size((n)--()) as degree, size((n)-[:拥有]->(:product)) as products
+        ORDER BY name
+    """, None, graph)
+    assert rows == [
+        {"name": "中兴", "degree": 2, "products": 1},
+        {"name": "华为", "degree": 4, "products": 2},
+    ]
+
+    rows = execute("""
+        MATCH (c:company)-[:拥有]->(p:product)
+        WITH p, collect(c.name) as companies
+        ORDER BY p.name
+        RETURN collect(p.name)[0..1] as first, collect(p.name)[-1..] as last,
+               count(DISTINCT p) as products, size(collect(DISTINCT p)) as products_again
+    """, None, graph)
+    assert rows == [{"first": ["基站"], "last": ["手机"], "products": 2, "products_again": 2}]
+
+
+def test_entity_detail_queries(graph):
+    # components/entity_detail.py 中的关系列表和关系统计查询
+    query = """
+        MATCH (n:product {name: $name})-[r]-(related)
+        RETURN type(r) as relationship_type,
+               related.name as related_name,
+               labels(related)[0] as related_type,
+               r as relationship,
+               related as related_entity,
+               CASE WHEN startNode(r) = n THEN 'outgoing' ELSE 'incoming' END as direction
+        ORDER BY relationship_type, related_name
+    """
+    rows = execute(query, {"name": "基站"}, graph)
+    assert [(row["relationship_type"], row["related_name"], row["direction"]) for row in rows] == [
+        ("上游材料", "芯片", "incoming"),
+        ("拥有", "中兴", "incoming"),
+        ("拥有", "华为", "incoming"),
+    ]
+    rows = execute(query, {"name": "芯片"}, graph)
+    assert {row["direction"] for row in rows} == {"outgoing"}
+
+    rows = execute("""
+        MATCH (n:company {name: $name})
+        OPTIONAL MATCH (n)-[r]-()
+        RETURN count(r) as total_relationships,
+               count(DISTINCT type(r)) as relationship_types
+    """, {"name": "华为"}, graph)
+    assert rows == [{"total_relationships": 4, "relationship_types": 2}]
+
+
+def test_export_detail_query(graph):
+    # utils/export_handler.py 导出实体详情时收集的 map 列表
+    rows = execute("""
+        MATCH (n:company {name: $name})
+        OPTIONAL MATCH (n)-[r]-(related)
+        RETURN n as entity,
+               collect({
+                   related_entity: related,
+                   relationship: r,
+                   relationship_type: type(r)
+               }) as relationships
+    """, {"name": "中兴"}, graph)
+    assert rows[0]["entity"]["name"] == "中兴"
+    assert sorted((item["relationship_type"], item["related_entity"]["name"]) for item in rows[0]["relationships"]) == [
+        ("属于", "通信设备"), ("拥有", "基站"),
+    ]
+
+
+def test_analytics_queries(graph):
+    # utils/analytics.py 的全部分析查询都能在内嵌图上执行
+    analytics = Analytics(EmbeddedDB(graph))
+    results = analytics.collect(list(SECTION_NAMES), centrality_limit=3)
+    assert analytics.db.unsupported == []
+    assert results["nodes"]["node_counts"] == {"product": 3, "company": 2, "industry": 2}
+    assert results["network"]["connectivity"]["total_nodes"] == 7
+    assert results["network"]["connectivity"]["isolated_nodes"] == 0
+    degree = results["centrality"]["degree_centrality"]
+    assert (degree[0]["name"], degree[0]["degree"]) == ("华为", 4)
+    assert len(degree) == 3
+
+
+def test_search_queries(graph):
+    # utils/search_engine.py 的搜索、推荐和补全查询
+    db = EmbeddedDB(graph)
+    engine = SearchEngine(db)
+    assert [row["entity_name"] for row in engine.fuzzy_search("通信", "company")] == ["中兴", "华为"]
+    assert {row["entity_name"] for row in engine.fuzzy_search("通信")} >= {"通信设备", "华为", "中兴"}
+    engine.get_recommendations("华为", "company")
+    engine.get_similar_entities("华为", "company")
+    assert engine.get_search_suggestions("华", "company") == ["华为"]
+    assert db.unsupported == []
+
+
+def test_unsupported_queries_fall_back():
+    for query in [
+        "MATCH (n:company) SET n.x = 1 RETURN n",
+        "MATCH path = (a)-[*1..3]-(b) RETURN path",
+        "MATCH (n:company) WHERE (n)--() RETURN n",
+    ]:
+        with pytest.raises(UnsupportedQuery):
+            execute(query, None, _EmptyGraph())
+    assert is_write("MATCH (n {name: $name}) DETACH DELETE n")
+    assert not is_write("MATCH (n) RETURN n.set as s, 'CREATE' as c")
+
+
+class _EmptyGraph:
+    labels = ["company"]
+
+
+def test_label_and_type_ids_beyond_one_byte(tmp_path):
+    path = str(tmp_path / "wide.sqlite")
+    conn = sqlite3.connect(path)
+    for statement in SCHEMA:
+        conn.execute(statement)
+    labels = [f"label{i}" for i in range(300)]
+    conn.executemany("INSERT INTO labels (label) VALUES (?)", [(label,) for label in labels])
+    conn.executemany("INSERT INTO nodes VALUES (?, ?, ?, '{}')", [(i, label, f"n{i}") for i, label in enumerate(labels)])
+    conn.executemany("INSERT INTO relationships VALUES (?, ?, ?, ?, '{}')",
+                     [(i, f"type{i}", i, (i + 1) % 300) for i in range(300)])
+    conn.commit()
+    conn.close()
+
+    graph = EmbeddedGraph(path)
+    try:
+        assert graph.node_label(299) == "label299"
+        assert [rel_type for _, rel_type, _, _ in graph.neighbors(299, "out")] == ["type299"]
+        assert graph.pattern_count("label299", ["type299"], "label0") == 1
+        assert execute("MATCH (a:label280)-[r]->(b) RETURN type(r) as t, labels(b)[0] as l", None, graph) == [
+            {"t": "type280", "l": "label281"}
+        ]
+    finally:
+        graph.close()
+
+
+def test_hybrid_reads_fall_back_after_write(graph_path):
+    backend = EmbeddedBackend(graph_path, fallback_on_write=True)
+    try:
+        query = "MATCH (n:company) RETURN count(n) as count"
+        assert backend.run(query) == [{"count": 2}]
+        graph_writes.publish(labels=["company"])
+        with pytest.raises(UnsupportedQuery):
+            backend.run(query)
+    finally:
+        backend.close()
+
+
+def test_hybrid_write_query_marks_stale(graph_path):
+    backend = EmbeddedBackend(graph_path, fallback_on_write=True)
+    try:
+        with pytest.raises(UnsupportedQuery):
+            backend.run("MATCH (n:company {name: $name}) DETACH DELETE n", {"name": "中兴"})
+        with pytest.raises(UnsupportedQuery):
+            backend.run("MATCH (n:company) RETURN count(n) as count")
+    finally:
+        backend.close()
+
+
+def test_hybrid_sees_other_process_writes(graph_path):
+    backend = EmbeddedBackend(graph_path, fallback_on_write=True)
+    try:
+        assert backend.run("MATCH (n:product) RETURN count(n) as count") == [{"count": 3}]
+        # 其他进程（如导入面板）追加的写入事件
+        os.makedirs("logs", exist_ok=True)
+        with open(graph_writes.WRITE_EVENTS_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"time": time.time(), "pid": -1, "labels": ["product"], "rel_types": []}) + "\n")
+        backend._next_poll = 0.0
+        with pytest.raises(UnsupportedQuery):
+            backend.run("MATCH (n:product) RETURN count(n) as count")
+    finally:
+        backend.close()
+
+    # 内嵌图构建之后有过写入，新建的后端一开始就回退
+    backend = EmbeddedBackend(graph_path, fallback_on_write=True)
+    try:
+        assert backend.stale
+    finally:
+        backend.close()
+
+    # 重新构建后恢复使用内嵌图
+    later = time.time() + 10
+    os.utime(graph_path, (later, later))
+    backend = EmbeddedBackend(graph_path, fallback_on_write=True)
+    try:
+        assert backend.run("MATCH (n:product) RETURN count(n) as count") == [{"count": 3}]
+    finally:
+        backend.close()
+
+
+def test_embedded_only_mode_ignores_writes(graph_path):
+    backend = EmbeddedBackend(graph_path)
+    try:
+        graph_writes.publish(labels=["company"])
+        assert backend.run("MATCH (n:company) RETURN count(n) as count") == [{"count": 2}]
+    finally:
+        backend.close()
+
+
+def test_writes_outside_embedded_graph_keep_it_fresh(graph_path):
+    backend = EmbeddedBackend(graph_path, fallback_on_write=True)
+    try:
+        query = "MATCH (n:company) RETURN count(n) as count"
+        # utils/search_engine.py 记录搜索历史的写查询
+        with pytest.raises(UnsupportedQuery):
+            backend.run("""
+            MERGE (sh:SearchHistory {session_id: $session_id, entity_name: $entity_name})
+            ON CREATE SET sh.search_count = 1
+            ON MATCH SET sh.search_count = sh.search_count + 1
+            """, {"session_id": "s", "entity_name": "华为"})
+        graph_writes.publish(labels=["ShareConfig"])
+        assert backend.run(query) == [{"count": 2}]
+        assert not backend.stale
+    finally:
+        backend.close()
+
+    # 构建之后只有无关标签的写入，新建的后端仍然使用内嵌图
+    backend = EmbeddedBackend(graph_path, fallback_on_write=True)
+    try:
+        assert not backend.stale
+        graph_writes.publish(rel_types=["拥有"])
+        assert backend.stale
+    finally:
+        backend.close()
+
+
+def test_write_targets():
+    assert write_targets("MATCH (c:company {name: $name}), (p:product) MERGE (c)-[r:拥有|:生产]->(p)") == (
+        {"company", "product"}, {"拥有", "生产"}
+    )
+    assert write_targets("MATCH (n) WHERE id(n) = $id DETACH DELETE n") is None
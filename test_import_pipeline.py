@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# coding: utf-8
+# File: test_import_pipeline.py
+# 测试流水线导入：写入线程出错或意外退出时，读取方不会阻塞在已满的队列上
+
+import threading
+
+import pytest
+
+from src.import_pipeline import ImportPipeline
+
+
+def batches(count):
+    for i in range(count):
+        yield [i], i
+
+
+def run_with_timeout(pipeline, on_commit, timeout=10):
+    result = {}
+
+    def target():
+        try:
+            result["rows"] = pipeline.run(batches(1000), on_commit)
+        except Exception as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "流水线阻塞"
+    return result
+
+
+def test_commit_error_fails_fast():
+    def on_commit(rows, offset):
+        raise RuntimeError("检查点写入失败")
+
+    result = run_with_timeout(ImportPipeline(lambda batch: None, writers=2, queue_size=1), on_commit)
+    assert str(result["error"]) == "检查点写入失败"
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_writer_thread_dies(monkeypatch):
+    pipeline = ImportPipeline(lambda batch: None, writers=2, queue_size=1)
+
+    def broken_fail(error):
+        raise RuntimeError("错误处理失败")
+
+    # 写入出错后错误处理本身也失败，写入线程全部退出
+    pipeline.write_batch = lambda batch: 1 / 0
+    monkeypatch.setattr(pipeline, "_fail", broken_fail)
+    result = run_with_timeout(pipeline, lambda rows, offset: None)
+    assert "error" in result
+
+
+def test_commits_in_order():
+    offsets = []
+    pipeline = ImportPipeline(lambda batch: None, writers=3, queue_size=2)
+    assert pipeline.run(batches(50), lambda rows, offset: offsets.append(offset)) == 50
+    assert offsets == list(range(50))
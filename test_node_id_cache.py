@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# coding: utf-8
+# File: test_node_id_cache.py
+# 测试节点 ID 缓存：数据库在进程外被清空、ID 被新节点复用后，关系不会连到错误的节点
+
+from src.neo4j_handler import Neo4jHandler
+from src.node_id_cache import NodeIdCache
+from test_delta_import import FakeCursor
+
+
+class FakeGraph:
+    """按 ID 保存节点的假图数据库"""
+
+    def __init__(self, nodes):
+        # id → (标签, 名称)
+        self.nodes = nodes
+        self.created = []
+
+    def run(self, query, parameters=None, **kwargs):
+        params = dict(parameters or {}, **kwargs)
+        if "elementId(null)" in query:
+            raise Exception("Unknown function 'elementId'")
+        if "count(n)" in query:
+            return FakeCursor([{"count": len(self.nodes)}])
+        if "AS value" in query:
+            label = query.split("(n:")[1].split(")")[0]
+            return FakeCursor({"value": name, "id": node_id} for node_id, (lbl, name) in self.nodes.items() if lbl == label)
+        if "UNWIND $rels" in query and "rel.start_id" in query:
+            # 按 ID 取节点后核对标签和名称
+            matched = []
+            for rel in params["rels"]:
+                if self.nodes.get(rel["start_id"]) == ("company", rel["start"]) and \
+                        self.nodes.get(rel["end_id"]) == ("industry", rel["end"]):
+                    self.created.append((rel["start"], rel["end"]))
+                    matched.append({"index": rel["index"]})
+            return FakeCursor(matched)
+        if "UNWIND $rels" in query:
+            self.created.extend(("by-name", rel["start"], rel["end"]) for rel in params["rels"])
+        return FakeCursor()
+
+
+def rel(start, end):
+    return {"start": start, "end": end, "start_key": "name", "end_key": "name", "properties": {}}
+
+
+def test_reused_ids_fall_back_to_name_match(tmp_path):
+    (tmp_path / "state").mkdir()
+    handler = Neo4jHandler({}, data_dir=str(tmp_path), state_dir=str(tmp_path / "state"))
+    handler.g = FakeGraph({1: ("company", "甲"), 2: ("company", "乙"), 3: ("industry", "银行")})
+    handler.id_cache = NodeIdCache(handler.g)
+
+    handler._create_relationships_batch([rel("甲", "银行")], "company", "industry", "belongs_to", prepared=True)
+    assert handler.g.created == [("甲", "银行")]
+
+    # 数据库在进程外被清空后重新导入，旧 ID 1 被另一个公司复用
+    handler.g.nodes = {1: ("company", "丙"), 4: ("company", "甲"), 3: ("industry", "银行")}
+    handler.g.created = []
+    handler._create_relationships_batch([rel("甲", "银行")], "company", "industry", "belongs_to", prepared=True)
+    assert handler.g.created == [("by-name", "甲", "银行")]
+
+    # 缓存已丢弃，重新加载后按新 ID 创建
+    handler.g.created = []
+    handler._create_relationships_batch([rel("甲", "银行")], "company", "industry", "belongs_to", prepared=True)
+    assert handler.g.created == [("甲", "银行")]
@@ -5,18 +5,105 @@
 import logging
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
-from utils.db_connector import Neo4jConnector
+from utils.db_connector import Neo4jConnector, QueryFailed
 from config import ANALYTICS_CONFIG
 
 logger = logging.getLogger(__name__)
 
+# 参与分析的节点标签
+NODE_LABELS = ("company", "industry", "product")
+
+# 中心性指标及其关系模式，n 为被统计的节点
+CENTRALITY_PATTERNS = {
+    "degree": "(n)-[r]-()",
+    "in_degree": "()-[r]->(n)",
+    "out_degree": "(n)-[r]->()",
+}
+
+# 可以通过 Analytics.collect 一起查询的分析
+SECTION_NAMES = {
+    "nodes": "节点统计",
+    "relationships": "关系统计",
+    "centrality": "中心性指标",
+    "network": "网络分析",
+    "industry": "行业分析",
+}
+
 class Analytics:
-    """数据分析工具类"""
+    """
+    数据分析工具类
+    
+    每项分析分为两步：_xxx_queries 给出需要执行的只读查询，_format_xxx 把查询结果整理为结果字典。
+    一项或多项分析的全部查询通过一次 query_many 并发执行，只有一层并发，并发数受连接池名额限制。
+    """
     
     def __init__(self, db_connector: Neo4jConnector):
         self.db = db_connector
         self.cache_ttl = ANALYTICS_CONFIG.get("cache_ttl", 600)
         self.max_nodes = ANALYTICS_CONFIG.get("max_nodes_for_analysis", 10000)
+        self.query_timeout = ANALYTICS_CONFIG.get("query_timeout", 60)
+    
+    def collect(self, sections: List[str], centrality_limit: int = 20) -> Dict:
+        """
+        一次并发执行多项分析的全部查询，再分别整理结果
+        
+        Args:
+            sections: 分析名称列表，取值见 SECTION_NAMES
+            centrality_limit: 中心性指标返回结果数量限制
+        
+        Returns:
+            {分析名称: 结果字典}，查询失败的分析为空字典（错误已记录日志）
+        """
+        parts = {section: self._section(section, centrality_limit) for section in sections}
+        queries = {
+            (section, name): spec
+            for section, (section_queries, _) in parts.items()
+            for name, spec in section_queries.items()
+        }
+        
+        try:
+            rows = self.db.query_many(queries, timeout=self.query_timeout)
+            failed = set()
+        except QueryFailed as e:
+            rows = e.results
+            failed = {section for section, _ in e.failed}
+        
+        results = {}
+        for section, (_, format_results) in parts.items():
+            if section in failed:
+                logger.error(f"获取{SECTION_NAMES[section]}失败: 查询失败或超时")
+                results[section] = {}
+                continue
+            try:
+                results[section] = format_results({
+                    name: section_rows for (part, name), section_rows in rows.items() if part == section
+                })
+            except Exception as e:
+                logger.error(f"获取{SECTION_NAMES[section]}失败: {str(e)}")
+                results[section] = {}
+        return results
+    
+    def _section(self, section: str, centrality_limit: int = 20) -> Tuple[Dict, callable]:
+        """分析的 (查询字典, 整理函数)"""
+        if section == "nodes":
+            return self._node_statistics_queries(), self._format_node_statistics
+        if section == "relationships":
+            return self._relationship_statistics_queries(), self._format_relationship_statistics
+        if section == "centrality":
+            return (
+                self._centrality_queries(centrality_limit),
+                lambda results: self._format_centrality_metrics(results, centrality_limit)
+            )
+        if section == "network":
+            return self._network_analysis_queries(), self._format_network_analysis
+        if section == "industry":
+            return self._industry_analysis_queries(), self._format_industry_analysis
+        raise ValueError(f"未知的分析: {section}")
+    
+    def _fetch(self, section: str, centrality_limit: int = 20) -> Dict:
+        """执行单项分析，查询失败或超时时抛出 QueryFailed"""
+        queries, format_results = self._section(section, centrality_limit)
+        return format_results(self.db.query_many(queries, timeout=self.query_timeout))
     
     def get_node_statistics(self) -> Dict:
         """
@@ -26,51 +113,86 @@ class Analytics:
             节点统计数据字典
         """
         try:
-            # 基础节点统计
-            basic_stats_query = """
-            CALL {
-                MATCH (c:company) RETURN 'company' as type, count(c) as count
-                UNION ALL
-                MATCH (i:industry) RETURN 'industry' as type, count(i) as count
-                UNION ALL
-                MATCH (p:product) RETURN 'product' as type, count(p) as count
-            }
-            RETURN type, count
-            ORDER BY count DESC
-            """
-            
-            basic_results = self.db.query(basic_stats_query)
-            
-            # 详细统计
-            detailed_stats = {}
-            total_nodes = 0
-            
-            for result in basic_results:
-                node_type = result["type"]
-                count = result["count"]
-                detailed_stats[node_type] = count
-                total_nodes += count
-            
-            # 计算百分比
-            percentages = {}
-            for node_type, count in detailed_stats.items():
-                percentages[node_type] = (count / total_nodes * 100) if total_nodes > 0 else 0
-            
-            # 获取节点属性统计
-            attribute_stats = self._get_node_attribute_stats()
-            
-            return {
-                "total_nodes": total_nodes,
-                "node_counts": detailed_stats,
-                "node_percentages": percentages,
-                "attribute_stats": attribute_stats,
-                "last_updated": datetime.now().isoformat()
-            }
-            
+            return self._fetch("nodes")
         except Exception as e:
             logger.error(f"获取节点统计失败: {str(e)}")
             return {}
     
+    def _node_statistics_queries(self) -> Dict:
+        # 基础节点统计
+        basic_stats_query = """
+        CALL {
+            MATCH (c:company) RETURN 'company' as type, count(c) as count
+            UNION ALL
+            MATCH (i:industry) RETURN 'industry' as type, count(i) as count
+            UNION ALL
+            MATCH (p:product) RETURN 'product' as type, count(p) as count
+        }
+        RETURN type, count
+        ORDER BY count DESC
+        """
+        
+        # 检查描述字段的完整性
+        description_stats_query = """
+        CALL {
+            MATCH (c:company)
+            RETURN 'company' as type,
+                   count(c) as total,
+                   count(CASE WHEN c.description IS NOT NULL AND c.description <> '' THEN 1 END) as with_description
+            UNION ALL
+            MATCH (i:industry)
+            RETURN 'industry' as type,
+                   count(i) as total,
+                   count(CASE WHEN i.description IS NOT NULL AND i.description <> '' THEN 1 END) as with_description
+            UNION ALL
+            MATCH (p:product)
+            RETURN 'product' as type,
+                   count(p) as total,
+                   count(CASE WHEN p.description IS NOT NULL AND p.description <> '' THEN 1 END) as with_description
+        }
+        RETURN type, total, with_description,
+               (toFloat(with_description) / toFloat(total) * 100) as completion_rate
+        """
+        
+        return {
+            "basic": (basic_stats_query, None, self.cache_ttl),
+            "attributes": (description_stats_query, None, self.cache_ttl),
+        }
+    
+    def _format_node_statistics(self, results: Dict) -> Dict:
+        # 详细统计
+        detailed_stats = {}
+        total_nodes = 0
+        
+        for result in results["basic"]:
+            node_type = result["type"]
+            count = result["count"]
+            detailed_stats[node_type] = count
+            total_nodes += count
+        
+        # 计算百分比
+        percentages = {}
+        for node_type, count in detailed_stats.items():
+            percentages[node_type] = (count / total_nodes * 100) if total_nodes > 0 else 0
+        
+        # 节点属性统计
+        attribute_stats = {
+            result["type"]: {
+                "total": result["total"],
+                "with_description": result["with_description"],
+                "completion_rate": result["completion_rate"]
+            }
+            for result in results["attributes"]
+        }
+        
+        return {
+            "total_nodes": total_nodes,
+            "node_counts": detailed_stats,
+            "node_percentages": percentages,
+            "attribute_stats": attribute_stats,
+            "last_updated": datetime.now().isoformat()
+        }
+    
     def get_relationship_statistics(self) -> Dict:
         """
         获取关系统计信息
@@ -79,169 +201,159 @@ class Analytics:
             关系统计数据字典
         """
         try:
-            # 关系类型统计
-            relationship_stats_query = """
-            CALL {
-                MATCH ()-[r:所属行业]->() RETURN '所属行业' as type, count(r) as count
-                UNION ALL
-                MATCH ()-[r:主营产品]->() RETURN '主营产品' as type, count(r) as count
-                UNION ALL
-                MATCH ()-[r:上级行业]->() RETURN '上级行业' as type, count(r) as count
-                UNION ALL
-                MATCH ()-[r:上游材料]->() RETURN '上游材料' as type, count(r) as count
-            }
-            RETURN type, count
-            ORDER BY count DESC
-            """
-            
-            relationship_results = self.db.query(relationship_stats_query)
-            
-            # 处理结果
-            relationship_counts = {}
-            total_relationships = 0
-            
-            for result in relationship_results:
-                rel_type = result["type"]
-                count = result["count"]
-                relationship_counts[rel_type] = count
-                total_relationships += count
-            
-            # 计算百分比
-            relationship_percentages = {}
-            for rel_type, count in relationship_counts.items():
-                relationship_percentages[rel_type] = (count / total_relationships * 100) if total_relationships > 0 else 0
-            
-            # 获取关系密度统计
-            density_stats = self._get_relationship_density_stats()
-            
-            return {
-                "total_relationships": total_relationships,
-                "relationship_counts": relationship_counts,
-                "relationship_percentages": relationship_percentages,
-                "density_stats": density_stats,
-                "last_updated": datetime.now().isoformat()
-            }
-            
+            return self._fetch("relationships")
         except Exception as e:
             logger.error(f"获取关系统计失败: {str(e)}")
             return {}
     
+    def _relationship_statistics_queries(self) -> Dict:
+        # 关系类型统计
+        relationship_stats_query = """
+        CALL {
+            MATCH ()-[r:所属行业]->() RETURN '所属行业' as type, count(r) as count
+            UNION ALL
+            MATCH ()-[r:主营产品]->() RETURN '主营产品' as type, count(r) as count
+            UNION ALL
+            MATCH ()-[r:上级行业]->() RETURN '上级行业' as type, count(r) as count
+            UNION ALL
+            MATCH ()-[r:上游材料]->() RETURN '上游材料' as type, count(r) as count
+        }
+        RETURN type, count
+        ORDER BY count DESC
+        """
+        
+        # 计算各类型节点间的关系密度
+        density_query = """
+        MATCH (c:company), (i:industry), (p:product)
+        WITH count(c) as companies, count(i) as industries, count(p) as products
+        MATCH ()-[r:所属行业]->()
+        WITH companies, industries, products, count(r) as company_industry_rels
+        MATCH ()-[r:主营产品]->()
+        WITH companies, industries, products, company_industry_rels, count(r) as company_product_rels
+        RETURN companies, industries, products,
+               company_industry_rels,
+               company_product_rels,
+               (toFloat(company_industry_rels) / (companies * industries)) as ci_density,
+               (toFloat(company_product_rels) / (companies * products)) as cp_density
+        """
+        
+        return {
+            "relationships": (relationship_stats_query, None, self.cache_ttl),
+            "density": (density_query, None, self.cache_ttl),
+        }
+    
+    def _format_relationship_statistics(self, results: Dict) -> Dict:
+        # 处理结果
+        relationship_counts = {}
+        total_relationships = 0
+        
+        for result in results["relationships"]:
+            rel_type = result["type"]
+            count = result["count"]
+            relationship_counts[rel_type] = count
+            total_relationships += count
+        
+        # 计算百分比
+        relationship_percentages = {}
+        for rel_type, count in relationship_counts.items():
+            relationship_percentages[rel_type] = (count / total_relationships * 100) if total_relationships > 0 else 0
+        
+        # 关系密度统计
+        density_stats = {}
+        if results["density"]:
+            result = results["density"][0]
+            density_stats = {
+                "company_industry_density": result.get("ci_density", 0),
+                "company_product_density": result.get("cp_density", 0),
+                "total_possible_ci_relations": result["companies"] * result["industries"],
+                "total_possible_cp_relations": result["companies"] * result["products"],
+                "actual_ci_relations": result["company_industry_rels"],
+                "actual_cp_relations": result["company_product_rels"]
+            }
+        
+        return {
+            "total_relationships": total_relationships,
+            "relationship_counts": relationship_counts,
+            "relationship_percentages": relationship_percentages,
+            "density_stats": density_stats,
+            "last_updated": datetime.now().isoformat()
+        }
+    
     def calculate_centrality_metrics(self, limit: int = 20) -> Dict:
         """
         计算中心性指标
         
         Args:
             limit: 返回结果数量限制
-            
+        
         Returns:
             中心性指标数据
         """
         try:
-            # 度中心性（连接数最多的节点）
-            degree_centrality_query = """
-            CALL {
-                MATCH (c:company)
-                OPTIONAL MATCH (c)-[r]-()
-                RETURN c.name as name, 'company' as type, count(r) as degree
-                UNION ALL
-                MATCH (i:industry)
-                OPTIONAL MATCH (i)-[r]-()
-                RETURN i.name as name, 'industry' as type, count(r) as degree
-                UNION ALL
-                MATCH (p:product)
-                OPTIONAL MATCH (p)-[r]-()
-                RETURN p.name as name, 'product' as type, count(r) as degree
-            }
-            RETURN name, type, degree
-            ORDER BY degree DESC
-            LIMIT $limit
-            """
-            
-            degree_results = self.db.query(degree_centrality_query, {"limit": limit})
-            
-            # 入度中心性（被指向最多的节点）
-            in_degree_query = """
-            CALL {
-                MATCH (c:company)
-                OPTIONAL MATCH ()-[r]->(c)
-                RETURN c.name as name, 'company' as type, count(r) as in_degree
-                UNION ALL
-                MATCH (i:industry)
-                OPTIONAL MATCH ()-[r]->(i)
-                RETURN i.name as name, 'industry' as type, count(r) as in_degree
-                UNION ALL
-                MATCH (p:product)
-                OPTIONAL MATCH ()-[r]->(p)
-                RETURN p.name as name, 'product' as type, count(r) as in_degree
-            }
-            RETURN name, type, in_degree
-            ORDER BY in_degree DESC
-            LIMIT $limit
-            """
-            
-            in_degree_results = self.db.query(in_degree_query, {"limit": limit})
-            
-            # 出度中心性（指向其他节点最多的节点）
-            out_degree_query = """
-            CALL {
-                MATCH (c:company)
-                OPTIONAL MATCH (c)-[r]->()
-                RETURN c.name as name, 'company' as type, count(r) as out_degree
-                UNION ALL
-                MATCH (i:industry)
-                OPTIONAL MATCH (i)-[r]->()
-                RETURN i.name as name, 'industry' as type, count(r) as out_degree
-                UNION ALL
-                MATCH (p:product)
-                OPTIONAL MATCH (p)-[r]->()
-                RETURN p.name as name, 'product' as type, count(r) as out_degree
-            }
-            RETURN name, type, out_degree
-            ORDER BY out_degree DESC
-            LIMIT $limit
-            """
-            
-            out_degree_results = self.db.query(out_degree_query, {"limit": limit})
-            
-            return {
-                "degree_centrality": [
-                    {
-                        "name": result["name"],
-                        "type": result["type"],
-                        "degree": result["degree"]
-                    }
-                    for result in degree_results
-                ],
-                "in_degree_centrality": [
-                    {
-                        "name": result["name"],
-                        "type": result["type"],
-                        "in_degree": result["in_degree"]
-                    }
-                    for result in in_degree_results
-                ],
-                "out_degree_centrality": [
-                    {
-                        "name": result["name"],
-                        "type": result["type"],
-                        "out_degree": result["out_degree"]
-                    }
-                    for result in out_degree_results
-                ],
-                "last_updated": datetime.now().isoformat()
-            }
-            
+            return self._fetch("centrality", centrality_limit=limit)
         except Exception as e:
             logger.error(f"计算中心性指标失败: {str(e)}")
             return {}
     
+    def _centrality_queries(self, limit: int) -> Dict:
+        # 每个指标、每个标签一个查询，九个查询并发执行后再合并排序
+        queries = {}
+        for metric, pattern in CENTRALITY_PATTERNS.items():
+            for label in NODE_LABELS:
+                query = f"""
+                MATCH (n:{label})
+                OPTIONAL MATCH {pattern}
+                RETURN n.name as name, '{label}' as type, count(r) as {metric}
+                ORDER BY {metric} DESC
+                LIMIT $limit
+                """
+                queries[f"{metric}:{label}"] = (query, {"limit": limit}, self.cache_ttl)
+        return queries
+    
+    def _format_centrality_metrics(self, results: Dict, limit: int) -> Dict:
+        def top(metric):
+            rows = [row for label in NODE_LABELS for row in results[f"{metric}:{label}"]]
+            return sorted(rows, key=lambda row: row[metric], reverse=True)[:limit]
+        
+        degree_results = top("degree")
+        in_degree_results = top("in_degree")
+        out_degree_results = top("out_degree")
+        
+        return {
+            "degree_centrality": [
+                {
+                    "name": result["name"],
+                    "type": result["type"],
+                    "degree": result["degree"]
+                }
+                for result in degree_results
+            ],
+            "in_degree_centrality": [
+                {
+                    "name": result["name"],
+                    "type": result["type"],
+                    "in_degree": result["in_degree"]
+                }
+                for result in in_degree_results
+            ],
+            "out_degree_centrality": [
+                {
+                    "name": result["name"],
+                    "type": result["type"],
+                    "out_degree": result["out_degree"]
+                }
+                for result in out_degree_results
+            ],
+            "last_updated": datetime.now().isoformat()
+        }
+    
     def generate_trend_data(self, days: int = 30) -> Dict:
         """
         生成趋势数据（模拟数据，实际项目中可以基于时间戳）
         
         Args:
             days: 天数
-            
+        
         Returns:
             趋势数据
         """
@@ -280,7 +392,7 @@ class Analytics:
                 "period_days": days,
                 "last_updated": datetime.now().isoformat()
             }
-            
+        
         except Exception as e:
             logger.error(f"生成趋势数据失败: {str(e)}")
             return {}
@@ -293,68 +405,75 @@ class Analytics:
             网络分析结果
         """
         try:
-            # 连通性分析
-            connectivity_query = """
-            MATCH (n)
-            OPTIONAL MATCH (n)-[r]-()
-            WITH n, count(r) as connections
-            RETURN 
-                count(n) as total_nodes,
-                count(CASE WHEN connections > 0 THEN 1 END) as connected_nodes,
-                count(CASE WHEN connections = 0 THEN 1 END) as isolated_nodes,
-                avg(connections) as avg_connections,
-                max(connections) as max_connections,
-                min(connections) as min_connections
-            """
-            
-            connectivity_results = self.db.query(connectivity_query)
-            
-            if not connectivity_results:
-                return {}
-            
-            connectivity = connectivity_results[0]
-            
-            # 计算连通率
-            total_nodes = connectivity["total_nodes"]
-            connected_nodes = connectivity["connected_nodes"]
-            connectivity_rate = (connected_nodes / total_nodes * 100) if total_nodes > 0 else 0
-            
-            # 获取最活跃的实体
-            most_active_query = """
-            MATCH (n)-[r]-()
-            WITH n, count(r) as connections, labels(n)[0] as node_type
-            RETURN n.name as name, node_type, connections
-            ORDER BY connections DESC
-            LIMIT 10
-            """
-            
-            most_active_results = self.db.query(most_active_query)
-            
-            return {
-                "connectivity": {
-                    "total_nodes": total_nodes,
-                    "connected_nodes": connected_nodes,
-                    "isolated_nodes": connectivity["isolated_nodes"],
-                    "connectivity_rate": connectivity_rate,
-                    "avg_connections": connectivity["avg_connections"],
-                    "max_connections": connectivity["max_connections"],
-                    "min_connections": connectivity["min_connections"]
-                },
-                "most_active_entities": [
-                    {
-                        "name": result["name"],
-                        "type": result["node_type"],
-                        "connections": result["connections"]
-                    }
-                    for result in most_active_results
-                ],
-                "last_updated": datetime.now().isoformat()
-            }
-            
+            return self._fetch("network")
         except Exception as e:
             logger.error(f"获取网络分析失败: {str(e)}")
             return {}
     
+    def _network_analysis_queries(self) -> Dict:
+        # 连通性分析
+        connectivity_query = """
+        MATCH (n)
+        OPTIONAL MATCH (n)-[r]-()
+        WITH n, count(r) as connections
+        RETURN
+            count(n) as total_nodes,
+            count(CASE WHEN connections > 0 THEN 1 END) as connected_nodes,
+            count(CASE WHEN connections = 0 THEN 1 END) as isolated_nodes,
+            avg(connections) as avg_connections,
+            max(connections) as max_connections,
+            min(connections) as min_connections
+        """
+        
+        # 获取最活跃的实体
+        most_active_query = """
+        MATCH (n)-[r]-()
+        WITH n, count(r) as connections, labels(n)[0] as node_type
+        RETURN n.name as name, node_type, connections
+        ORDER BY connections DESC
+        LIMIT 10
+        """
+        
+        return {
+            "connectivity": (connectivity_query, None, self.cache_ttl),
+            "most_active": (most_active_query, None, self.cache_ttl),
+        }
+    
+    def _format_network_analysis(self, results: Dict) -> Dict:
+        connectivity_results = results["connectivity"]
+        most_active_results = results["most_active"]
+        
+        if not connectivity_results:
+            return {}
+        
+        connectivity = connectivity_results[0]
+        
+        # 计算连通率
+        total_nodes = connectivity["total_nodes"]
+        connected_nodes = connectivity["connected_nodes"]
+        connectivity_rate = (connected_nodes / total_nodes * 100) if total_nodes > 0 else 0
+        
+        return {
+            "connectivity": {
+                "total_nodes": total_nodes,
+                "connected_nodes": connected_nodes,
+                "isolated_nodes": connectivity["isolated_nodes"],
+                "connectivity_rate": connectivity_rate,
+                "avg_connections": connectivity["avg_connections"],
+                "max_connections": connectivity["max_connections"],
+                "min_connections": connectivity["min_connections"]
+            },
+            "most_active_entities": [
+                {
+                    "name": result["name"],
+                    "type": result["node_type"],
+                    "connections": result["connections"]
+                }
+                for result in most_active_results
+            ],
+            "last_updated": datetime.now().isoformat()
+        }
+    
     def get_industry_analysis(self) -> Dict:
         """
         获取行业分析数据
@@ -363,138 +482,65 @@ class Analytics:
             行业分析结果
         """
         try:
-            # 行业规模分析
-            industry_size_query = """
-            MATCH (i:industry)<-[:所属行业]-(c:company)
-            WITH i, count(c) as company_count
-            OPTIONAL MATCH (c:company)-[:所属行业]->(i)
-            OPTIONAL MATCH (c)-[:主营产品]->(p:product)
-            WITH i, company_count, count(DISTINCT p) as product_count
-            RETURN i.name as industry_name,
-                   company_count,
-                   product_count,
-                   (company_count + product_count) as total_entities
-            ORDER BY total_entities DESC
-            """
-            
-            industry_results = self.db.query(industry_size_query)
-            
-            # 行业关系分析
-            industry_relations_query = """
-            MATCH (i1:industry)-[r]-(i2:industry)
-            WITH i1, i2, type(r) as relation_type, count(r) as relation_count
-            RETURN i1.name as from_industry,
-                   i2.name as to_industry,
-                   relation_type,
-                   relation_count
-            ORDER BY relation_count DESC
-            LIMIT 20
-            """
-            
-            relations_results = self.db.query(industry_relations_query)
-            
-            return {
-                "industry_sizes": [
-                    {
-                        "industry": result["industry_name"],
-                        "companies": result["company_count"],
-                        "products": result["product_count"],
-                        "total_entities": result["total_entities"]
-                    }
-                    for result in industry_results
-                ],
-                "industry_relations": [
-                    {
-                        "from_industry": result["from_industry"],
-                        "to_industry": result["to_industry"],
-                        "relation_type": result["relation_type"],
-                        "relation_count": result["relation_count"]
-                    }
-                    for result in relations_results
-                ],
-                "last_updated": datetime.now().isoformat()
-            }
-            
+            return self._fetch("industry")
         except Exception as e:
             logger.error(f"获取行业分析失败: {str(e)}")
             return {}
     
-    def _get_node_attribute_stats(self) -> Dict:
-        """获取节点属性统计"""
-        try:
-            # 检查描述字段的完整性
-            description_stats_query = """
-            CALL {
-                MATCH (c:company)
-                RETURN 'company' as type,
-                       count(c) as total,
-                       count(CASE WHEN c.description IS NOT NULL AND c.description <> '' THEN 1 END) as with_description
-                UNION ALL
-                MATCH (i:industry)
-                RETURN 'industry' as type,
-                       count(i) as total,
-                       count(CASE WHEN i.description IS NOT NULL AND i.description <> '' THEN 1 END) as with_description
-                UNION ALL
-                MATCH (p:product)
-                RETURN 'product' as type,
-                       count(p) as total,
-                       count(CASE WHEN p.description IS NOT NULL AND p.description <> '' THEN 1 END) as with_description
-            }
-            RETURN type, total, with_description,
-                   (toFloat(with_description) / toFloat(total) * 100) as completion_rate
-            """
-            
-            results = self.db.query(description_stats_query)
-            
-            return {
-                result["type"]: {
-                    "total": result["total"],
-                    "with_description": result["with_description"],
-                    "completion_rate": result["completion_rate"]
-                }
-                for result in results
-            }
-            
-        except Exception as e:
-            logger.error(f"获取节点属性统计失败: {str(e)}")
-            return {}
+    def _industry_analysis_queries(self) -> Dict:
+        # 行业规模分析
+        industry_size_query = """
+        MATCH (i:industry)<-[:所属行业]-(c:company)
+        WITH i, count(c) as company_count
+        OPTIONAL MATCH (c:company)-[:所属行业]->(i)
+        OPTIONAL MATCH (c)-[:主营产品]->(p:product)
+        WITH i, company_count, count(DISTINCT p) as product_count
+        RETURN i.name as industry_name,
+               company_count,
+               product_count,
+               (company_count + product_count) as total_entities
+        ORDER BY total_entities DESC
+        """
+        
+        # 行业关系分析
+        industry_relations_query = """
+        MATCH (i1:industry)-[r]-(i2:industry)
+        WITH i1, i2, type(r) as relation_type, count(r) as relation_count
+        RETURN i1.name as from_industry,
+               i2.name as to_industry,
+               relation_type,
+               relation_count
+        ORDER BY relation_count DESC
+        LIMIT 20
+        """
+        
+        return {
+            "sizes": (industry_size_query, None, self.cache_ttl),
+            "relations": (industry_relations_query, None, self.cache_ttl),
+        }
     
-    def _get_relationship_density_stats(self) -> Dict:
-        """获取关系密度统计"""
-        try:
-            # 计算各类型节点间的关系密度
-            density_query = """
-            MATCH (c:company), (i:industry), (p:product)
-            WITH count(c) as companies, count(i) as industries, count(p) as products
-            MATCH ()-[r:所属行业]->()
-            WITH companies, industries, products, count(r) as company_industry_rels
-            MATCH ()-[r:主营产品]->()
-            WITH companies, industries, products, company_industry_rels, count(r) as company_product_rels
-            RETURN companies, industries, products,
-                   company_industry_rels,
-                   company_product_rels,
-                   (toFloat(company_industry_rels) / (companies * industries)) as ci_density,
-                   (toFloat(company_product_rels) / (companies * products)) as cp_density
-            """
-            
-            results = self.db.query(density_query)
-            
-            if results:
-                result = results[0]
-                return {
-                    "company_industry_density": result.get("ci_density", 0),
-                    "company_product_density": result.get("cp_density", 0),
-                    "total_possible_ci_relations": result["companies"] * result["industries"],
-                    "total_possible_cp_relations": result["companies"] * result["products"],
-                    "actual_ci_relations": result["company_industry_rels"],
-                    "actual_cp_relations": result["company_product_rels"]
+    def _format_industry_analysis(self, results: Dict) -> Dict:
+        return {
+            "industry_sizes": [
+                {
+                    "industry": result["industry_name"],
+                    "companies": result["company_count"],
+                    "products": result["product_count"],
+                    "total_entities": result["total_entities"]
                 }
-            
-            return {}
-            
-        except Exception as e:
-            logger.error(f"获取关系密度统计失败: {str(e)}")
-            return {}
+                for result in results["sizes"]
+            ],
+            "industry_relations": [
+                {
+                    "from_industry": result["from_industry"],
+                    "to_industry": result["to_industry"],
+                    "relation_type": result["relation_type"],
+                    "relation_count": result["relation_count"]
+                }
+                for result in results["relations"]
+            ],
+            "last_updated": datetime.now().isoformat()
+        }
     
     def generate_summary_report(self) -> Dict:
         """
@@ -504,12 +550,13 @@ class Analytics:
             综合报告数据
         """
         try:
-            # 收集所有分析数据
-            node_stats = self.get_node_statistics()
-            relationship_stats = self.get_relationship_statistics()
-            centrality_metrics = self.calculate_centrality_metrics(limit=5)
-            network_analysis = self.get_network_analysis()
-            industry_analysis = self.get_industry_analysis()
+            # 所有分析的查询一次并发执行
+            results = self.collect(list(SECTION_NAMES), centrality_limit=5)
+            node_stats = results["nodes"]
+            relationship_stats = results["relationships"]
+            centrality_metrics = results["centrality"]
+            network_analysis = results["network"]
+            industry_analysis = results["industry"]
             
             # 生成关键洞察
             insights = []
@@ -553,7 +600,7 @@ class Analytics:
                 },
                 "generated_at": datetime.now().isoformat()
             }
-            
+        
         except Exception as e:
             logger.error(f"生成综合报告失败: {str(e)}")
             return {}
\ No newline at end of file
@@ -0,0 +1,1281 @@
+"""
+Cypher 子集解释器
+供内嵌图后端执行页面和工具类使用的只读查询：
+MATCH / OPTIONAL MATCH（1-3 跳的定长模式）、WHERE、WITH、RETURN、CALL { ... UNION ALL ... }、
+聚合（count/sum/avg/min/max/collect）、ORDER BY / SKIP / LIMIT、列表下标和切片、map 字面量、
+size(模式) 计数以及常用的字符串和类型函数。
+写操作、变长路径和 shortestPath 等不在子集内，抛出 UnsupportedQuery 由调用方回退到 Neo4j。
+"""
+import math
+import re
+from functools import lru_cache
+from typing import Dict, List
+
+from utils.graph_backend import UnsupportedQuery
+
+TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+|//[^\n]*)
+  | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+  | (?P<number>\d+\.\d+|\d+)
+  | (?P<param>\$\w+)
+  | (?P<ident>`[^`]+`|[^\W\d]\w*)
+  | (?P<op><>|<=|>=|->|<-|[()\[\]{}:,.\-<>=*+/%|])
+""", re.VERBOSE)
+
+# 出现即判定为写操作或不支持的子句
+UNSUPPORTED_KEYWORDS = {
+    "CREATE", "MERGE", "DELETE", "DETACH", "SET", "REMOVE", "DROP", "FOREACH", "LOAD", "EXPLAIN", "PROFILE",
+    "UNWIND", "USE",
+}
+
+# 出现即判定为写操作（内嵌图之外的数据会因此改变）
+WRITE_KEYWORDS = {"CREATE", "MERGE", "DELETE", "DETACH", "SET", "REMOVE", "DROP", "FOREACH", "LOAD"}
+
+AGGREGATES = {"count", "sum", "avg", "min", "max", "collect"}
+
+# 作用域中存放当前分组聚合结果的键（不会与变量名冲突）
+AGGREGATE_SLOT = "\0aggregates"
+
+# 单次查询允许产生的中间行数上限，超出时交给 Neo4j 执行
+DEFAULT_MAX_ROWS = 5000000
+
+
+class NodeRef:
+    """查询中绑定的节点（只保存节点 ID，属性按需从图中读取）"""
+    __slots__ = ("id",)
+
+    def __init__(self, node_id):
+        self.id = node_id
+
+    def __eq__(self, other):
+        return isinstance(other, NodeRef) and other.id == self.id
+
+    def __hash__(self):
+        return hash(("node", self.id))
+
+
+class RelRef:
+    """查询中绑定的关系"""
+    __slots__ = ("id", "type", "start", "end")
+
+    def __init__(self, rel_id, rel_type, start, end):
+        self.id = rel_id
+        self.type = rel_type
+        self.start = start
+        self.end = end
+
+    def __eq__(self, other):
+        return isinstance(other, RelRef) and other.id == self.id
+
+    def __hash__(self):
+        return hash(("rel", self.id))
+
+
+class Env:
+    """一次查询执行的上下文"""
+
+    def __init__(self, graph, params, max_rows=DEFAULT_MAX_ROWS):
+        self.graph = graph
+        self.params = params
+        self.max_rows = max_rows
+        self.rows = 0
+
+    def count_rows(self, added):
+        self.rows += added
+        if self.rows > self.max_rows:
+            raise UnsupportedQuery(f"中间结果超过 {self.max_rows} 行")
+
+
+# ---------------------------------------------------------------- 词法分析
+
+class Token:
+    __slots__ = ("kind", "value", "upper", "start", "end")
+
+    def __init__(self, kind, value, start, end):
+        self.kind = kind
+        self.value = value
+        self.upper = value.upper() if kind == "ident" else value
+        self.start = start
+        self.end = end
+
+
+def tokenize(text):
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        match = TOKEN_RE.match(text, pos)
+        if not match:
+            raise UnsupportedQuery(f"无法识别的字符: {text[pos:pos + 10]!r}")
+        kind = match.lastgroup
+        value = match.group()
+        if kind != "ws":
+            if kind == "ident" and value.startswith("`"):
+                # 反引号标识符不作为关键字
+                token = Token(kind, value[1:-1], match.start(), match.end())
+                token.upper = None
+                tokens.append(token)
+            else:
+                tokens.append(Token(kind, value, match.start(), match.end()))
+        pos = match.end()
+    return tokens
+
+
+def is_write(text):
+    """查询是否包含写操作关键字（属性名、字符串和反引号标识符不算）"""
+    try:
+        tokens = tokenize(text)
+    except UnsupportedQuery:
+        return False
+    return any(
+        token.kind == "ident" and token.upper in WRITE_KEYWORDS
+        and not (index and tokens[index - 1].kind == "op" and tokens[index - 1].value == ".")
+        for index, token in enumerate(tokens)
+    )
+
+
+def write_targets(text):
+    """
+    写查询的模式中出现的节点标签和关系类型（:标签 和 [:类型]）
+
+    Returns:
+        (标签集合, 关系类型集合)；无法识别或模式中没有标签和关系类型时返回 None，表示可能涉及任意数据
+    """
+    try:
+        tokens = tokenize(text)
+    except UnsupportedQuery:
+        return None
+    labels, rel_types = set(), set()
+    brackets = []
+    for index, token in enumerate(tokens):
+        if token.kind != "op":
+            continue
+        if token.value in ("(", "[", "{"):
+            brackets.append(token.value)
+        elif token.value in (")", "]", "}"):
+            if brackets:
+                brackets.pop()
+        elif (token.value in (":", "|") and brackets and brackets[-1] in ("(", "[")
+              and index + 1 < len(tokens) and tokens[index + 1].kind == "ident"):
+            (labels if brackets[-1] == "(" else rel_types).add(tokens[index + 1].value)
+    if not labels and not rel_types:
+        return None
+    return labels, rel_types
+
+
+# ---------------------------------------------------------------- 表达式求值辅助
+
+def _property(value, key, env):
+    if value is None:
+        return None
+    if isinstance(value, NodeRef):
+        return env.graph.node_property(value.id, key)
+    if isinstance(value, RelRef):
+        return env.graph.relationship_properties(value.id).get(key)
+    if isinstance(value, dict):
+        return value.get(key)
+    return None
+
+
+def _compare(op, left, right):
+    if left is None or right is None:
+        return None
+    if op == "=":
+        return left == right
+    if op == "<>":
+        return left != right
+    try:
+        if op == "<":
+            return left < right
+        if op == ">":
+            return left > right
+        if op == "<=":
+            return left <= right
+        if op == ">=":
+            return left >= right
+    except TypeError:
+        return None
+    raise UnsupportedQuery(f"不支持的比较运算: {op}")
+
+
+def _string_op(op, left, right):
+    if not isinstance(left, str) or not isinstance(right, str):
+        return None
+    if op == "CONTAINS":
+        return right in left
+    if op == "STARTS":
+        return left.startswith(right)
+    return left.endswith(right)
+
+
+def _arithmetic(op, left, right):
+    if left is None or right is None:
+        return None
+    if op == "+":
+        return left + right
+    if op == "-":
+        return left - right
+    if op == "*":
+        return left * right
+    if op == "%":
+        return left % right
+    # 整数相除截断取整，与 Cypher 一致
+    if isinstance(left, int) and isinstance(right, int) and not isinstance(left, bool):
+        if right == 0:
+            raise ZeroDivisionError("整数除以零")
+        return int(left / right)
+    if right == 0:
+        return math.nan if left == 0 else math.copysign(math.inf, left)
+    return left / right
+
+
+def _to_float(value):
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_integer(value):
+    try:
+        return None if value is None else int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _size(value):
+    return None if value is None else len(value)
+
+
+def _lower(value):
+    return value.lower() if isinstance(value, str) else None
+
+
+def _upper(value):
+    return value.upper() if isinstance(value, str) else None
+
+
+def _trim(value):
+    return value.strip() if isinstance(value, str) else None
+
+
+def _to_string(value):
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _round(value):
+    return None if value is None else float(math.floor(value + 0.5))
+
+
+# 单参数标量函数：名称（小写）→ 实现，参数为 null 时返回 null
+SCALAR_FUNCTIONS = {
+    "tolower": _lower,
+    "toupper": _upper,
+    "trim": _trim,
+    "tostring": _to_string,
+    "tofloat": _to_float,
+    "tointeger": _to_integer,
+    "size": _size,
+    "length": _size,
+    "abs": lambda value: None if value is None else abs(value),
+    "round": _round,
+}
+
+
+def _hashable(value):
+    if isinstance(value, list):
+        return tuple(_hashable(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _hashable(item)) for key, item in value.items()))
+    return value
+
+
+def _order_key(value):
+    """排序键：数字、字符串、布尔依次排列，null 在升序时排在最后"""
+    if value is None:
+        return (9, 0)
+    if isinstance(value, bool):
+        return (2, value)
+    if isinstance(value, (int, float)):
+        return (0, value)
+    if isinstance(value, str):
+        return (1, value)
+    return (3, str(value))
+
+
+# ---------------------------------------------------------------- 语法分析
+
+class Aggregate:
+    """投影中的一个聚合调用"""
+
+    def __init__(self, name, distinct, argument, variable=None):
+        self.name = name
+        self.distinct = distinct
+        self.argument = argument
+        # 参数是单个变量时的变量名，用于计数捷径
+        self.variable = variable
+
+    def compute(self, rows, env):
+        if self.argument is None:
+            # count(*)
+            return len(rows)
+        values = [self.argument(row, env) for row in rows]
+        values = [value for value in values if value is not None]
+        if self.distinct:
+            seen = set()
+            unique = []
+            for value in values:
+                key = _hashable(value)
+                if key not in seen:
+                    seen.add(key)
+                    unique.append(value)
+            values = unique
+        if self.name == "count":
+            return len(values)
+        if self.name == "collect":
+            return values
+        if self.name == "sum":
+            return sum(values) if values else 0
+        if not values:
+            return None
+        if self.name == "avg":
+            return sum(values) / len(values)
+        ordered = sorted(values, key=_order_key)
+        return ordered[0] if self.name == "min" else ordered[-1]
+
+
+class NodePattern:
+    def __init__(self, var, labels, properties):
+        self.var = var
+        self.labels = labels
+        self.properties = properties
+
+
+class RelPattern:
+    def __init__(self, var, types, direction, properties):
+        self.var = var
+        self.types = types
+        self.direction = direction
+        self.properties = properties
+
+    def reversed(self):
+        flipped = {"out": "in", "in": "out"}.get(self.direction, self.direction)
+        return RelPattern(self.var, self.types, flipped, self.properties)
+
+
+class PathPattern:
+    def __init__(self, nodes, rels):
+        self.nodes = nodes
+        self.rels = rels
+
+    def reversed(self):
+        return PathPattern(self.nodes[::-1], [rel.reversed() for rel in self.rels[::-1]])
+
+    def variables(self):
+        names = [node.var for node in self.nodes] + [rel.var for rel in self.rels]
+        return [name for name in names if name]
+
+
+class Projection:
+    """WITH / RETURN 子句"""
+
+    def __init__(self, items, distinct, aggregates, order, skip, limit, where, final):
+        self.items = items
+        self.distinct = distinct
+        self.aggregates = aggregates
+        self.order = order
+        self.skip = skip
+        self.limit = limit
+        self.where = where
+        self.final = final
+
+
+class Parser:
+    """把查询文本解析为子句列表，表达式编译为闭包 fn(scope, env)"""
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.pos = 0
+        self.labels = set()
+        # 当前投影中的聚合调用，解析非投影表达式时为 None
+        self._aggregates = None
+
+    # 基础操作
+    def peek(self, offset=0):
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def next(self):
+        token = self.peek()
+        if token is None:
+            raise UnsupportedQuery("查询意外结束")
+        self.pos += 1
+        return token
+
+    def at_keyword(self, *words, offset=0):
+        token = self.peek(offset)
+        return token is not None and token.kind == "ident" and token.upper in words
+
+    def accept_keyword(self, *words):
+        if self.at_keyword(*words):
+            return self.next()
+        return None
+
+    def expect_keyword(self, word):
+        if not self.accept_keyword(word):
+            raise UnsupportedQuery(f"缺少关键字 {word}")
+
+    def at_op(self, value, offset=0):
+        token = self.peek(offset)
+        return token is not None and token.kind == "op" and token.value == value
+
+    def accept_op(self, value):
+        if self.at_op(value):
+            return self.next()
+        return None
+
+    def expect_op(self, value):
+        if not self.accept_op(value):
+            token = self.peek()
+            raise UnsupportedQuery(f"缺少 {value!r}，遇到 {token.value if token else '结尾'!r}")
+
+    def identifier(self):
+        token = self.next()
+        if token.kind != "ident":
+            raise UnsupportedQuery(f"应为标识符，遇到 {token.value!r}")
+        return token.value
+
+    def at_pattern(self):
+        """当前位置是否为关系模式，如 (n)--() 或 (n)-[:t]->(m)：配对的括号后紧跟关系"""
+        if not self.at_op("("):
+            return False
+        depth = 0
+        offset = 0
+        while True:
+            token = self.peek(offset)
+            if token is None:
+                return False
+            if token.kind == "op" and token.value == "(":
+                depth += 1
+            elif token.kind == "op" and token.value == ")":
+                depth -= 1
+                if depth == 0:
+                    break
+            offset += 1
+        if self.at_op("<-", offset + 1):
+            return True
+        return self.at_op("-", offset + 1) and any(self.at_op(op, offset + 2) for op in ("-", "->", "["))
+
+    # 查询结构
+    def parse(self):
+        query = self.parse_union()
+        if self.peek() is not None:
+            raise UnsupportedQuery(f"无法解析: {self.peek().value!r}")
+        return query
+
+    def parse_union(self):
+        parts = [self.parse_single()]
+        distinct = False
+        while self.accept_keyword("UNION"):
+            if not self.accept_keyword("ALL"):
+                distinct = True
+            parts.append(self.parse_single())
+        return parts, distinct
+
+    def parse_single(self):
+        clauses = []
+        while True:
+            token = self.peek()
+            if token is None or self.at_op("}") or self.at_keyword("UNION"):
+                break
+            if token.kind != "ident":
+                raise UnsupportedQuery(f"无法解析: {token.value!r}")
+            if token.upper in UNSUPPORTED_KEYWORDS:
+                raise UnsupportedQuery(f"不支持的子句: {token.upper}")
+            if self.accept_keyword("OPTIONAL"):
+                self.expect_keyword("MATCH")
+                clauses.append(self.parse_match(optional=True))
+            elif self.accept_keyword("MATCH"):
+                clauses.append(self.parse_match(optional=False))
+            elif self.accept_keyword("WITH"):
+                clauses.append(self.parse_projection(final=False))
+            elif self.accept_keyword("RETURN"):
+                clauses.append(self.parse_projection(final=True))
+            elif self.accept_keyword("CALL"):
+                if not self.accept_op("{"):
+                    raise UnsupportedQuery("不支持调用过程")
+                subquery = self.parse_union()
+                self.expect_op("}")
+                clauses.append(("call", subquery))
+            else:
+                raise UnsupportedQuery(f"不支持的子句: {token.value}")
+        if not clauses or not isinstance(clauses[-1], Projection) or not clauses[-1].final:
+            raise UnsupportedQuery("查询必须以 RETURN 结束")
+        return clauses
+
+    def parse_match(self, optional):
+        patterns = [self.parse_path()]
+        while self.accept_op(","):
+            patterns.append(self.parse_path())
+        where = self.parse_expression() if self.accept_keyword("WHERE") else None
+        return ("match", patterns, optional, where)
+
+    def parse_path(self):
+        if self.peek() and self.peek().kind == "ident" and self.at_op("=", 1):
+            raise UnsupportedQuery("不支持路径变量")
+        if not self.at_op("("):
+            raise UnsupportedQuery("不支持的模式")
+        nodes = [self.parse_node()]
+        rels = []
+        while self.at_op("-") or self.at_op("<-"):
+            rels.append(self.parse_rel())
+            nodes.append(self.parse_node())
+        return PathPattern(nodes, rels)
+
+    def parse_node(self):
+        self.expect_op("(")
+        var = None
+        if self.peek() and self.peek().kind == "ident":
+            var = self.identifier()
+        labels = []
+        while self.accept_op(":"):
+            label = self.identifier()
+            labels.append(label)
+            self.labels.add(label)
+        properties = self.parse_property_map() if self.at_op("{") else {}
+        self.expect_op(")")
+        return NodePattern(var, labels, properties)
+
+    def parse_rel(self):
+        left_arrow = bool(self.accept_op("<-"))
+        if not left_arrow:
+            self.expect_op("-")
+        var = None
+        types = []
+        properties = {}
+        if self.accept_op("["):
+            if self.peek() and self.peek().kind == "ident":
+                var = self.identifier()
+            if self.accept_op(":"):
+                types.append(self.identifier())
+                while self.accept_op("|"):
+                    self.accept_op(":")
+                    types.append(self.identifier())
+            if self.at_op("*"):
+                raise UnsupportedQuery("不支持变长关系")
+            if self.at_op("{"):
+                properties = self.parse_property_map()
+            self.expect_op("]")
+        right_arrow = bool(self.accept_op("->"))
+        if not right_arrow:
+            self.expect_op("-")
+        if left_arrow and right_arrow:
+            raise UnsupportedQuery("关系方向无效")
+        direction = "in" if left_arrow else "out" if right_arrow else "both"
+        return RelPattern(var, types, direction, properties)
+
+    def parse_property_map(self):
+        self.expect_op("{")
+        properties = {}
+        if not self.at_op("}"):
+            while True:
+                key = self.identifier()
+                self.expect_op(":")
+                properties[key] = self.parse_expression()
+                if not self.accept_op(","):
+                    break
+        self.expect_op("}")
+        return properties
+
+    def parse_projection(self, final):
+        distinct = bool(self.accept_keyword("DISTINCT"))
+        if self.at_op("*"):
+            raise UnsupportedQuery("不支持 RETURN *")
+        self._aggregates = []
+        items = []
+        while True:
+            start = self.peek().start if self.peek() else len(self.text)
+            aggregate_count = len(self._aggregates)
+            expression = self.parse_expression()
+            end = self.tokens[self.pos - 1].end
+            if self.accept_keyword("AS"):
+                alias = self.identifier()
+            else:
+                alias = self.text[start:end]
+            items.append((alias, expression, len(self._aggregates) > aggregate_count))
+            if not self.accept_op(","):
+                break
+        aggregates = self._aggregates
+        self._aggregates = None
+
+        where = None
+        if not final and self.accept_keyword("WHERE"):
+            where = self.parse_expression()
+        order = []
+        if self.accept_keyword("ORDER"):
+            self.expect_keyword("BY")
+            while True:
+                self._aggregates = aggregates
+                expression = self.parse_expression()
+                self._aggregates = None
+                descending = False
+                if self.accept_keyword("DESC", "DESCENDING"):
+                    descending = True
+                else:
+                    self.accept_keyword("ASC", "ASCENDING")
+                order.append((expression, descending))
+                if not self.accept_op(","):
+                    break
+        skip = self.parse_expression() if self.accept_keyword("SKIP") else None
+        limit = self.parse_expression() if self.accept_keyword("LIMIT") else None
+        if not final and where is None and self.accept_keyword("WHERE"):
+            where = self.parse_expression()
+        return Projection(items, distinct, aggregates, order, skip, limit, where, final)
+
+    # 表达式（按优先级从低到高）
+    def parse_expression(self):
+        return self.parse_or()
+
+    def parse_or(self):
+        left = self.parse_and()
+        while self.accept_keyword("OR", "XOR"):
+            right = self.parse_and()
+            left = _or(left, right)
+        return left
+
+    def parse_and(self):
+        left = self.parse_not()
+        while self.accept_keyword("AND"):
+            right = self.parse_not()
+            left = _and(left, right)
+        return left
+
+    def parse_not(self):
+        if self.accept_keyword("NOT"):
+            operand = self.parse_not()
+
+            def negate(scope, env):
+                value = operand(scope, env)
+                return None if value is None else not value
+            return negate
+        return self.parse_comparison()
+
+    def parse_comparison(self):
+        left = self.parse_additive()
+        while True:
+            token = self.peek()
+            if token is None:
+                return left
+            if token.kind == "op" and token.value in ("=", "<>", "<", ">", "<=", ">="):
+                self.next()
+                left = _binary(_compare, token.value, left, self.parse_additive())
+            elif self.accept_keyword("CONTAINS"):
+                left = _binary(_string_op, "CONTAINS", left, self.parse_additive())
+            elif self.at_keyword("STARTS", "ENDS") and self.at_keyword("WITH", offset=1):
+                op = self.next().upper
+                self.next()
+                left = _binary(_string_op, op, left, self.parse_additive())
+            elif self.accept_keyword("IN"):
+                left = _in(left, self.parse_additive())
+            elif self.accept_keyword("IS"):
+                negated = bool(self.accept_keyword("NOT"))
+                self.expect_keyword("NULL")
+                left = _is_null(left, negated)
+            else:
+                return left
+
+    def parse_additive(self):
+        left = self.parse_multiplicative()
+        while self.at_op("+") or self.at_op("-"):
+            op = self.next().value
+            left = _binary(_arithmetic, op, left, self.parse_multiplicative())
+        return left
+
+    def parse_multiplicative(self):
+        left = self.parse_unary()
+        while self.at_op("*") or self.at_op("/") or self.at_op("%"):
+            op = self.next().value
+            left = _binary(_arithmetic, op, left, self.parse_unary())
+        return left
+
+    def parse_unary(self):
+        if self.accept_op("-"):
+            operand = self.parse_unary()
+            return lambda scope, env: None if operand(scope, env) is None else -operand(scope, env)
+        return self.parse_postfix()
+
+    def parse_postfix(self):
+        expression = self.parse_atom()
+        while True:
+            if self.at_op(".") and self.peek(1) and self.peek(1).kind == "ident":
+                self.next()
+                expression = _property_access(expression, self.identifier())
+            elif self.accept_op("["):
+                start = None if self.at_op(".") else self.parse_expression()
+                if self.at_op(".") and self.at_op(".", 1):
+                    # 切片 [start..end]，两端都可以省略
+                    self.next()
+                    self.next()
+                    end = None if self.at_op("]") else self.parse_expression()
+                    self.expect_op("]")
+                    expression = _slice(expression, start, end)
+                else:
+                    self.expect_op("]")
+                    expression = _index(expression, start)
+            else:
+                return expression
+
+    def parse_atom(self):
+        token = self.next()
+        if token.kind == "number":
+            value = float(token.value) if "." in token.value else int(token.value)
+            return lambda scope, env: value
+        if token.kind == "string":
+            value = _unquote(token.value)
+            return lambda scope, env: value
+        if token.kind == "param":
+            name = token.value[1:]
+
+            def param(scope, env):
+                if name not in env.params:
+                    raise UnsupportedQuery(f"缺少参数 ${name}")
+                return env.params[name]
+            return param
+        if token.kind == "op" and token.value == "(":
+            if self.at_op(")") or (self.peek() and self.peek().kind == "ident" and self.at_op(":", 1)):
+                raise UnsupportedQuery("不支持模式谓词")
+            expression = self.parse_expression()
+            if self.at_op("-") or self.at_op("<-"):
+                raise UnsupportedQuery("不支持模式谓词")
+            self.expect_op(")")
+            return expression
+        if token.kind == "op" and token.value == "[":
+            elements = []
+            if not self.at_op("]"):
+                while True:
+                    elements.append(self.parse_expression())
+                    if not self.accept_op(","):
+                        break
+            self.expect_op("]")
+            return lambda scope, env: [element(scope, env) for element in elements]
+        if token.kind == "op" and token.value == "{":
+            self.pos -= 1
+            entries = self.parse_property_map()
+            return lambda scope, env: {key: value(scope, env) for key, value in entries.items()}
+        if token.kind != "ident":
+            raise UnsupportedQuery(f"无法解析表达式: {token.value!r}")
+
+        if token.upper == "TRUE":
+            return lambda scope, env: True
+        if token.upper == "FALSE":
+            return lambda scope, env: False
+        if token.upper == "NULL":
+            return lambda scope, env: None
+        if token.upper == "CASE":
+            return self.parse_case()
+        if self.at_op("("):
+            return self.parse_function(token.value)
+
+        name = token.value
+        return lambda scope, env: scope.get(name)
+
+    def parse_case(self):
+        subject = None if self.at_keyword("WHEN") else self.parse_expression()
+        branches = []
+        while self.accept_keyword("WHEN"):
+            condition = self.parse_expression()
+            self.expect_keyword("THEN")
+            branches.append((condition, self.parse_expression()))
+        default = self.parse_expression() if self.accept_keyword("ELSE") else None
+        self.expect_keyword("END")
+
+        def case(scope, env):
+            value = subject(scope, env) if subject else None
+            for condition, result in branches:
+                matched = condition(scope, env)
+                if (matched is True) if subject is None else (matched == value and value is not None):
+                    return result(scope, env)
+            return default(scope, env) if default else None
+        return case
+
+    def parse_function(self, name):
+        self.expect_op("(")
+        lowered = name.lower()
+        if lowered in AGGREGATES:
+            if self._aggregates is None:
+                raise UnsupportedQuery(f"{name} 只能用于 WITH / RETURN")
+            distinct = bool(self.accept_keyword("DISTINCT"))
+            variable = None
+            if lowered == "count" and self.accept_op("*"):
+                argument = None
+            else:
+                if self.peek() and self.peek().kind == "ident" and self.at_op(")", 1):
+                    variable = self.peek().value
+                outer, self._aggregates = self._aggregates, None
+                argument = self.parse_expression()
+                self._aggregates = outer
+            self.expect_op(")")
+            index = len(self._aggregates)
+            self._aggregates.append(Aggregate(lowered, distinct, argument, variable))
+            return lambda scope, env: scope[AGGREGATE_SLOT][index]
+
+        if lowered == "size" and self.at_pattern():
+            # size((n)--())：模式的匹配数量，模式中的变量取自当前作用域
+            pattern = self.parse_path()
+            self.expect_op(")")
+            return lambda scope, env: sum(1 for _ in _match_path(pattern, scope, frozenset(), env))
+
+        arguments = []
+        if not self.at_op(")"):
+            while True:
+                arguments.append(self.parse_expression())
+                if not self.accept_op(","):
+                    break
+        self.expect_op(")")
+
+        if lowered == "coalesce":
+            def coalesce(scope, env):
+                for argument in arguments:
+                    value = argument(scope, env)
+                    if value is not None:
+                        return value
+                return None
+            return coalesce
+        if len(arguments) != 1:
+            raise UnsupportedQuery(f"不支持的函数调用: {name}")
+        argument = arguments[0]
+        if lowered == "type":
+            return lambda scope, env: _rel_type(argument(scope, env))
+        if lowered == "labels":
+            return lambda scope, env: _labels(argument(scope, env), env)
+        if lowered in ("startnode", "endnode"):
+            side = "start" if lowered == "startnode" else "end"
+            return lambda scope, env: _endpoint(argument(scope, env), side)
+        if lowered in ("id", "elementid"):
+            return lambda scope, env: _identity(argument(scope, env))
+        if lowered == "keys":
+            return lambda scope, env: _keys(argument(scope, env), env)
+        if lowered == "exists":
+            return lambda scope, env: argument(scope, env) is not None
+        if lowered in SCALAR_FUNCTIONS:
+            function = SCALAR_FUNCTIONS[lowered]
+            return lambda scope, env: function(argument(scope, env))
+        raise UnsupportedQuery(f"不支持的函数: {name}")
+
+
+def _unquote(text):
+    body = text[1:-1]
+    return re.sub(r"\\(.)", lambda m: {"n": "\n", "t": "\t"}.get(m.group(1), m.group(1)), body)
+
+
+def _or(left, right):
+    def evaluate(scope, env):
+        a = left(scope, env)
+        if a is True:
+            return True
+        b = right(scope, env)
+        if b is True:
+            return True
+        return None if a is None or b is None else False
+    return evaluate
+
+
+def _and(left, right):
+    def evaluate(scope, env):
+        a = left(scope, env)
+        if a is False:
+            return False
+        b = right(scope, env)
+        if b is False:
+            return False
+        return None if a is None or b is None else True
+    return evaluate
+
+
+def _binary(function, op, left, right):
+    return lambda scope, env: function(op, left(scope, env), right(scope, env))
+
+
+def _in(left, right):
+    def evaluate(scope, env):
+        value, values = left(scope, env), right(scope, env)
+        if value is None or values is None:
+            return None
+        return value in values
+    return evaluate
+
+
+def _is_null(operand, negated):
+    if negated:
+        return lambda scope, env: operand(scope, env) is not None
+    return lambda scope, env: operand(scope, env) is None
+
+
+def _property_access(expression, key):
+    return lambda scope, env: _property(expression(scope, env), key, env)
+
+
+def _index(expression, index):
+    def evaluate(scope, env):
+        value, position = expression(scope, env), index(scope, env)
+        if value is None or position is None:
+            return None
+        try:
+            return value[position]
+        except (IndexError, KeyError, TypeError):
+            return None
+    return evaluate
+
+
+def _slice(expression, start, end):
+    def evaluate(scope, env):
+        value = expression(scope, env)
+        low = start(scope, env) if start else 0
+        high = end(scope, env) if end else None
+        if not isinstance(value, list) or low is None or (end and high is None):
+            return None
+        return value[low:high]
+    return evaluate
+
+
+def _rel_type(value):
+    return value.type if isinstance(value, RelRef) else None
+
+
+def _endpoint(value, side):
+    return NodeRef(getattr(value, side)) if isinstance(value, RelRef) else None
+
+
+def _labels(value, env):
+    return [env.graph.node_label(value.id)] if isinstance(value, NodeRef) else None
+
+
+def _identity(value):
+    return value.id if isinstance(value, (NodeRef, RelRef)) else None
+
+
+def _keys(value, env):
+    if isinstance(value, NodeRef):
+        return list(env.graph.node_properties(value.id))
+    if isinstance(value, RelRef):
+        return list(env.graph.relationship_properties(value.id))
+    if isinstance(value, dict):
+        return list(value)
+    return None
+
+
+@lru_cache(maxsize=512)
+def parse(text):
+    """
+    解析查询（按查询文本缓存）
+
+    Returns:
+        ((子查询列表, 是否去重), 查询涉及的标签集合)
+    """
+    parser = Parser(text)
+    return parser.parse(), frozenset(parser.labels)
+
+
+# ---------------------------------------------------------------- 执行
+
+def execute(text, params, graph, max_rows=DEFAULT_MAX_ROWS) -> List[Dict]:
+    """
+    执行查询
+
+    Args:
+        text: Cypher 查询
+        params: 参数字典
+        graph: 提供 node_label / node_property / neighbors 等方法的图（见 EmbeddedGraph）
+        max_rows: 中间结果行数上限
+
+    Returns:
+        结果字典列表，节点和关系转换为属性字典
+    """
+    query, labels = parse(text)
+    unknown = labels - set(graph.labels)
+    if unknown:
+        raise UnsupportedQuery(f"内嵌图中没有标签: {sorted(unknown)}")
+    env = Env(graph, params or {}, max_rows)
+    return [
+        {column: _export(value, graph) for column, value in record.items()}
+        for record in _run_union(query, env)
+    ]
+
+
+def _export(value, graph):
+    if isinstance(value, NodeRef):
+        return dict(graph.node_properties(value.id))
+    if isinstance(value, RelRef):
+        return dict(graph.relationship_properties(value.id))
+    if isinstance(value, list):
+        return [_export(item, graph) for item in value]
+    if isinstance(value, dict):
+        return {key: _export(item, graph) for key, item in value.items()}
+    return value
+
+
+def _run_union(query, env):
+    parts, distinct = query
+    records = []
+    for clauses in parts:
+        records.extend(_run_single(clauses, env))
+    if distinct:
+        seen = set()
+        unique = []
+        for record in records:
+            key = _hashable(list(record.values()))
+            if key not in seen:
+                seen.add(key)
+                unique.append(record)
+        records = unique
+    return records
+
+
+def _run_single(clauses, env):
+    shortcut = _count_shortcut(clauses, env)
+    if shortcut is not None:
+        return shortcut
+    rows = [{}]
+    for clause in clauses:
+        if isinstance(clause, Projection):
+            rows = _project(clause, rows, env)
+        elif clause[0] == "match":
+            rows = _match(clause, rows, env)
+        else:
+            # 不导入外部变量的子查询只执行一次，与每一行组合
+            results = _run_union(clause[1], env)
+            rows = [{**row, **result} for row in rows for result in results]
+            env.count_rows(len(rows))
+    return rows
+
+
+def _count_shortcut(clauses, env):
+    """
+    标签计数和关系计数的捷径：MATCH 单个节点或单跳模式后只 RETURN count(变量)，
+    直接用图中预先统计的数量回答，不逐行匹配
+    """
+    if len(clauses) != 2 or not isinstance(clauses[1], Projection) or isinstance(clauses[0], Projection):
+        return None
+    match, projection = clauses
+    if match[0] != "match" or match[2] or match[3] is not None or len(match[1]) != 1:
+        return None
+    if len(projection.items) != 1 or projection.where is not None or len(projection.aggregates) != 1:
+        return None
+    aggregate = projection.aggregates[0]
+    pattern = match[1][0]
+    if aggregate.name != "count" or aggregate.distinct:
+        return None
+    if any(node.properties or len(node.labels) > 1 for node in pattern.nodes):
+        return None
+    if any(rel.properties for rel in pattern.rels):
+        return None
+
+    labels = [node.labels[0] if node.labels else None for node in pattern.nodes]
+    graph = env.graph
+    if not pattern.rels:
+        if aggregate.argument is not None and (pattern.nodes[0].var is None
+                                               or aggregate.variable != pattern.nodes[0].var):
+            return None
+        count = graph.label_size(labels[0]) if labels[0] else graph.node_count
+    elif len(pattern.rels) == 1:
+        rel = pattern.rels[0]
+        if aggregate.argument is not None and (rel.var is None or aggregate.variable != rel.var):
+            return None
+        count = graph.pattern_count(labels[0], rel.types, labels[1], rel.direction)
+    else:
+        return None
+
+    alias, expression, _ = projection.items[0]
+    return [{alias: expression({AGGREGATE_SLOT: [count]}, env)}]
+
+
+def _project(clause, rows, env):
+    if clause.aggregates:
+        records = _aggregate(clause, rows, env)
+    else:
+        records = []
+        for row in rows:
+            record = {alias: expression(row, env) for alias, expression, _ in clause.items}
+            # 排序可以引用投影前的变量
+            records.append((record, {**row, **record}))
+
+    if clause.distinct:
+        seen = set()
+        unique = []
+        for record, scope in records:
+            key = _hashable(list(record.values()))
+            if key not in seen:
+                seen.add(key)
+                unique.append((record, scope))
+        records = unique
+
+    if clause.order:
+        for expression, descending in reversed(clause.order):
+            records.sort(key=lambda item: _order_key(expression(item[1], env)), reverse=descending)
+
+    if clause.skip is not None:
+        records = records[int(clause.skip({}, env)):]
+    if clause.limit is not None:
+        records = records[:int(clause.limit({}, env))]
+
+    results = [record for record, _ in records]
+    if clause.where is not None:
+        results = [record for record in results if clause.where(record, env) is True]
+    return results
+
+
+def _aggregate(clause, rows, env):
+    keys = [(alias, expression) for alias, expression, aggregated in clause.items if not aggregated]
+    groups = {}
+    for row in rows:
+        values = [expression(row, env) for _, expression in keys]
+        group_key = _hashable(values)
+        if group_key not in groups:
+            groups[group_key] = (values, row, [])
+        groups[group_key][2].append(row)
+
+    if not groups and not keys:
+        # 没有分组键时，空输入也返回一行（如 count 为 0）
+        groups[()] = ([], {}, [])
+
+    records = []
+    for values, first_row, members in groups.values():
+        aggregated = [aggregate.compute(members, env) for aggregate in clause.aggregates]
+        scope = dict(first_row)
+        scope[AGGREGATE_SLOT] = aggregated
+        record = {}
+        key_values = iter(values)
+        for alias, expression, is_aggregate in clause.items:
+            record[alias] = expression(scope, env) if is_aggregate else next(key_values)
+        sort_scope = {**scope, **record}
+        records.append((record, sort_scope))
+    return records
+
+
+def _match(clause, rows, env):
+    _, patterns, optional, where = clause
+    new_vars = []
+    for pattern in patterns:
+        new_vars.extend(pattern.variables())
+    _check_cartesian(patterns, rows, env)
+    results = []
+    for row in rows:
+        matches = [(row, frozenset())]
+        for pattern in patterns:
+            expanded = []
+            for scope, used in matches:
+                for match in _match_path(pattern, scope, used, env):
+                    expanded.append(match)
+                    env.count_rows(1)
+            matches = expanded
+        matched = [scope for scope, _ in matches]
+        if where is not None:
+            matched = [scope for scope in matched if where(scope, env) is True]
+        if optional and not matched:
+            null_row = dict(row)
+            for name in new_vars:
+                null_row.setdefault(name, None)
+            results.append(null_row)
+        else:
+            results.extend(matched)
+    return results
+
+
+def _check_cartesian(patterns, rows, env):
+    """与已绑定变量无关的模式相互组合成笛卡尔积，预估结果过大时直接交给 Neo4j"""
+    bound = set(rows[0]) if rows else set()
+    estimate = max(len(rows), 1)
+    for pattern in patterns:
+        variables = set(pattern.variables())
+        if not variables & bound:
+            estimate *= min(_anchor_cost(node, {}, env.graph) for node in pattern.nodes)
+        bound |= variables
+    if estimate > env.max_rows:
+        raise UnsupportedQuery(f"笛卡尔积预估 {estimate} 行，超过上限")
+
+
+def _anchor_cost(node, scope, graph):
+    """从该节点开始匹配的代价估计，越小越好"""
+    if node.var and node.var in scope:
+        return 0
+    if "name" in node.properties:
+        return 1
+    if node.labels:
+        return 2 + graph.label_size(node.labels[0])
+    return 2 + graph.node_count
+
+
+def _match_path(pattern, scope, used, env):
+    if _anchor_cost(pattern.nodes[-1], scope, env.graph) < _anchor_cost(pattern.nodes[0], scope, env.graph):
+        pattern = pattern.reversed()
+    first = pattern.nodes[0]
+    for node_id in _candidates(first, scope, env):
+        bound = _bind_node(first, node_id, scope, env)
+        if bound is not None:
+            yield from _expand(pattern, 0, node_id, bound, used, env)
+
+
+def _candidates(node, scope, env):
+    graph = env.graph
+    if node.var and node.var in scope:
+        value = scope[node.var]
+        return [value.id] if isinstance(value, NodeRef) else []
+    if "name" in node.properties:
+        name = node.properties["name"](scope, env)
+        return graph.find_by_name(name, node.labels[0] if node.labels else None)
+    if node.labels:
+        return graph.label_nodes(node.labels[0])
+    return range(graph.node_count)
+
+
+def _bind_node(node, node_id, scope, env):
+    """检查节点是否满足模式，满足时返回绑定后的作用域，否则返回 None"""
+    graph = env.graph
+    if node.var and node.var in scope:
+        value = scope[node.var]
+        if not isinstance(value, NodeRef) or value.id != node_id:
+            return None
+    for label in node.labels:
+        if graph.node_label(node_id) != label:
+            return None
+    for key, expression in node.properties.items():
+        if graph.node_property(node_id, key) != expression(scope, env):
+            return None
+    if node.var and node.var not in scope:
+        scope = dict(scope)
+        scope[node.var] = NodeRef(node_id)
+    return scope
+
+
+def _expand(pattern, index, node_id, scope, used, env):
+    if index == len(pattern.rels):
+        yield scope, used
+        return
+    rel = pattern.rels[index]
+    target = pattern.nodes[index + 1]
+    graph = env.graph
+    for rel_id, rel_type, other, outgoing in graph.neighbors(node_id, rel.direction, rel.types):
+        if rel_id in used:
+            continue
+        if rel.properties:
+            properties = graph.relationship_properties(rel_id)
+            if any(properties.get(key) != expression(scope, env) for key, expression in rel.properties.items()):
+                continue
+        if rel.var:
+            value = scope.get(rel.var)
+            if value is not None and (not isinstance(value, RelRef) or value.id != rel_id):
+                continue
+        bound = _bind_node(target, other, scope, env)
+        if bound is None:
+            continue
+        if rel.var and rel.var not in bound:
+            bound = dict(bound)
+            if outgoing:
+                bound[rel.var] = RelRef(rel_id, rel_type, node_id, other)
+            else:
+                bound[rel.var] = RelRef(rel_id, rel_type, other, node_id)
+        yield from _expand(pattern, index + 1, other, bound, used | {rel_id}, env)
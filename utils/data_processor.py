@@ -87,7 +87,7 @@ def process_neo4j_results(results, entity_name):
         logger.error(traceback.format_exc())
         return [], []
 
-def get_entity_options(db_connector, entity_type, search_term=""):
+def get_entity_options(db_connector, entity_type, search_term="", ttl=None):
     """
     获取实体选项列表
     
@@ -95,6 +95,7 @@ def get_entity_options(db_connector, entity_type, search_term=""):
     - db_connector: 数据库连接器
     - entity_type: 实体类型
     - search_term: 搜索词
+    - ttl: 结果缓存秒数（见 Neo4jConnector.query），默认不缓存
     
     返回:
     - 实体名称列表
@@ -110,7 +111,7 @@ def get_entity_options(db_connector, entity_type, search_term=""):
         query_parts.append("RETURN n.name AS name ORDER BY name LIMIT 100")
         query = " ".join(query_parts)
 
-        results = db_connector.query(query, params)
+        results = db_connector.query(query, params, ttl=ttl)
         return [record["name"] for record in results]
     except Exception as e:
         logger.error(f"获取实体列表失败: {e}")
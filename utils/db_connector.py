@@ -2,60 +2,278 @@
 数据库连接器，用于处理与Neo4j的连接和查询
 """
 import logging
-from py2neo import Graph
 import sys
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 
 # 添加项目根目录到路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import DB_CONFIG
+from config import DB_CONFIG, BACKEND_CONFIG, POOL_CONFIG, QUERY_CACHE_CONFIG
+from src import graph_writes
+from src.connection_registry import DEFAULT_FETCH_SIZE, get_registry
+from utils.graph_backend import UnsupportedQuery, create_backends
+from utils.query_cache import cache_key, get_query_cache, query_tags
 
 logger = logging.getLogger(__name__)
 
+# gather 默认的最大并发数（另受共享连接池每个调用方的名额限制）
+DEFAULT_QUERY_WORKERS = 8
+
+# 标记当前线程是否是 gather 的工作线程
+_gather_state = threading.local()
+
+
+class QueryFailed(Exception):
+    """查询失败，或 gather / query_many 中有调用失败或超时"""
+    
+    def __init__(self, message, results=None, failed=()):
+        super().__init__(message)
+        # 成功完成的调用结果和失败（或超时）的调用名称
+        self.results = results or {}
+        self.failed = list(failed)
+
 class Neo4jConnector:
-    """Neo4j数据库连接器"""
+    """
+    Neo4j数据库连接器
     
-    def __init__(self):
-        """初始化连接器"""
+    查询按配置（config 中的 backend）依次交给各后端执行：默认只有 Neo4j，
+    也可以让内嵌图优先回答只读查询，内嵌图不支持的查询再交给 Neo4j。
+    所有连接器共用进程级连接池（见 src.connection_registry），创建连接器不会新建连接。
+    传入 ttl 的查询使用所有连接器共享的结果缓存（见 utils.query_cache）；
+    写操作之后调用 invalidate 发布改动的标签和关系类型，只失效依赖它们的缓存条目。
+    """
+    
+    def __init__(self, backends=None, caller="default"):
+        """
+        初始化连接器
+        
+        参数:
+        - backends: 后端列表（见 utils.graph_backend），默认按配置创建
+        - caller: 调用方名称（如页面名），共享连接池按调用方限制并发查询数
+        """
+        self.caller = caller
+        self.fetch_size = BACKEND_CONFIG.get("fetch_size", DEFAULT_FETCH_SIZE)
+        self.query_workers = BACKEND_CONFIG.get("query_workers", DEFAULT_QUERY_WORKERS)
+        self.cache = get_query_cache(QUERY_CACHE_CONFIG)
         self.graph = None
-        self.connect()
+        self.backends = backends or []
+        if backends is None:
+            self.connect()
+        else:
+            self.graph = _neo4j_graph(self.backends)
     
     def connect(self):
-        """连接到Neo4j数据库"""
-        try:
-            self.graph = Graph(
-                DB_CONFIG["uri"],
-                auth=(DB_CONFIG["username"], DB_CONFIG["password"])
-            )
-            logger.info("成功连接到Neo4j数据库")
-            return True
-        except Exception as e:
-            logger.error(f"连接Neo4j数据库失败: {e}")
+        """按配置创建查询后端"""
+        get_registry(POOL_CONFIG)
+        self.backends = create_backends(BACKEND_CONFIG, DB_CONFIG, self.caller)
+        self.graph = _neo4j_graph(self.backends)
+        if not self.backends:
             return False
+        logger.info(f"查询后端: {[backend.name for backend in self.backends]}")
+        return True
     
-    def query(self, cypher, params=None):
+    def query(self, cypher, params=None, ttl=None):
         """
         执行Cypher查询并返回结果
         
         参数:
         - cypher: Cypher查询字符串
         - params: 查询参数字典
+        - ttl: 结果缓存秒数，仅用于只读查询；默认不缓存
         
         返回:
-        - 查询结果列表
+        - 查询结果列表，查询失败时为空列表（错误已记录日志）
         """
-        if not self.graph:
-            if not self.connect():
-                return []
-        
         try:
-            params = params or {}
-            result = self.graph.run(cypher, **params).data()
-            return result
-        except Exception as e:
-            logger.error(f"查询执行失败: {e}")
+            return self._query(cypher, params, ttl)
+        except QueryFailed:
             return []
     
+    def _query(self, cypher, params=None, ttl=None):
+        """与 query 相同，但查询失败时抛出 QueryFailed"""
+        params = params or {}
+        if ttl:
+            key = cache_key(cypher, params)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+            generation = self.cache.generation
+        
+        result = self._run(cypher, params)
+        if result is None:
+            raise QueryFailed("查询执行失败")
+        if ttl:
+            self.cache.put(key, result, ttl, query_tags(cypher), generation)
+        return result
+    
+    def gather(self, calls, timeout=None):
+        """
+        并发执行多个互不依赖的调用（通常是只读查询），总耗时取决于最慢的一个而不是全部之和
+        
+        线程数不超过 query_workers 和共享连接池给本调用方的名额，排队的调用在线程池中等待，
+        不会在连接池上等到 acquire_timeout 超时。只有一层并发：被并发执行的调用内部再调用 gather 时，
+        在当前线程中依次执行（多个查询应合并到同一次 gather / query_many 中）。
+        
+        参数:
+        - calls: {名称: 无参可调用对象}
+        - timeout: 等待全部完成的最长秒数，默认一直等待
+        
+        返回:
+        - {名称: 结果}
+        
+        异常:
+        - QueryFailed: 有调用抛出异常或超时（已记录日志），其 results 为成功完成的调用结果
+        """
+        if not calls:
+            return {}
+        if getattr(_gather_state, "active", False):
+            return self._gather_inline(calls)
+        
+        workers = min(len(calls), self.query_workers, get_registry(POOL_CONFIG).caller_limit(self.caller))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gather")
+        
+        def run(call):
+            _gather_state.active = True
+            try:
+                return call()
+            finally:
+                _gather_state.active = False
+        
+        try:
+            futures = {name: executor.submit(run, call) for name, call in calls.items()}
+            wait(futures.values(), timeout=timeout)
+            results, failed = {}, []
+            for name, future in futures.items():
+                if not future.done():
+                    # 已经开始的查询无法中断，在后台执行完后丢弃结果
+                    logger.error(f"并发查询 {name} 超过 {timeout} 秒，已放弃等待")
+                    failed.append(name)
+                elif future.exception():
+                    logger.error(f"并发查询 {name} 失败: {future.exception()}")
+                    failed.append(name)
+                else:
+                    results[name] = future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if failed:
+            raise QueryFailed(f"并发查询失败: {', '.join(map(str, failed))}", results, failed)
+        return results
+    
+    def _gather_inline(self, calls):
+        """在当前线程中依次执行（gather 的工作线程中再次调用 gather 时使用）"""
+        results, failed = {}, []
+        for name, call in calls.items():
+            try:
+                results[name] = call()
+            except Exception as e:
+                logger.error(f"查询 {name} 失败: {e}")
+                failed.append(name)
+        if failed:
+            raise QueryFailed(f"查询失败: {', '.join(map(str, failed))}", results, failed)
+        return results
+    
+    def query_many(self, queries, timeout=None):
+        """
+        并发执行多个互不依赖的只读查询
+        
+        参数:
+        - queries: {名称: (cypher, params, ttl)}，params 和 ttl 可以省略
+        - timeout: 等待全部查询完成的最长秒数，默认一直等待
+        
+        返回:
+        - {名称: 查询结果列表}
+        
+        异常:
+        - QueryFailed: 有查询失败或超时（已记录日志），其 results 为成功完成的查询结果
+        """
+        def call(cypher, params=None, ttl=None):
+            return lambda: self._query(cypher, params, ttl)
+        
+        return self.gather({name: call(*spec) for name, spec in queries.items()}, timeout)
+    
+    def invalidate(self, labels=(), rel_types=()):
+        """
+        发布写操作改动的节点标签和关系类型，失效依赖它们的缓存条目（包括其他进程中的缓存）
+        
+        参数:
+        - labels: 新建、修改或删除过的节点标签，graph_writes.ANY 表示任意标签
+        - rel_types: 新建、修改或删除过的关系类型，graph_writes.ANY 表示任意关系类型
+        """
+        graph_writes.publish(labels, rel_types)
+    
+    def _run(self, cypher, params):
+        """依次交给各后端执行，失败时返回 None（失败结果不缓存）"""
+        if not self.backends:
+            if not self.connect():
+                return None
+        
+        for backend in self.backends:
+            try:
+                return backend.run(cypher, params)
+            except UnsupportedQuery as e:
+                logger.debug(f"{backend.name} 后端不支持该查询: {e}")
+            except Exception as e:
+                logger.error(f"查询执行失败: {e}")
+                return None
+        logger.warning("没有可以执行该查询的后端")
+        return None
+    
+    def stream(self, cypher, params=None, fetch_size=None):
+        """
+        逐条产出查询结果，适合导出、全量扫描等大结果集
+        
+        结果按批从后端读取，内存中最多保留一批；调用方处理得慢时读取也随之暂停。
+        
+        参数:
+        - cypher: Cypher查询字符串
+        - params: 查询参数字典
+        - fetch_size: 每批读取的行数，默认使用配置中的 backend.fetch_size
+        
+        返回:
+        - 结果字典的迭代器
+        """
+        for batch in self.stream_batches(cypher, params, fetch_size):
+            yield from batch
+    
+    def stream_batches(self, cypher, params=None, fetch_size=None):
+        """
+        按批产出查询结果
+        
+        与 query 一样，取第一批之前的错误只记录日志并返回空结果；已经产出结果后的错误直接抛出，
+        避免调用方把不完整的结果当成完整结果。
+        
+        参数:
+        - cypher: Cypher查询字符串
+        - params: 查询参数字典
+        - fetch_size: 每批读取的行数，默认使用配置中的 backend.fetch_size
+        
+        返回:
+        - 结果字典列表的迭代器
+        """
+        if not self.backends:
+            if not self.connect():
+                return
+        
+        params = params or {}
+        fetch_size = fetch_size or self.fetch_size
+        for backend in self.backends:
+            batches = backend.stream(cypher, params, fetch_size)
+            try:
+                first = next(batches, None)
+            except UnsupportedQuery as e:
+                logger.debug(f"{backend.name} 后端不支持该查询: {e}")
+                continue
+            except Exception as e:
+                logger.error(f"查询执行失败: {e}")
+                return
+            if first is None:
+                return
+            yield first
+            yield from batches
+            return
+        logger.warning("没有可以执行该查询的后端")
+    
     def get_node_count(self, label=None):
         """获取节点数量"""
         try:
@@ -94,4 +312,12 @@ class Neo4jConnector:
             return result[0]["count"] if result else 0
         except Exception as e:
             logger.error(f"获取关系数量失败: {e}")
-            return 0 
\ No newline at end of file
+            return 0 
+
+
+def _neo4j_graph(backends):
+    """后端列表中 Neo4j 后端的 py2neo Graph（兼容直接使用 graph 属性的代码）"""
+    for backend in backends:
+        if backend.name == "neo4j":
+            return backend.graph
+    return None
@@ -0,0 +1,407 @@
+"""
+内嵌图后端
+节点和关系的属性存放在 SQLite 中按需读取，名称索引和邻接表（CSR 数组）常驻内存，
+在进程内执行页面和分析工具使用的只读查询，无需连接 Neo4j。
+
+构建（与导入器使用相同的数据文件、字段映射和去重规则）:
+    python -m utils.embedded_graph --data-dir data --output data/embedded_graph.sqlite
+
+然后在 config.json 中配置:
+    "backend": {"type": "hybrid", "embedded_path": "data/embedded_graph.sqlite"}
+
+内嵌图是构建时数据文件的快照。hybrid 模式下写入内嵌图中的标签或关系类型（本进程的写查询、
+src.graph_writes 写入事件，包括其他进程的导入）之后，内嵌图视为过期，查询全部交给 Neo4j，直到重新构建内嵌图。
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from array import array
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from src import graph_writes
+from utils.graph_backend import GraphBackend, UnsupportedQuery
+from utils.cypher_subset import execute, is_write, write_targets
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = [
+    "CREATE TABLE nodes (id INTEGER PRIMARY KEY, label TEXT NOT NULL, name TEXT NOT NULL, properties TEXT NOT NULL)",
+    "CREATE TABLE relationships (id INTEGER PRIMARY KEY, type TEXT NOT NULL, start INTEGER NOT NULL, "
+    "end INTEGER NOT NULL, properties TEXT NOT NULL)",
+    "CREATE TABLE labels (label TEXT PRIMARY KEY)",
+]
+
+INSERT_BATCH = 10000
+
+# 读取其他进程写入事件的最小间隔（秒）
+EVENT_POLL_INTERVAL = 1.0
+
+
+class EmbeddedGraph:
+    """只读的内嵌图"""
+
+    def __init__(self, path: str, cache_size: int = 100000):
+        """
+        加载内嵌图
+
+        Args:
+            path: build_embedded_graph 生成的 SQLite 文件
+            cache_size: 节点和关系属性各自缓存的条目数
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"内嵌图文件不存在: {path}，请先运行 python -m utils.embedded_graph")
+        started = time.time()
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        self.labels = [row[0] for row in self._conn.execute("SELECT label FROM labels ORDER BY rowid")]
+        label_ids = {label: index for index, label in enumerate(self.labels)}
+        self._names = []
+        # 标签和关系类型编号都用 2 字节保存
+        self._node_labels = array("H")
+        self._label_nodes = {label: array("l") for label in self.labels}
+        self._by_name = {label: {} for label in self.labels}
+        for node_id, label, name in self._conn.execute("SELECT id, label, name FROM nodes ORDER BY id"):
+            if label not in label_ids:
+                label_ids[label] = len(self.labels)
+                self.labels.append(label)
+                self._label_nodes[label] = array("l")
+                self._by_name[label] = {}
+            self._names.append(name)
+            self._node_labels.append(label_ids[label])
+            self._label_nodes[label].append(node_id)
+            self._by_name[label][name] = node_id
+        self.node_count = len(self._names)
+
+        self.rel_types = []
+        self._load_adjacency()
+
+        self.node_properties = lru_cache(maxsize=cache_size)(self._load_node_properties)
+        self.relationship_properties = lru_cache(maxsize=cache_size)(self._load_relationship_properties)
+        logger.info(f"已加载内嵌图 {path}: {self.node_count} 个节点，{self.relationship_count} 条关系，"
+                    f"耗时 {time.time() - started:.2f} 秒")
+
+    def _load_adjacency(self):
+        """按起点和终点各建一份 CSR 邻接表：offsets[n]..offsets[n+1] 是节点 n 的关系区间"""
+        type_ids = {}
+        starts, ends, types, rel_ids = array("l"), array("l"), array("H"), array("l")
+        for rel_id, rel_type, start, end in self._conn.execute(
+                "SELECT id, type, start, end FROM relationships ORDER BY id"):
+            if rel_type not in type_ids:
+                type_ids[rel_type] = len(self.rel_types)
+                self.rel_types.append(rel_type)
+            rel_ids.append(rel_id)
+            starts.append(start)
+            ends.append(end)
+            types.append(type_ids[rel_type])
+        self.relationship_count = len(rel_ids)
+        self._type_ids = type_ids
+        # (起点标签, 关系类型, 终点标签) → 关系数量，用于直接回答关系计数
+        self._triple_counts = {}
+        for k in range(len(rel_ids)):
+            key = (self._node_labels[starts[k]], types[k], self._node_labels[ends[k]])
+            self._triple_counts[key] = self._triple_counts.get(key, 0) + 1
+        self._out = _build_csr(self.node_count, starts, ends, types, rel_ids)
+        self._in = _build_csr(self.node_count, ends, starts, types, rel_ids)
+
+    def _load_node_properties(self, node_id: int) -> Dict:
+        with self._lock:
+            row = self._conn.execute("SELECT properties FROM nodes WHERE id = ?", (node_id,)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def _load_relationship_properties(self, rel_id: int) -> Dict:
+        with self._lock:
+            row = self._conn.execute("SELECT properties FROM relationships WHERE id = ?", (rel_id,)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def node_label(self, node_id: int) -> str:
+        return self.labels[self._node_labels[node_id]]
+
+    def node_property(self, node_id: int, key: str):
+        # 名称常驻内存，最常见的属性访问不需要查 SQLite
+        if key == "name":
+            return self._names[node_id]
+        return self.node_properties(node_id).get(key)
+
+    def label_nodes(self, label: str):
+        return self._label_nodes.get(label, ())
+
+    def label_size(self, label: str) -> int:
+        return len(self._label_nodes.get(label, ()))
+
+    def find_by_name(self, name, label: Optional[str] = None) -> List[int]:
+        """按名称查找节点 ID（不指定标签时在所有标签中查找）"""
+        if label is not None:
+            node_id = self._by_name.get(label, {}).get(name)
+            return [] if node_id is None else [node_id]
+        return [index[name] for index in self._by_name.values() if name in index]
+
+    def pattern_count(self, start_label: Optional[str], types: Optional[List[str]], end_label: Optional[str],
+                      direction: str = "out") -> int:
+        """
+        单跳模式 (start_label)-[:types]-(end_label) 的匹配数量
+
+        无方向模式中每条关系从两端各匹配一次，与 Cypher 一致。
+        """
+        label_ids = {label: index for index, label in enumerate(self.labels)}
+        start_id = label_ids.get(start_label, -1) if start_label else None
+        end_id = label_ids.get(end_label, -1) if end_label else None
+        type_filter = {self._type_ids.get(t, -1) for t in types} if types else None
+
+        def count(source, target):
+            return sum(
+                n for (s, t, e), n in self._triple_counts.items()
+                if (source is None or s == source) and (target is None or e == target)
+                and (type_filter is None or t in type_filter)
+            )
+
+        if direction == "out":
+            return count(start_id, end_id)
+        if direction == "in":
+            return count(end_id, start_id)
+        return count(start_id, end_id) + count(end_id, start_id)
+
+    def neighbors(self, node_id: int, direction: str, types: Optional[List[str]] = None):
+        """
+        遍历节点的关系
+
+        Args:
+            node_id: 节点 ID
+            direction: out / in / both
+            types: 关系类型过滤，为空时不过滤
+
+        Yields:
+            (关系 ID, 关系类型, 另一端节点 ID, 是否为出边)
+        """
+        type_filter = None
+        if types:
+            type_filter = {self._type_ids[t] for t in types if t in self._type_ids}
+            if not type_filter:
+                return
+        if direction in ("out", "both"):
+            yield from self._scan(self._out, node_id, type_filter, True)
+        if direction in ("in", "both"):
+            yield from self._scan(self._in, node_id, type_filter, False)
+
+    def _scan(self, csr, node_id, type_filter, outgoing):
+        offsets, others, types, rel_ids = csr
+        rel_types = self.rel_types
+        for k in range(offsets[node_id], offsets[node_id + 1]):
+            t = types[k]
+            if type_filter is None or t in type_filter:
+                yield rel_ids[k], rel_types[t], others[k], outgoing
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _build_csr(node_count, sources, targets, types, rel_ids):
+    """计数排序构建 CSR：(offsets, 另一端节点, 关系类型, 关系 ID)"""
+    offsets = array("l", [0]) * (node_count + 1)
+    for source in sources:
+        offsets[source + 1] += 1
+    for n in range(node_count):
+        offsets[n + 1] += offsets[n]
+    position = array("l", offsets[:-1]) if node_count else array("l")
+    size = len(sources)
+    others = array("l", [0]) * size
+    out_types = array("H", [0]) * size
+    out_ids = array("l", [0]) * size
+    for k in range(size):
+        source = sources[k]
+        slot = position[source]
+        position[source] = slot + 1
+        others[slot] = targets[k]
+        out_types[slot] = types[k]
+        out_ids[slot] = rel_ids[k]
+    return offsets, others, out_types, out_ids
+
+
+class EmbeddedBackend(GraphBackend):
+    """在内嵌图上执行 Cypher 子集查询的后端"""
+
+    name = "embedded"
+
+    def __init__(self, path: str, fallback_on_write: bool = False):
+        """
+        加载内嵌图
+
+        Args:
+            path: 内嵌图文件路径
+            fallback_on_write: 图谱发生写入后是否把全部查询交给下一个后端（hybrid 模式）
+        """
+        self.graph = EmbeddedGraph(path)
+        self.fallback_on_write = fallback_on_write
+        self.stale = False
+        self._listener = None
+        if fallback_on_write:
+            # 构建之后已经写入过内嵌图中的数据（如导入或页面编辑）时，内嵌图一开始就是过期的
+            self._check_writes("内嵌图构建后的写入", *graph_writes.writes_since(os.path.getmtime(path)))
+            self._events = graph_writes.EventReader()
+            self._next_poll = 0.0
+            self._listener = _stale_listener(weakref.ref(self))
+            graph_writes.subscribe(self._listener)
+
+    def run(self, cypher: str, params: Optional[Dict] = None) -> List[Dict]:
+        if self.fallback_on_write:
+            if not self.stale and is_write(cypher):
+                # 只写入内嵌图之外的标签（如搜索历史、分享配置）时内嵌图仍然可用
+                targets = write_targets(cypher)
+                if targets is None:
+                    self._mark_stale("写查询")
+                else:
+                    self._check_writes("写查询", *targets)
+            self._poll_events()
+            if self.stale:
+                raise UnsupportedQuery("图谱写入后内嵌图已过期")
+        return execute(cypher, params, self.graph)
+
+    def _poll_events(self):
+        """按间隔读取其他进程发布的写入事件"""
+        now = time.time()
+        if self.stale or now < self._next_poll:
+            return
+        self._next_poll = now + EVENT_POLL_INTERVAL
+        try:
+            labels, rel_types = self._events.poll()
+        except OSError:
+            return
+        self._check_writes("其他进程的写入事件", labels, rel_types)
+
+    def _check_writes(self, reason: str, labels, rel_types):
+        """写入涉及内嵌图中的标签或关系类型（或任意标签）时标记为过期"""
+        if (graph_writes.ANY in labels or graph_writes.ANY in rel_types
+                or not labels.isdisjoint(self.graph.labels) or not rel_types.isdisjoint(self.graph.rel_types)):
+            self._mark_stale(reason)
+
+    def _mark_stale(self, reason: str):
+        if not self.stale:
+            self.stale = True
+            logger.info(f"内嵌图已过期（{reason}），之后的查询交给 Neo4j，重新构建内嵌图后恢复")
+
+    def close(self):
+        if self._listener is not None:
+            graph_writes.unsubscribe(self._listener)
+        self.graph.close()
+
+
+def _stale_listener(backend_ref):
+    """本进程写入事件的回调，只持有后端的弱引用"""
+    def listener(labels, rel_types):
+        backend = backend_ref()
+        if backend is not None:
+            backend._check_writes("写入事件", labels, rel_types)
+    return listener
+
+
+def build_embedded_graph(data_dir: str = "data", output_path: str = "data/embedded_graph.sqlite") -> Dict:
+    """
+    由数据文件构建内嵌图
+
+    节点按 (标签, 名称) 去重，保留首次出现的行；关系按 (类型, 起点, 终点) 去重并跳过端点不存在的行，
+    与导入 Neo4j 时的 MERGE 语义一致。
+
+    Args:
+        data_dir: 数据目录
+        output_path: 输出的 SQLite 文件路径
+
+    Returns:
+        各数据文件写入的节点或关系数量
+    """
+    from src.bulk_export import NODE_SPECS, REL_SPECS, iter_json_lines
+    from src.field_mapping import NodeMapping, relationship_mapping
+    from src.neo4j_handler import resolve_data_paths
+
+    paths = resolve_data_paths(data_dir)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_path = f"{output_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    stats = {}
+    try:
+        for statement in SCHEMA:
+            conn.execute(statement)
+        conn.executemany("INSERT INTO labels (label) VALUES (?)", [(label,) for label, _ in NODE_SPECS])
+
+        node_ids = {}
+        node_codes = {}
+        next_id = 0
+        mapping = NodeMapping()
+        for label, path_attr in NODE_SPECS:
+            ids = node_ids.setdefault(label, {})
+            codes = node_codes.setdefault(label, {})
+            file_path = paths[path_attr]
+            if not os.path.exists(file_path):
+                logger.warning(f"数据文件不存在: {file_path}")
+                continue
+            batch = []
+            for row in iter_json_lines(file_path):
+                row, reason = mapping.apply(row)
+                if reason or row["name"] in ids:
+                    continue
+                ids[row["name"]] = next_id
+                if row.get("code"):
+                    codes.setdefault(row["code"], next_id)
+                batch.append((next_id, label, row["name"], json.dumps(row, ensure_ascii=False)))
+                next_id += 1
+                if len(batch) >= INSERT_BATCH:
+                    conn.executemany("INSERT INTO nodes VALUES (?, ?, ?, ?)", batch)
+                    batch = []
+            conn.executemany("INSERT INTO nodes VALUES (?, ?, ?, ?)", batch)
+            stats[label] = len(ids)
+
+        next_id = 0
+        for rel_key, path_attr, start_label, end_label, rel_type in REL_SPECS:
+            file_path = paths[path_attr]
+            if not os.path.exists(file_path):
+                logger.warning(f"数据文件不存在: {file_path}")
+                continue
+            rel_mapping = relationship_mapping(rel_key)
+            seen = set()
+            batch = []
+            for row in iter_json_lines(file_path):
+                mapped, reason = rel_mapping.apply(row)
+                if reason:
+                    continue
+                start_index = node_codes if mapped["start_key"] == "code" else node_ids
+                end_index = node_codes if mapped["end_key"] == "code" else node_ids
+                start = start_index[start_label].get(mapped["start"])
+                end = end_index[end_label].get(mapped["end"])
+                if start is None or end is None or (start, end) in seen:
+                    continue
+                seen.add((start, end))
+                batch.append((next_id, rel_type, start, end, json.dumps(mapped["properties"], ensure_ascii=False)))
+                next_id += 1
+                if len(batch) >= INSERT_BATCH:
+                    conn.executemany("INSERT INTO relationships VALUES (?, ?, ?, ?, ?)", batch)
+                    batch = []
+            conn.executemany("INSERT INTO relationships VALUES (?, ?, ?, ?, ?)", batch)
+            stats[rel_key] = len(seen)
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, output_path)
+    logger.info(f"内嵌图已写入 {output_path}: {stats}")
+    return stats
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="由数据文件构建内嵌图")
+    parser.add_argument("--data-dir", default="data", help="数据目录")
+    parser.add_argument("--output", default="data/embedded_graph.sqlite", help="输出的 SQLite 文件")
+    args = parser.parse_args()
+    build_embedded_graph(args.data_dir, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,7 @@ import csv
 import logging
 import uuid
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, Iterable, List, Optional, Any, Tuple
 import pandas as pd
 from io import BytesIO, StringIO
 import base64
@@ -67,6 +67,51 @@ class ExportHandler:
             logger.error(f"导出图谱数据失败: {str(e)}")
             return False, f"导出失败: {str(e)}", None
     
+    def export_graph_file(self, nodes: Iterable[Dict], edges: Iterable[Dict],
+                          format_type: str = "json", filename: Optional[str] = None) -> Tuple[bool, str, Optional[str]]:
+        """
+        把图谱数据边读边写入导出目录下的文件
+        
+        nodes 和 edges 可以是迭代器（如 Neo4jConnector.stream 的结果），JSON 和 CSV 格式逐条写入，
+        内存中不保留完整的节点和边列表；Excel 格式需要先收集全部数据。
+        
+        Args:
+            nodes: 节点字典的可迭代对象，先于 edges 读完
+            edges: 边字典的可迭代对象
+            format_type: 导出格式 ("json", "csv", "xlsx")
+            filename: 文件名（不含扩展名，可选）
+            
+        Returns:
+            (成功标志, 消息, 文件路径)
+        """
+        try:
+            if format_type not in self.allowed_formats:
+                return False, f"不支持的导出格式: {format_type}", None
+            
+            if not filename:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                filename = f"knowledge_graph_{timestamp}"
+            path = os.path.join(self.export_dir, f"{filename}.{format_type}")
+            
+            if format_type in ("json", "csv"):
+                write = self._write_json if format_type == "json" else self._write_csv
+                with open(path, "w", encoding="utf-8", newline="") as out:
+                    node_count, edge_count = write(nodes, edges, out)
+                return True, f"成功导出 {node_count} 个节点和 {edge_count} 条边", path
+            elif format_type == "xlsx":
+                success, message, file_data = self._export_xlsx(list(nodes), list(edges), filename)
+                if not success:
+                    return False, message, None
+                with open(path, "wb") as out:
+                    out.write(file_data)
+                return True, message, path
+            else:
+                return False, f"暂不支持 {format_type} 格式导出", None
+                
+        except Exception as e:
+            logger.error(f"导出图谱数据失败: {str(e)}")
+            return False, f"导出失败: {str(e)}", None
+    
     def export_analysis_report(self, analysis_data: Dict, format_type: str = "json", 
                              filename: Optional[str] = None) -> Tuple[bool, str, Optional[bytes]]:
         """
@@ -323,22 +368,43 @@ class ExportHandler:
     
     def _export_json(self, nodes: List[Dict], edges: List[Dict], filename: str) -> Tuple[bool, str, bytes]:
         """导出JSON格式"""
-        data = {
-            "nodes": nodes,
-            "edges": edges,
-            "exported_at": datetime.now().isoformat(),
-            "total_nodes": len(nodes),
-            "total_edges": len(edges)
-        }
+        json_buffer = StringIO()
+        node_count, edge_count = self._write_json(nodes, edges, json_buffer)
+        file_data = json_buffer.getvalue().encode('utf-8')
         
-        json_data = json.dumps(data, ensure_ascii=False, indent=2)
-        file_data = json_data.encode('utf-8')
+        return True, f"成功导出 {node_count} 个节点和 {edge_count} 条边", file_data
+    
+    def _write_json(self, nodes: Iterable[Dict], edges: Iterable[Dict], out) -> Tuple[int, int]:
+        """逐条写入JSON，输出与 json.dumps(..., indent=2) 相同，返回 (节点数, 边数)"""
+        def write_array(key, items):
+            out.write(f'  "{key}": [')
+            count = 0
+            for item in items:
+                text = json.dumps(item, ensure_ascii=False, indent=2).replace("\n", "\n    ")
+                out.write(("\n    " if count == 0 else ",\n    ") + text)
+                count += 1
+            out.write("\n  ]" if count else "]")
+            return count
         
-        return True, f"成功导出 {len(nodes)} 个节点和 {len(edges)} 条边", file_data
+        out.write("{\n")
+        node_count = write_array("nodes", nodes)
+        out.write(",\n")
+        edge_count = write_array("edges", edges)
+        out.write(f',\n  "exported_at": {json.dumps(datetime.now().isoformat())},\n')
+        out.write(f'  "total_nodes": {node_count},\n  "total_edges": {edge_count}\n}}')
+        return node_count, edge_count
     
     def _export_csv(self, nodes: List[Dict], edges: List[Dict], filename: str) -> Tuple[bool, str, bytes]:
         """导出CSV格式"""
         csv_buffer = StringIO()
+        node_count, edge_count = self._write_csv(nodes, edges, csv_buffer)
+        
+        file_data = csv_buffer.getvalue().encode('utf-8')
+        return True, f"成功导出 {node_count} 个节点和 {edge_count} 条边", file_data
+    
+    def _write_csv(self, nodes: Iterable[Dict], edges: Iterable[Dict], csv_buffer) -> Tuple[int, int]:
+        """逐条写入CSV，返回 (节点数, 边数)"""
+        node_count = edge_count = 0
         
         # 写入节点数据
         csv_buffer.write("节点数据\n")
@@ -352,6 +418,7 @@ class ExportHandler:
             other_props_str = json.dumps(other_props, ensure_ascii=False) if other_props else ""
             
             csv_buffer.write(f'"{node_id}","{label}","{group}","{other_props_str}"\n')
+            node_count += 1
         
         # 写入边数据
         csv_buffer.write("\n边数据\n")
@@ -365,9 +432,9 @@ class ExportHandler:
             other_props_str = json.dumps(other_props, ensure_ascii=False) if other_props else ""
             
             csv_buffer.write(f'"{from_node}","{to_node}","{label}","{other_props_str}"\n')
+            edge_count += 1
         
-        file_data = csv_buffer.getvalue().encode('utf-8')
-        return True, f"成功导出 {len(nodes)} 个节点和 {len(edges)} 条边", file_data
+        return node_count, edge_count
     
     def _export_xlsx(self, nodes: List[Dict], edges: List[Dict], filename: str) -> Tuple[bool, str, bytes]:
         """导出Excel格式"""
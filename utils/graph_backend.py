@@ -0,0 +1,110 @@
+"""
+图查询后端接口
+Neo4jConnector 按配置的顺序依次尝试各后端，后端无法执行的查询抛出 UnsupportedQuery 交给下一个后端
+"""
+import logging
+from typing import Dict, Iterator, List, Optional
+
+from src.connection_registry import DEFAULT_FETCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class UnsupportedQuery(Exception):
+    """后端不支持的查询（写操作、超出内嵌后端查询子集等）"""
+
+
+class GraphBackend:
+    """图查询后端基类"""
+
+    name = "base"
+
+    def run(self, cypher: str, params: Optional[Dict] = None) -> List[Dict]:
+        """
+        执行查询
+
+        Args:
+            cypher: Cypher查询字符串
+            params: 查询参数字典
+
+        Returns:
+            结果字典列表
+
+        Raises:
+            UnsupportedQuery: 该后端无法执行此查询
+        """
+        raise NotImplementedError
+
+    def stream(self, cypher: str, params: Optional[Dict] = None,
+               fetch_size: int = DEFAULT_FETCH_SIZE) -> Iterator[List[Dict]]:
+        """
+        按批执行查询，默认一次取回全部结果后分批返回，能逐批读取的后端覆盖此方法
+
+        Args:
+            cypher: Cypher查询字符串
+            params: 查询参数字典
+            fetch_size: 每批的最大行数
+
+        Yields:
+            结果字典列表
+
+        Raises:
+            UnsupportedQuery: 该后端无法执行此查询（在取第一批时抛出）
+        """
+        rows = self.run(cypher, params)
+        for start in range(0, len(rows), fetch_size):
+            yield rows[start:start + fetch_size]
+
+    def close(self):
+        """释放后端资源"""
+
+
+class Neo4jBackend(GraphBackend):
+    """通过进程级共享连接池（见 src.connection_registry）访问 Neo4j 的后端"""
+
+    name = "neo4j"
+
+    def __init__(self, uri: str, username: str, password: str, caller: str = "default"):
+        from src.connection_registry import get_registry
+        self.graph = get_registry().graph(uri, username, password, caller=caller)
+
+    def run(self, cypher: str, params: Optional[Dict] = None) -> List[Dict]:
+        return self.graph.run(cypher, **(params or {})).data()
+
+    def stream(self, cypher: str, params: Optional[Dict] = None,
+               fetch_size: int = DEFAULT_FETCH_SIZE) -> Iterator[List[Dict]]:
+        return self.graph.stream(cypher, params, fetch_size)
+
+
+def create_backends(backend_config: Dict, db_config: Dict, caller: str = "default") -> List[GraphBackend]:
+    """
+    按配置创建后端列表
+
+    backend.type 取值:
+    - neo4j: 只使用 Neo4j（默认）
+    - embedded: 只使用内嵌图，不支持的查询返回空结果
+    - hybrid: 内嵌图优先，不支持的查询（包括写操作）交给 Neo4j；写入内嵌图中的标签或关系类型后内嵌图过期，查询全部交给 Neo4j
+
+    Args:
+        backend_config: config 中的 backend 配置
+        db_config: config 中的 neo4j 配置
+        caller: 调用方名称，用于共享连接池的并发限制
+
+    Returns:
+        按优先级排列的后端列表，创建失败的后端不包含在内
+    """
+    backend_type = backend_config.get("type", "neo4j")
+    backends = []
+    if backend_type in ("embedded", "hybrid"):
+        from utils.embedded_graph import EmbeddedBackend
+        try:
+            backends.append(EmbeddedBackend(backend_config.get("embedded_path", "data/embedded_graph.sqlite"),
+                                            fallback_on_write=backend_type == "hybrid"))
+        except Exception as e:
+            logger.error(f"加载内嵌图失败: {e}")
+    if backend_type in ("neo4j", "hybrid"):
+        try:
+            backends.append(Neo4jBackend(db_config["uri"], db_config["username"], db_config["password"], caller))
+        except Exception as e:
+            logger.error(f"连接Neo4j数据库失败: {e}")
+    return backends
@@ -335,6 +335,7 @@ class QueryBuilder:
                 "category": category,
                 "is_public": is_public
             })
+            self.db.invalidate(labels=["QueryTemplate"])
             
             logger.info(f"保存查询模板成功: {name}")
             return True, f"查询模板 '{name}' 保存成功"
@@ -426,6 +427,7 @@ class QueryBuilder:
             """
             
             results = self.db.query(delete_query, {"name": name})
+            self.db.invalidate(labels=["QueryTemplate"])
             
             if results and results[0]["deleted_count"] > 0:
                 logger.info(f"删除查询模板成功: {name}")
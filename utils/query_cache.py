@@ -0,0 +1,256 @@
+"""
+查询结果缓存：进程内所有 Neo4jConnector 共用，按规范化的 Cypher 和参数缓存结果
+
+- 按调用点选择是否缓存：Neo4jConnector.query(..., ttl=秒数)，不传 ttl 的查询不经过缓存
+- 条目超过 TTL 后失效；总大小（估算字节数）或条目数超过上限时按最近最少使用淘汰
+- 每个条目按查询中出现的节点标签和关系类型打标签；写操作通过 src.graph_writes 发布改动的标签和关系类型，
+  只有依赖它们的条目失效
+"""
+import json
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from src import graph_writes
+from src.graph_writes import ANY
+
+# 默认设置，可通过 config 中的 query_cache 覆盖
+DEFAULT_SETTINGS = {
+    # 缓存结果的估算总字节数上限
+    "max_bytes": 64 * 1024 * 1024,
+    # 条目数上限
+    "max_entries": 10000,
+    # 读取其他进程写入事件的最短间隔秒数
+    "event_poll_interval": 1.0,
+}
+
+# 字符串字面量、转义标识符或连续空白；只压缩字面量之外的空白
+_CYPHER_TOKENS = re.compile(r"""('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|`[^`]*`)|\s+""")
+
+# 标签或关系类型名称（普通或反引号转义）
+_NAME = r"(?:\w+|`[^`]+`)"
+# 节点模式 (变量:标签:标签 {属性})；前面紧跟标识符的是函数调用
+_NODE_PATTERN = re.compile(rf"(?<![\w.`])\(\s*(\w*)\s*((?::\s*{_NAME}\s*)*)(?:\{{[^{{}}]*\}}\s*)?\)")
+_LABEL = re.compile(rf":\s*({_NAME})")
+# 关系模式 -[变量:类型|类型 *范围 {属性}]
+_REL_PATTERN = re.compile(rf"-\s*\[\s*\w*\s*(?::\s*({_NAME}(?:\s*\|\s*:?\s*{_NAME})*))?[^\]]*\]")
+_REL_TYPE = re.compile(_NAME)
+# 不带方括号的关系 --、-->、<--
+_BARE_REL = re.compile(r"\)\s*<?-\s*-\s*>?\s*\(")
+# 过程调用（CALL db.labels() 等），依赖关系未知；CALL { 子查询 } 不算
+_PROCEDURE_CALL = re.compile(r"\bCALL\s+[A-Za-z_]", re.IGNORECASE)
+# 字符串字面量，分析标签前替换为空字符串
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+
+
+def normalize_cypher(cypher):
+    """去掉首尾空白并把字面量之外的连续空白压缩为一个空格，缩进不同的同一查询共用缓存"""
+    return _CYPHER_TOKENS.sub(lambda m: m.group(1) or " ", cypher.strip())
+
+
+def query_tags(cypher):
+    """
+    查询依赖的节点标签和关系类型标签，如 {"label:company", "rel:所属行业"}
+
+    出现无标签节点（且变量没有在别处带标签出现）时依赖任意标签（label:*），出现无类型关系时依赖任意关系类型（rel:*），
+    无法分析的过程调用同时依赖两者。
+    """
+    cypher = _STRING_LITERAL.sub("''", cypher)
+    if _PROCEDURE_CALL.search(cypher):
+        return frozenset({f"label:{ANY}", f"rel:{ANY}"})
+    tags = set()
+    labeled, unlabeled = set(), set()
+    for variable, labels in _NODE_PATTERN.findall(cypher):
+        names = [_unquote(name) for name in _LABEL.findall(labels)]
+        tags.update(f"label:{name}" for name in names)
+        (labeled if names else unlabeled).add(variable)
+    if "" in unlabeled or unlabeled - labeled:
+        tags.add(f"label:{ANY}")
+    for types in _REL_PATTERN.findall(cypher):
+        if types:
+            tags.update(f"rel:{_unquote(name)}" for name in _REL_TYPE.findall(types))
+        else:
+            tags.add(f"rel:{ANY}")
+    if _BARE_REL.search(cypher):
+        tags.add(f"rel:{ANY}")
+    return frozenset(tags or {f"label:{ANY}", f"rel:{ANY}"})
+
+
+def _unquote(name):
+    return name[1:-1] if name.startswith("`") else name
+
+
+def cache_key(cypher, params=None):
+    """规范化的 Cypher 加按键排序的参数"""
+    return normalize_cypher(cypher) + "\n" + json.dumps(params or {}, sort_keys=True, ensure_ascii=False, default=repr)
+
+
+def estimate_size(value):
+    """估算结果占用的字节数（递归累加容器及其元素）"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+class QueryCache:
+    """带 TTL 的 LRU 结果缓存，线程安全"""
+
+    def __init__(self, settings=None):
+        """
+        初始化缓存
+
+        Args:
+            settings: 覆盖 DEFAULT_SETTINGS 的设置字典
+        """
+        self.settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+        self._lock = threading.Lock()
+        # key -> (结果, 估算字节数, 过期时间, 依赖标签)
+        self._entries = OrderedDict()
+        self.bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+        # 每次失效加一；查询开始后发生过失效的结果不写入缓存，避免缓存写入前读到的旧数据
+        self.generation = 0
+        self._events = graph_writes.EventReader()
+        self._next_poll = 0.0
+
+    def get(self, key):
+        """
+        取得未过期的缓存结果
+
+        Returns:
+            结果行列表（每行是新的字典，调用方可以修改），没有缓存时返回 None
+        """
+        self._poll_events()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            rows, _, expires, _ = entry
+            if time.time() >= expires:
+                self._remove(key)
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+        return _copy_rows(rows)
+
+    def put(self, key, rows, ttl, tags=None, generation=None):
+        """
+        缓存查询结果，超过上限时淘汰最久未使用的条目
+
+        Args:
+            key: cache_key 生成的键
+            rows: 结果行列表
+            ttl: 有效秒数
+            tags: 依赖的标签（见 query_tags），默认依赖任意标签和关系类型
+            generation: 查询开始时的 generation，之后发生过失效则不缓存
+        """
+        tags = tags or frozenset({f"label:{ANY}", f"rel:{ANY}"})
+        size = estimate_size(rows)
+        if size > self.settings["max_bytes"]:
+            return
+        rows = _copy_rows(rows)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (rows, size, time.time() + ttl, tags)
+            self.bytes += size
+            while self._entries and (self.bytes > self.settings["max_bytes"]
+                                     or len(self._entries) > self.settings["max_entries"]):
+                self._remove(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def _remove(self, key):
+        size = self._entries.pop(key)[1]
+        self.bytes -= size
+
+    def invalidate(self, labels=(), rel_types=()):
+        """
+        失效依赖指定标签或关系类型的条目
+
+        Args:
+            labels: 改动过的节点标签，含 ANY 时失效所有依赖节点标签的条目
+            rel_types: 改动过的关系类型，含 ANY 时失效所有依赖关系类型的条目
+
+        Returns:
+            失效的条目数
+        """
+        def matches(tags, kind, names):
+            if not names:
+                return False
+            if ANY in names:
+                return any(tag.startswith(f"{kind}:") for tag in tags)
+            return f"{kind}:{ANY}" in tags or any(f"{kind}:{name}" in tags for name in names)
+
+        labels, rel_types = set(labels), set(rel_types)
+        with self._lock:
+            stale = [key for key, (_, _, _, tags) in self._entries.items()
+                     if matches(tags, "label", labels) or matches(tags, "rel", rel_types)]
+            for key in stale:
+                self._remove(key)
+            self.stats["invalidations"] += len(stale)
+            self.generation += 1
+        return len(stale)
+
+    def _poll_events(self):
+        """按间隔读取其他进程发布的写入事件"""
+        now = time.time()
+        if now < self._next_poll:
+            return
+        self._next_poll = now + self.settings["event_poll_interval"]
+        try:
+            labels, rel_types = self._events.poll()
+        except OSError:
+            return
+        if labels or rel_types:
+            self.invalidate(labels, rel_types)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+            self.generation += 1
+
+    def status(self):
+        """条目数、估算字节数和累计命中统计"""
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+                **self.stats,
+            }
+
+
+def _copy_rows(rows):
+    return [dict(row) if isinstance(row, dict) else row for row in rows]
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_query_cache(settings=None):
+    """
+    进程级查询缓存，首次调用时创建
+
+    Args:
+        settings: 首次创建时使用的设置（见 DEFAULT_SETTINGS），之后的调用忽略
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = QueryCache(settings)
+            graph_writes.subscribe(_cache.invalidate)
+        return _cache
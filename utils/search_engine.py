@@ -99,7 +99,7 @@ class SearchEngine:
                 """
             
             # 执行查询
-            results = self.db.query(cypher_query, {"query": query, "limit": limit})
+            results = self.db.query(cypher_query, {"query": query, "limit": limit}, ttl=self.cache_ttl)
             
             # 格式化结果
             search_results = []
@@ -143,7 +143,7 @@ class SearchEngine:
                        other.description as description
                 LIMIT $limit
                 """
-                results = self.db.query(query, {"name": entity_name, "limit": limit})
+                results = self.db.query(query, {"name": entity_name, "limit": limit}, ttl=self.cache_ttl)
                 
                 for result in results:
                     recommendations.append({
@@ -175,7 +175,7 @@ class SearchEngine:
                 ORDER BY confidence_score DESC
                 LIMIT $limit
                 """
-                results = self.db.query(query, {"name": entity_name, "limit": limit})
+                results = self.db.query(query, {"name": entity_name, "limit": limit}, ttl=self.cache_ttl)
                 
                 for result in results:
                     recommendations.append({
@@ -208,7 +208,7 @@ class SearchEngine:
                 ORDER BY confidence_score DESC
                 LIMIT $limit
                 """
-                results = self.db.query(query, {"name": entity_name, "limit": limit})
+                results = self.db.query(query, {"name": entity_name, "limit": limit}, ttl=self.cache_ttl)
                 
                 for result in results:
                     recommendations.append({
@@ -305,7 +305,7 @@ class SearchEngine:
                 "name": entity_name, 
                 "threshold": threshold, 
                 "limit": limit
-            })
+            }, ttl=self.cache_ttl)
             
             similar_entities = []
             for result in results:
@@ -451,7 +451,7 @@ class SearchEngine:
                 LIMIT $limit
                 """
             
-            results = self.db.query(query, {"query": partial_query.strip(), "limit": limit})
+            results = self.db.query(query, {"query": partial_query.strip(), "limit": limit}, ttl=self.cache_ttl)
             
             suggestions = [result["suggestion"] for result in results]
             return suggestions